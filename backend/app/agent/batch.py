@@ -0,0 +1,131 @@
+"""批量对话提交 — 一次提交多条消息，经 Agent 工作池以有界并发逐条执行。
+
+每个批次由一个投递协程按批次并发上限把任务交给 AgentRunner：同一批次同时在
+工作池中（排队或执行）的任务不超过上限，避免积压批次占满队列、挤占交互式请求。
+"""
+
+import asyncio
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+
+from app.agent.runner import AgentRunner, QueueFullError, agent_runner
+
+logger = logging.getLogger(__name__)
+
+# 单个批次的消息条数上限
+AGENT_BATCH_MAX_SIZE = int(os.environ.get("AGENT_BATCH_MAX_SIZE", "500"))
+# 单个批次默认的并发上限（同时交给工作池的任务数）
+AGENT_BATCH_CONCURRENCY = int(os.environ.get("AGENT_BATCH_CONCURRENCY", "2"))
+# 保留的批次记录数，超出后淘汰最早的已投递完成批次
+AGENT_BATCH_HISTORY = int(os.environ.get("AGENT_BATCH_HISTORY", "100"))
+# 工作池队列已满时的最长重试间隔（秒）
+_QUEUE_FULL_BACKOFF_SECONDS = 1.0
+
+
+@dataclass
+class ChatBatch:
+    """一个批次：消息与会话一一对应，按顺序投递。"""
+
+    batch_id: str
+    session_ids: list[str]
+    messages: list[str]
+    concurrency: int
+    created_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+    submitted: int = 0
+    task: asyncio.Task | None = field(default=None, repr=False)
+
+    @property
+    def fully_submitted(self) -> bool:
+        return self.submitted == len(self.session_ids)
+
+
+class BatchScheduler:
+    """批次登记与投递。"""
+
+    def __init__(
+        self,
+        runner: AgentRunner = agent_runner,
+        max_batches: int = AGENT_BATCH_HISTORY,
+    ):
+        self._runner = runner
+        self._max_batches = max_batches
+        self._batches: OrderedDict[str, ChatBatch] = OrderedDict()
+        self._queue_full_retries = 0
+
+    def submit(
+        self,
+        run: Callable[[str, str], Awaitable[None]],
+        session_ids: list[str],
+        messages: list[str],
+        concurrency: int = AGENT_BATCH_CONCURRENCY,
+    ) -> ChatBatch:
+        """登记批次并启动后台投递，立即返回。须在事件循环中调用。"""
+        batch = ChatBatch(
+            batch_id=str(uuid.uuid4()),
+            session_ids=session_ids,
+            messages=messages,
+            concurrency=concurrency,
+        )
+        batch.task = asyncio.get_running_loop().create_task(
+            self._feed(batch, run), name=f"chat-batch-{batch.batch_id}"
+        )
+        self._batches[batch.batch_id] = batch
+        self._trim()
+        return batch
+
+    def get(self, batch_id: str) -> ChatBatch | None:
+        return self._batches.get(batch_id)
+
+    def _trim(self) -> None:
+        """超出保留数量时淘汰最早的已投递完成批次。"""
+        excess = len(self._batches) - self._max_batches
+        for batch_id in [b.batch_id for b in self._batches.values() if b.task.done()]:
+            if excess <= 0:
+                break
+            del self._batches[batch_id]
+            excess -= 1
+
+    async def _feed(self, batch: ChatBatch, run: Callable[[str, str], Awaitable[None]]) -> None:
+        """按批次并发上限逐条投递；工作池队列已满时退避重试。"""
+        slots = asyncio.Semaphore(batch.concurrency)
+
+        async def run_one(session_id: str, message: str) -> None:
+            try:
+                await run(session_id, message)
+            finally:
+                slots.release()
+
+        for session_id, message in zip(batch.session_ids, batch.messages):
+            await slots.acquire()
+            while True:
+                try:
+                    self._runner.submit(run_one, session_id, message)
+                    break
+                except QueueFullError as e:
+                    self._queue_full_retries += 1
+                    await asyncio.sleep(min(e.retry_after, _QUEUE_FULL_BACKOFF_SECONDS))
+            batch.submitted += 1
+
+    async def stop(self) -> None:
+        """取消仍在投递中的批次（已交给工作池的任务由工作池处理）。"""
+        tasks = [b.task for b in self._batches.values() if b.task and not b.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        """返回批次投递指标。"""
+        return {
+            "batches": len(self._batches),
+            "feeding": sum(1 for b in self._batches.values() if not b.task.done()),
+            "queue_full_retries": self._queue_full_retries,
+        }
+
+
+# 模块级单例
+batch_scheduler = BatchScheduler()
@@ -1,7 +1,9 @@
-"""LangGraph Agent 引擎 — 意图识别、Skill 路由、工具调用链。"""
+"""LangGraph Agent 引擎 — 意图识别、Skill 路由、静态计划执行、工具调用链。"""
 
+import asyncio
 import json
 import os
+import time
 from typing import Literal
 
 from langchain_core.messages import (
@@ -13,16 +15,27 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 from langgraph.graph import END, START, StateGraph
 from typing_extensions import TypedDict
 
-from app.agent.skills import get_all_skills, get_skill
+from app.agent.intent_cache import intent_cache
+from app.agent.intent_rules import match_intent_rule
+from app.agent.planner import (
+    PlanStep,
+    build_extraction_prompt,
+    parse_extracted_inputs,
+    parse_plan,
+    render_args,
+)
+from app.agent.skills import get_all_skills, get_registry_version, get_skill
 from app.agent.tools import get_all_tools, get_tool
+from app.agent.tools import get_registry_version as get_tool_registry_version
 from app.mock.upstream import simulate_upstream_reply
 from app.schemas.models import (
     ActionStatus,
     ActionType,
     Channel,
     SessionStatus,
+    SkillDefinition,
 )
-from app.store.memory import store
+from app.store.memory import current_session_id, store
 
 
 # ── 1. 轻量图状态 ──────────────────────────────────────────────────────────────
@@ -36,6 +49,7 @@ class AgentGraphState(TypedDict):
     matched_intent: str | None
     matched_skill: str | None
     error_message: str | None
+    plan_fallback: bool | None
 
 
 # ── 2. LLM 客户端 ──────────────────────────────────────────────────────────────
@@ -72,18 +86,60 @@ def _extract_text(content) -> str:
 # 工具调用链最大迭代次数（防止 LLM 无限循环）
 MAX_TOOL_ITERATIONS = 20
 
+# Skill 声明静态计划时按计划执行，跳过逐步 LLM 决策（环境变量可关闭）
+SKILL_PLAN_EXECUTION = os.environ.get("SKILL_PLAN_EXECUTION", "1") == "1"
+
+# 同一轮 LLM 返回多个并发安全工具调用时并发执行（环境变量可关闭）
+PARALLEL_TOOL_EXECUTION = os.environ.get("PARALLEL_TOOL_EXECUTION", "1") == "1"
+
+
+def _intent_summary(intent: str) -> str:
+    """意图识别动作摘要。未匹配意图时使用用户友好文案（大小写不敏感）。"""
+    if intent.lower() == "unknown":
+        return "未匹配到任何已知场景"
+    return f"识别意图：{intent}"
+
 
 # ── 3. 节点函数 ────────────────────────────────────────────────────────────────
 
 
-def intent_recognition_node(state: AgentGraphState) -> dict:
-    """节点：意图识别 — 调用 LLM 分析用户消息意图。"""
+async def intent_recognition_node(state: AgentGraphState) -> dict:
+    """节点：意图识别 — 规则快速匹配 → 结果缓存 → 调用 LLM 分析用户消息意图。"""
+    session_id = state["session_id"]
     action = store.add_action(
         action_type=ActionType.intent_recognition,
         title="意图识别",
         summary="正在分析消息意图…",
         status=ActionStatus.running,
+        session_id=session_id,
     )
+    # 规则唯一命中时直接采用，跳过 LLM 调用
+    rule_intent = match_intent_rule(state["trigger_message"])
+    if rule_intent is not None:
+        store.update_action_status(
+            action.index,
+            ActionStatus.success,
+            {"intent": rule_intent, "rule_matched": True},
+            summary=_intent_summary(rule_intent),
+            session_id=session_id,
+        )
+        return {"matched_intent": rule_intent}
+
+    # 缓存命中时跳过 LLM 调用
+    cache_key = intent_cache.make_key(
+        state["trigger_message"], get_registry_version()
+    )
+    cached_intent = intent_cache.get(cache_key)
+    if cached_intent is not None:
+        store.update_action_status(
+            action.index,
+            ActionStatus.success,
+            {"intent": cached_intent, "cached": True},
+            summary=_intent_summary(cached_intent),
+            session_id=session_id,
+        )
+        return {"matched_intent": cached_intent}
+
     try:
         skills = get_all_skills()
         skill_list = "\n".join(
@@ -100,25 +156,21 @@ def intent_recognition_node(state: AgentGraphState) -> dict:
 2. 如果无法匹配任何意图，返回 unknown
 3. 只返回 skill_id，不要其他内容"""
 
-        response = _llm.invoke(
+        response = await _llm.ainvoke(
             [
                 SystemMessage(content=system_prompt),
                 HumanMessage(content=state["trigger_message"]),
             ]
         )
         intent = _extract_text(response.content)
-
-        # 未匹配意图时使用用户友好文案（大小写不敏感）
-        if intent.lower() == "unknown":
-            summary_text = "未匹配到任何已知场景"
-        else:
-            summary_text = f"识别意图：{intent}"
+        intent_cache.put(cache_key, intent)
 
         store.update_action_status(
             action.index,
             ActionStatus.success,
             {"intent": intent},
-            summary=summary_text,
+            summary=_intent_summary(intent),
+            session_id=session_id,
         )
         return {"matched_intent": intent}
     except Exception as e:
@@ -126,12 +178,14 @@ def intent_recognition_node(state: AgentGraphState) -> dict:
             action.index,
             ActionStatus.error,
             {"error": str(e)},
+            session_id=session_id,
         )
         return {"matched_intent": None, "error_message": str(e)}
 
 
 def skill_loading_node(state: AgentGraphState) -> dict:
     """节点：Skill 加载 — 根据意图匹配并加载 Skill。"""
+    session_id = state["session_id"]
     intent = state.get("matched_intent") or ""
     skill = get_skill(intent)
 
@@ -140,9 +194,12 @@ def skill_loading_node(state: AgentGraphState) -> dict:
         all_skills = get_all_skills()
         supported = "、".join([s.name for s in all_skills]) if all_skills else "暂无"
         reply = f"无法处理此请求。当前已支持的场景：{supported}"
-        store.set_final_reply(reply)
+        store.set_final_reply(reply, session_id=session_id)
         store.add_message(
-            channel=Channel.chat, sender="agent", content=reply
+            channel=Channel.chat,
+            sender="agent",
+            content=reply,
+            session_id=session_id,
         )
         return {"matched_skill": None}
 
@@ -152,6 +209,7 @@ def skill_loading_node(state: AgentGraphState) -> dict:
         summary=f"已加载 Skill：{skill.name}",
         status=ActionStatus.success,
         detail={"skill_id": skill.skill_id, "skill_name": skill.name},
+        session_id=session_id,
     )
     return {"matched_skill": skill.skill_id}
 
@@ -198,14 +256,112 @@ def _build_langchain_tools() -> list:
     return lc_tools
 
 
-def tool_chain_execution_node(state: AgentGraphState) -> dict:
+def _plan_tool_batches(tool_calls: list[dict]) -> list[tuple[list[dict], bool]]:
+    """切分一轮 tool_calls：相邻的并发安全工具合并为一个并发批次，其余逐个顺序执行。"""
+    batches: list[tuple[list[dict], bool]] = []
+    for tc in tool_calls:
+        tool = get_tool(tc["name"])
+        parallel = (
+            PARALLEL_TOOL_EXECUTION and tool is not None and tool.parallel_safe
+        )
+        if parallel and batches and batches[-1][1]:
+            batches[-1][0].append(tc)
+        else:
+            batches.append(([tc], parallel))
+    return batches
+
+
+def _run_tool(tc: dict) -> dict:
+    """直接通过 BaseTool 执行（不经过 LangChain 包装）。"""
+    base_tool = get_tool(tc["name"])
+    if not base_tool:
+        raise ValueError(f"工具 {tc['name']} 不存在")
+    return base_tool.execute(**tc["args"])
+
+
+async def _execute_tool_calls(calls: list[dict], parallel: bool) -> list:
+    """执行一批工具调用，结果与 calls 一一对应（异常以 Exception 对象返回）。"""
+    if parallel and len(calls) > 1:
+        return await asyncio.gather(
+            *(asyncio.to_thread(_run_tool, tc) for tc in calls),
+            return_exceptions=True,
+        )
+    outcomes: list = []
+    for tc in calls:
+        try:
+            outcomes.append(_run_tool(tc))
+        except Exception as e:
+            outcomes.append(e)
+    return outcomes
+
+
+def _reply_failure(session_id: str, error_msg: str) -> None:
+    """以“处理失败”作为最终回复，并写入 chat 频道。"""
+    store.set_final_reply(f"处理失败：{error_msg}", session_id=session_id)
+    store.add_message(
+        channel=Channel.chat,
+        sender="agent",
+        content=f"处理失败：{error_msg}",
+        session_id=session_id,
+    )
+
+
+def _record_upstream_reply(session_id: str, supplier_order_id: str) -> str:
+    """记录等待动作并模拟上游回复，返回回复内容。"""
+    wait_action = store.add_action(
+        action_type=ActionType.waiting,
+        title="等待上游回复",
+        summary="等待供应商处理…",
+        status=ActionStatus.running,
+        session_id=session_id,
+    )
+    reply_content = simulate_upstream_reply(supplier_order_id, session_id=session_id)
+    store.update_action_status(
+        wait_action.index,
+        ActionStatus.success,
+        {"reply": reply_content},
+        session_id=session_id,
+    )
+    return reply_content
+
+
+# 绑定工具后的 LLM 缓存：按 (工具注册表版本, LLM 实例) 失效重建
+_tool_binding: dict = {"version": None, "llm": None, "bound": None}
+_tool_binding_stats: dict = {"builds": 0, "last_build_ms": None, "total_build_ms": 0.0}
+
+
+def _get_llm_with_tools():
+    """获取绑定了全部工具 schema 的 LLM，仅在工具注册表或 LLM 实例变化时重建。"""
+    version = get_tool_registry_version()
+    if _tool_binding["version"] != version or _tool_binding["llm"] is not _llm:
+        started = time.perf_counter()
+        bound = _llm.bind_tools(_build_langchain_tools())
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        _tool_binding.update(version=version, llm=_llm, bound=bound)
+        _tool_binding_stats["builds"] += 1
+        _tool_binding_stats["last_build_ms"] = round(elapsed_ms, 3)
+        _tool_binding_stats["total_build_ms"] += elapsed_ms
+    return _tool_binding["bound"]
+
+
+def get_tool_binding_stats() -> dict:
+    """返回工具 schema 构建指标。"""
+    return {
+        "registry_version": _tool_binding["version"],
+        "builds": _tool_binding_stats["builds"],
+        "last_build_ms": _tool_binding_stats["last_build_ms"],
+        "total_build_ms": round(_tool_binding_stats["total_build_ms"], 3),
+    }
+
+
+async def tool_chain_execution_node(state: AgentGraphState) -> dict:
     """节点：工具调用链执行 — LLM 驱动的多步工具调用。"""
+    session_id = state["session_id"]
     skill = get_skill(state["matched_skill"])
     if not skill:
         return {"error_message": f"Skill {state['matched_skill']} not found"}
 
-    lc_tools = _build_langchain_tools()
-    llm_with_tools = _llm.bind_tools(lc_tools)
+    llm_with_tools = _get_llm_with_tools()
 
     messages: list = [
         SystemMessage(content=skill.content),
@@ -225,163 +381,362 @@ def tool_chain_execution_node(state: AgentGraphState) -> dict:
                 title="迭代超限",
                 summary=error_msg,
                 status=ActionStatus.error,
+                session_id=session_id,
             )
-            store.set_final_reply(f"处理失败：{error_msg}")
-            store.add_message(
-                channel=Channel.chat,
-                sender="agent",
-                content=f"处理失败：{error_msg}",
-            )
+            _reply_failure(session_id, error_msg)
             return {"error_message": error_msg}
 
-        response = llm_with_tools.invoke(messages)
+        response = await llm_with_tools.ainvoke(messages)
         messages.append(response)
 
         if not response.tool_calls:
             # LLM 完成工具调用 — 提取最终回复
             final_text = _extract_text(response.content)
             if final_text:
-                store.set_final_reply(final_text)
+                store.set_final_reply(final_text, session_id=session_id)
                 # 在 chat 频道记录 Agent 回复
                 store.add_message(
                     channel=Channel.chat,
                     sender="agent",
                     content=final_text,
+                    session_id=session_id,
                 )
             break
 
-        for tc in response.tool_calls:
-            tool_name = tc["name"]
-            tool_args = tc["args"]
-
-            # 记录工具调用开始
-            action = store.add_action(
-                action_type=ActionType.tool_call,
-                title=f"调用工具：{tool_name}",
-                summary=json.dumps(tool_args, ensure_ascii=False),
-                status=ActionStatus.running,
-                detail={"input": tool_args},
-            )
-
-            try:
-                # 直接通过 BaseTool 执行（不经过 LangChain 包装）
-                base_tool = get_tool(tool_name)
-                if not base_tool:
-                    raise ValueError(f"工具 {tool_name} 不存在")
-
-                result = base_tool.execute(**tool_args)
-                result_str = json.dumps(result, ensure_ascii=False)
+        for calls, parallel in _plan_tool_batches(response.tool_calls):
+            # 按原顺序预先记录动作，保证 action index 与 ToolMessage 顺序确定
+            actions = [
+                store.add_action(
+                    action_type=ActionType.tool_call,
+                    title=f"调用工具：{tc['name']}",
+                    summary=json.dumps(tc["args"], ensure_ascii=False),
+                    status=ActionStatus.running,
+                    detail={"input": tc["args"]},
+                    session_id=session_id,
+                )
+                for tc in calls
+            ]
+            outcomes = await _execute_tool_calls(calls, parallel)
+
+            # 批次内首个错误作为终止原因，其余调用仍完成状态记录
+            batch_error: str | None = None
+            for tc, action, outcome in zip(calls, actions, outcomes):
+                tool_name = tc["name"]
+                tool_args = tc["args"]
+
+                try:
+                    if isinstance(outcome, Exception):
+                        raise outcome
+                    result = outcome
+                    result_str = json.dumps(result, ensure_ascii=False)
+
+                    # 检查工具返回是否有错误
+                    if result.get("error"):
+                        store.update_action_status(
+                            action.index,
+                            ActionStatus.error,
+                            {"input": tool_args, "output": result},
+                            session_id=session_id,
+                        )
+                        messages.append(
+                            ToolMessage(
+                                content=result_str,
+                                tool_call_id=tc["id"],
+                            )
+                        )
+                        if batch_error is None:
+                            # 工具错误 — 优雅终止（FR33）
+                            batch_error = result.get("message", "工具调用失败")
+                            _reply_failure(session_id, batch_error)
+                        continue
 
-                # 检查工具返回是否有错误
-                if result.get("error"):
                     store.update_action_status(
                         action.index,
-                        ActionStatus.error,
+                        ActionStatus.success,
                         {"input": tool_args, "output": result},
+                        session_id=session_id,
                     )
-                    # 工具错误 — 优雅终止（FR33）
-                    error_msg = result.get("message", "工具调用失败")
-                    store.set_final_reply(f"处理失败：{error_msg}")
-                    store.add_message(
-                        channel=Channel.chat,
-                        sender="agent",
-                        content=f"处理失败：{error_msg}",
-                    )
+
+                    # 追踪 supplier_order_id（从 order_query 结果提取）
+                    if tool_name == "order_query" and result.get("success"):
+                        supplier_order_id = result["data"].get("supplier_order_id")
+
+                    # 检测是否向 upstream 发送消息 → 触发上游回复模拟
+                    if (
+                        tool_name == "message_send"
+                        and tool_args.get("channel") == "upstream"
+                    ):
+                        reply_content = _record_upstream_reply(
+                            session_id, supplier_order_id or ""
+                        )
+                        # 将上游回复注入 LLM 上下文，供后续步骤决策
+                        messages.append(
+                            HumanMessage(
+                                content=f"上游供应商回复：{reply_content}"
+                            )
+                        )
+
                     messages.append(
                         ToolMessage(
                             content=result_str,
                             tool_call_id=tc["id"],
                         )
                     )
-                    return {"error_message": error_msg}
-
-                store.update_action_status(
-                    action.index,
-                    ActionStatus.success,
-                    {"input": tool_args, "output": result},
-                )
 
-                # 追踪 supplier_order_id（从 order_query 结果提取）
-                if tool_name == "order_query" and result.get("success"):
-                    supplier_order_id = result["data"].get("supplier_order_id")
-
-                # 检测是否向 upstream 发送消息 → 触发上游回复模拟
-                if (
-                    tool_name == "message_send"
-                    and tool_args.get("channel") == "upstream"
-                ):
-                    # 记录等待动作
-                    wait_action = store.add_action(
-                        action_type=ActionType.waiting,
-                        title="等待上游回复",
-                        summary="等待供应商处理…",
-                        status=ActionStatus.running,
-                    )
-                    # 模拟上游回复
-                    reply_content = simulate_upstream_reply(
-                        supplier_order_id or ""
-                    )
+                except Exception as e:
                     store.update_action_status(
-                        wait_action.index,
-                        ActionStatus.success,
-                        {"reply": reply_content},
+                        action.index,
+                        ActionStatus.error,
+                        {"input": tool_args, "error": str(e)},
+                        session_id=session_id,
                     )
-                    # 将上游回复注入 LLM 上下文，供后续步骤决策
                     messages.append(
-                        HumanMessage(
-                            content=f"上游供应商回复：{reply_content}"
+                        ToolMessage(
+                            content=json.dumps(
+                                {"error": True, "message": str(e)},
+                                ensure_ascii=False,
+                            ),
+                            tool_call_id=tc["id"],
                         )
                     )
+                    if batch_error is None:
+                        batch_error = str(e)
 
-                messages.append(
-                    ToolMessage(
-                        content=result_str,
-                        tool_call_id=tc["id"],
-                    )
-                )
+            if batch_error is not None:
+                return {"error_message": batch_error}
 
-            except Exception as e:
-                store.update_action_status(
-                    action.index,
-                    ActionStatus.error,
-                    {"input": tool_args, "error": str(e)},
-                )
-                messages.append(
-                    ToolMessage(
-                        content=json.dumps(
-                            {"error": True, "message": str(e)},
-                            ensure_ascii=False,
-                        ),
-                        tool_call_id=tc["id"],
-                    )
-                )
-                return {"error_message": str(e)}
+    return {}
+
+
+class PlanGraphState(TypedDict):
+    """Skill 静态计划子图状态。context 保存提取参数与各步骤工具输出。"""
+
+    session_id: str
+    trigger_message: str
+    skill_id: str
+    context: dict
+    fallback: bool
+    error_message: str | None
 
+
+def _make_extract_args_node(skill: SkillDefinition):
+    """子图节点：调用 LLM 从用户消息提取计划所需参数，提取失败时标记回退。"""
+
+    async def extract_args_node(state: PlanGraphState) -> dict:
+        response = await _llm.ainvoke(
+            [
+                SystemMessage(content=build_extraction_prompt(skill.plan_inputs)),
+                HumanMessage(content=state["trigger_message"]),
+            ]
+        )
+        inputs = parse_extracted_inputs(
+            _extract_text(response.content), skill.plan_inputs
+        )
+        if inputs is None:
+            return {"fallback": True}
+        return {"context": {"input": inputs}}
+
+    return extract_args_node
+
+
+def _make_plan_step_node(step: PlanStep):
+    """子图节点：按模板渲染参数并执行单个工具调用（日志语义与工具调用链一致）。"""
+
+    async def plan_step_node(state: PlanGraphState) -> dict:
+        session_id = state["session_id"]
+        context = state["context"]
+        try:
+            tool_args = render_args(step.args, context)
+        except KeyError as e:
+            error_msg = f"计划参数缺失：{e.args[0]}"
+            _reply_failure(session_id, error_msg)
+            return {"error_message": error_msg}
+
+        action = store.add_action(
+            action_type=ActionType.tool_call,
+            title=f"调用工具：{step.tool}",
+            summary=json.dumps(tool_args, ensure_ascii=False),
+            status=ActionStatus.running,
+            detail={"input": tool_args},
+            session_id=session_id,
+        )
+        try:
+            result = _run_tool({"name": step.tool, "args": tool_args})
+        except Exception as e:
+            store.update_action_status(
+                action.index,
+                ActionStatus.error,
+                {"input": tool_args, "error": str(e)},
+                session_id=session_id,
+            )
+            return {"error_message": str(e)}
+
+        if result.get("error"):
+            store.update_action_status(
+                action.index,
+                ActionStatus.error,
+                {"input": tool_args, "output": result},
+                session_id=session_id,
+            )
+            # 工具错误 — 优雅终止（FR33）
+            error_msg = result.get("message", "工具调用失败")
+            _reply_failure(session_id, error_msg)
+            return {"error_message": error_msg}
+
+        store.update_action_status(
+            action.index,
+            ActionStatus.success,
+            {"input": tool_args, "output": result},
+            session_id=session_id,
+        )
+        context = {**context, step.tool: result.get("data", {})}
+        if step.tool == "message_send" and tool_args.get("channel") == "upstream":
+            supplier_order_id = context.get("order_query", {}).get(
+                "supplier_order_id", ""
+            )
+            reply_content = _record_upstream_reply(session_id, supplier_order_id)
+            context["upstream"] = {"reply": reply_content}
+        return {"context": context}
+
+    return plan_step_node
+
+
+def _make_final_reply_node(skill: SkillDefinition):
+    """子图节点：调用 LLM 根据计划执行结果生成最终回复。"""
+
+    async def final_reply_node(state: PlanGraphState) -> dict:
+        session_id = state["session_id"]
+        results = {k: v for k, v in state["context"].items() if k != "input"}
+        response = await _llm.ainvoke(
+            [
+                SystemMessage(
+                    content=f"你是客服 Agent，已按「{skill.name}」流程完成全部工具调用。"
+                    "请根据执行结果，用简洁的中文给用户最终回复，包含处理结果摘要。"
+                ),
+                HumanMessage(
+                    content=f"用户消息：{state['trigger_message']}\n"
+                    f"执行结果：{json.dumps(results, ensure_ascii=False)}"
+                ),
+            ]
+        )
+        final_text = _extract_text(response.content)
+        if final_text:
+            store.set_final_reply(final_text, session_id=session_id)
+            store.add_message(
+                channel=Channel.chat,
+                sender="agent",
+                content=final_text,
+                session_id=session_id,
+            )
+        return {}
+
+    return final_reply_node
+
+
+def _route_plan_step(next_node: str):
+    """子图条件路由：出错或需回退时结束，否则进入下一节点。"""
+
+    def route(state: PlanGraphState) -> str:
+        if state.get("fallback") or state.get("error_message"):
+            return END
+        return next_node
+
+    return route
+
+
+def _build_plan_graph(skill: SkillDefinition):
+    """将 Skill 计划编译为静态子图：参数提取 → 各工具步骤 → 最终回复。"""
+    steps = parse_plan(skill.plan)
+    for step in steps:
+        if not get_tool(step.tool):
+            raise ValueError(f"工具 {step.tool} 不存在")
+
+    builder = StateGraph(PlanGraphState)
+    node_names = ["extract_args"]
+    builder.add_node("extract_args", _make_extract_args_node(skill))
+    for i, step in enumerate(steps):
+        name = f"step_{i}_{step.tool}"
+        builder.add_node(name, _make_plan_step_node(step))
+        node_names.append(name)
+    builder.add_node("final_reply", _make_final_reply_node(skill))
+    node_names.append("final_reply")
+
+    builder.add_edge(START, "extract_args")
+    for current, following in zip(node_names, node_names[1:]):
+        builder.add_conditional_edges(
+            current, _route_plan_step(following), [following, END]
+        )
+    builder.add_edge("final_reply", END)
+    return builder.compile()
+
+
+# 已编译计划子图缓存：skill_id → (Skill 注册表版本, 子图)
+_plan_graphs: dict[str, tuple[int, object]] = {}
+
+
+def _get_plan_graph(skill: SkillDefinition):
+    """获取 Skill 的计划子图，Skill 注册表变更后重新编译。"""
+    version = get_registry_version()
+    cached = _plan_graphs.get(skill.skill_id)
+    if cached is None or cached[0] != version:
+        cached = (version, _build_plan_graph(skill))
+        _plan_graphs[skill.skill_id] = cached
+    return cached[1]
+
+
+async def plan_execution_node(state: AgentGraphState) -> dict:
+    """节点：静态计划执行 — 按 Skill 声明的工具序列执行，LLM 仅用于参数提取和最终回复。
+
+    参数提取失败或计划无法编译时回退到 LLM 驱动的工具调用链。
+    """
+    skill = get_skill(state["matched_skill"])
+    try:
+        plan_graph = _get_plan_graph(skill)
+    except ValueError:
+        return {"plan_fallback": True}
+
+    result = await plan_graph.ainvoke(
+        {
+            "session_id": state["session_id"],
+            "trigger_message": state["trigger_message"],
+            "skill_id": skill.skill_id,
+            "context": {},
+            "fallback": False,
+            "error_message": None,
+        }
+    )
+    if result.get("fallback"):
+        return {"plan_fallback": True}
+    if result.get("error_message"):
+        return {"error_message": result["error_message"]}
     return {}
 
 
 def completion_node(state: AgentGraphState) -> dict:
     """节点：流程完成 — 更新会话状态并保存历史。"""
+    session_id = state["session_id"]
     if state.get("error_message"):
-        store.update_session_status(SessionStatus.error)
+        store.update_session_status(SessionStatus.error, session_id=session_id)
         store.add_action(
             action_type=ActionType.completed,
             title="流程完成",
             summary=f"处理异常终止：{state['error_message']}",
             status=ActionStatus.error,
+            session_id=session_id,
         )
     elif state.get("matched_skill"):
         # 正常 Skill 完成 — 添加完成日志
-        store.update_session_status(SessionStatus.completed)
+        store.update_session_status(SessionStatus.completed, session_id=session_id)
         store.add_action(
             action_type=ActionType.completed,
             title="流程完成",
             summary="Agent 已完成处理",
             status=ActionStatus.success,
+            session_id=session_id,
         )
     else:
         # 未匹配意图路径 — 只更新状态，不添加额外日志（AC #1）
-        store.update_session_status(SessionStatus.completed)
+        store.update_session_status(SessionStatus.completed, session_id=session_id)
 
     # 保存执行历史
     skill_name = None
@@ -392,6 +747,7 @@ def completion_node(state: AgentGraphState) -> dict:
     store.save_execution_history(
         trigger_message=state["trigger_message"],
         skill_name=skill_name,
+        session_id=session_id,
     )
 
     return {}
@@ -402,9 +758,21 @@ def completion_node(state: AgentGraphState) -> dict:
 
 def _route_after_skill_loading(
     state: AgentGraphState,
-) -> Literal["tool_chain_execution", "completion"]:
-    """条件路由：Skill 匹配成功 → 工具调用链，否则 → 直接完成。"""
+) -> Literal["plan_execution", "tool_chain_execution", "completion"]:
+    """条件路由：Skill 声明了静态计划 → 计划执行；其余匹配成功 → 工具调用链；否则 → 直接完成。"""
     if state.get("matched_skill"):
+        skill = get_skill(state["matched_skill"])
+        if SKILL_PLAN_EXECUTION and skill and skill.plan:
+            return "plan_execution"
+        return "tool_chain_execution"
+    return "completion"
+
+
+def _route_after_plan_execution(
+    state: AgentGraphState,
+) -> Literal["tool_chain_execution", "completion"]:
+    """条件路由：计划需要回退 → LLM 驱动的工具调用链，否则 → 完成。"""
+    if state.get("plan_fallback"):
         return "tool_chain_execution"
     return "completion"
 
@@ -418,6 +786,7 @@ def _build_graph() -> StateGraph:
 
     builder.add_node("intent_recognition", intent_recognition_node)
     builder.add_node("skill_loading", skill_loading_node)
+    builder.add_node("plan_execution", plan_execution_node)
     builder.add_node("tool_chain_execution", tool_chain_execution_node)
     builder.add_node("completion", completion_node)
 
@@ -426,6 +795,15 @@ def _build_graph() -> StateGraph:
     builder.add_conditional_edges(
         "skill_loading",
         _route_after_skill_loading,
+        {
+            "plan_execution": "plan_execution",
+            "tool_chain_execution": "tool_chain_execution",
+            "completion": "completion",
+        },
+    )
+    builder.add_conditional_edges(
+        "plan_execution",
+        _route_after_plan_execution,
         {
             "tool_chain_execution": "tool_chain_execution",
             "completion": "completion",
@@ -445,21 +823,31 @@ _graph = _build_graph()
 
 async def run_agent(session_id: str, trigger_message: str) -> None:
     """Agent 执行入口。由 /api/chat 路由作为后台任务调用。"""
-    store.update_session_status(SessionStatus.running)
-    # 在 chat 频道记录用户消息
-    store.add_message(
-        channel=Channel.chat, sender="user", content=trigger_message
-    )
-
+    # 绑定当前会话，供工具等不感知 session_id 的调用方定位会话
+    token = current_session_id.set(session_id)
     initial_state: AgentGraphState = {
         "session_id": session_id,
         "trigger_message": trigger_message,
         "matched_intent": None,
         "matched_skill": None,
         "error_message": None,
+        "plan_fallback": None,
     }
     try:
+        # 会话可能在排队期间被清除：此时抛出 ValueError，同样须复位上下文
+        store.update_session_status(SessionStatus.running, session_id=session_id)
+        # 在 chat 频道记录用户消息
+        store.add_message(
+            channel=Channel.chat,
+            sender="user",
+            content=trigger_message,
+            session_id=session_id,
+        )
         await _graph.ainvoke(initial_state)
     except Exception as e:
-        store.update_session_status(SessionStatus.error)
-        store.set_final_reply(f"系统错误：{str(e)}")
+        if store.get_session(session_id) is not None:
+            store.update_session_status(SessionStatus.error, session_id=session_id)
+            store.set_final_reply(f"系统错误：{str(e)}", session_id=session_id)
+    finally:
+        store.end_run(session_id=session_id)
+        current_session_id.reset(token)
@@ -0,0 +1,41 @@
+"""意图识别结果缓存 — 按归一化消息 + Skill 注册表版本缓存 LLM 分类结果（LRU + TTL）。"""
+
+import os
+import re
+
+from app.store.cache import TTLCache
+
+# 缓存配置（环境变量可覆盖）
+INTENT_CACHE_SIZE = int(os.environ.get("INTENT_CACHE_SIZE", "1024"))
+INTENT_CACHE_TTL_SECONDS = float(os.environ.get("INTENT_CACHE_TTL_SECONDS", "600"))
+
+# 订单号 / 供应商订单号（如 HT20260301001、SUP-88901）归一化为占位符
+_ORDER_ID_PATTERN = re.compile(r"(?:HT|SUP-?)\d+", re.IGNORECASE)
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+_ORDER_ID_PLACEHOLDER = "<ORDER_ID>"
+
+
+def normalize_message(message: str) -> str:
+    """归一化用户消息：屏蔽订单号、合并空白、转小写。"""
+    masked = _ORDER_ID_PATTERN.sub(_ORDER_ID_PLACEHOLDER, message)
+    return _WHITESPACE_PATTERN.sub(" ", masked).strip().lower()
+
+
+class IntentCache(TTLCache[tuple[int, str], str]):
+    """意图识别结果缓存：键为（Skill 注册表版本，归一化消息），值为 skill_id。"""
+
+    def __init__(
+        self,
+        maxsize: int = INTENT_CACHE_SIZE,
+        ttl_seconds: float = INTENT_CACHE_TTL_SECONDS,
+    ):
+        super().__init__(maxsize, ttl_seconds)
+
+    @staticmethod
+    def make_key(message: str, registry_version: int) -> tuple[int, str]:
+        """由触发消息和 Skill 注册表版本构造缓存键。"""
+        return (registry_version, normalize_message(message))
+
+
+# 模块级单例
+intent_cache = IntentCache()
@@ -0,0 +1,92 @@
+"""规则快速意图匹配 — 将各 Skill 声明的关键词/正则编译为单个组合匹配器，命中唯一 Skill 时跳过 LLM。
+
+Skill 可声明否决正则（exclude_patterns）：消息同时命中否决规则时（如否定、疑问句式）
+不走快速路径，交给 LLM 判断，避免"不要取消订单"之类的消息直接执行不可逆操作。
+"""
+
+import re
+
+from app.agent.skills import get_all_skills, get_registry_version
+from app.schemas.models import SkillDefinition
+
+
+class IntentRuleMatcher:
+    """组合匹配器：每个 Skill 对应一个命名分组，一次扫描得到全部命中的 Skill。"""
+
+    def __init__(self, skills: list[SkillDefinition]):
+        self._group_to_skill: dict[str, str] = {}
+        self._excludes: dict[str, re.Pattern] = {}
+        alternatives = []
+        for i, skill in enumerate(skills):
+            rules = [re.escape(k) for k in skill.keywords] + list(skill.patterns)
+            if not rules:
+                continue
+            if skill.exclude_patterns:
+                self._excludes[skill.skill_id] = re.compile(
+                    "|".join(skill.exclude_patterns), re.IGNORECASE
+                )
+            group = f"s{i}"
+            self._group_to_skill[group] = skill.skill_id
+            alternatives.append(f"(?P<{group}>{'|'.join(rules)})")
+        self._pattern = (
+            re.compile("|".join(alternatives), re.IGNORECASE) if alternatives else None
+        )
+        self.hits = 0
+        self.misses = 0
+        self.ambiguous = 0
+        self.vetoed = 0
+
+    def match_all(self, message: str) -> set[str]:
+        """返回消息命中的全部 skill_id。"""
+        if self._pattern is None:
+            return set()
+        return {
+            self._group_to_skill[m.lastgroup] for m in self._pattern.finditer(message)
+        }
+
+    def match(self, message: str) -> str | None:
+        """仅当恰好命中一个 Skill 且未被否决时返回其 skill_id；否则返回 None（交给 LLM）。"""
+        matched = self.match_all(message)
+        if len(matched) == 1:
+            skill_id = next(iter(matched))
+            exclude = self._excludes.get(skill_id)
+            if exclude is not None and exclude.search(message):
+                self.vetoed += 1
+                return None
+            self.hits += 1
+            return skill_id
+        if matched:
+            self.ambiguous += 1
+        else:
+            self.misses += 1
+        return None
+
+    def stats(self) -> dict:
+        """返回规则匹配指标。"""
+        return {
+            "rules": len(self._group_to_skill),
+            "hits": self.hits,
+            "misses": self.misses,
+            "ambiguous": self.ambiguous,
+            "vetoed": self.vetoed,
+        }
+
+
+# 按 Skill 注册表版本缓存的匹配器
+_matcher: IntentRuleMatcher | None = None
+_matcher_version: int | None = None
+
+
+def get_matcher() -> IntentRuleMatcher:
+    """获取当前注册表版本对应的匹配器（注册表变更后重新编译）。"""
+    global _matcher, _matcher_version
+    version = get_registry_version()
+    if _matcher is None or _matcher_version != version:
+        _matcher = IntentRuleMatcher(get_all_skills())
+        _matcher_version = version
+    return _matcher
+
+
+def match_intent_rule(message: str) -> str | None:
+    """规则匹配用户消息意图，返回唯一命中的 skill_id 或 None。"""
+    return get_matcher().match(message)
@@ -0,0 +1,86 @@
+"""Skill 静态执行计划 — 解析 front-matter 中的 plan 步骤并渲染参数模板。
+
+每个步骤一行，格式为 `<tool_name> key=value ...`（值含空格时用引号包裹）。
+值中的 `{scope.field}` 占位符在执行时替换：`input` 为 LLM 从用户消息提取的参数，
+工具名（如 `order_query`）为该工具成功返回的 data，`upstream` 为上游回复。
+
+    plan_inputs: order_id
+    plan:
+      - order_query order_id={input.order_id}
+      - refund order_id={input.order_id} supplier_order_id={order_query.supplier_order_id}
+"""
+
+import json
+import re
+import shlex
+from dataclasses import dataclass
+
+_PLACEHOLDER_PATTERN = re.compile(r"\{(\w+)\.(\w+)\}")
+_CODE_FENCE_PATTERN = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+@dataclass(frozen=True)
+class PlanStep:
+    """计划中的单个工具调用步骤。"""
+
+    tool: str
+    args: dict[str, str]
+
+
+def parse_plan(lines: list[str]) -> list[PlanStep]:
+    """解析 plan 步骤列表。格式错误时抛出 ValueError。"""
+    steps = []
+    for line in lines:
+        tokens = shlex.split(line)
+        if not tokens:
+            raise ValueError("Empty plan step")
+        args = {}
+        for token in tokens[1:]:
+            key, sep, value = token.partition("=")
+            if not sep or not key:
+                raise ValueError(f"Invalid plan argument: {token}")
+            args[key] = value
+        steps.append(PlanStep(tool=tokens[0], args=args))
+    return steps
+
+
+def render_args(args: dict[str, str], context: dict[str, dict]) -> dict[str, str]:
+    """将参数模板中的占位符替换为上下文值。引用缺失时抛出 KeyError。"""
+
+    def _replace(match: re.Match) -> str:
+        scope, field = match.groups()
+        value = context.get(scope, {}).get(field)
+        if value is None:
+            raise KeyError(f"{scope}.{field}")
+        return str(value)
+
+    return {key: _PLACEHOLDER_PATTERN.sub(_replace, value) for key, value in args.items()}
+
+
+def build_extraction_prompt(plan_inputs: list[str]) -> str:
+    """构造参数提取提示词，要求 LLM 仅返回 JSON 对象。"""
+    fields = "\n".join(f"- {name}" for name in plan_inputs)
+    return f"""你是一个参数提取器。从用户消息中提取以下参数：
+{fields}
+
+规则：
+1. 只返回一个 JSON 对象，键为参数名，值为字符串
+2. 无法提取的参数值为 null
+3. 不要输出其他内容"""
+
+
+def parse_extracted_inputs(text: str, plan_inputs: list[str]) -> dict[str, str] | None:
+    """解析 LLM 返回的参数 JSON。格式错误或缺少任一参数时返回 None。"""
+    try:
+        data = json.loads(_CODE_FENCE_PATTERN.sub("", text.strip()))
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    inputs = {}
+    for name in plan_inputs:
+        value = data.get(name)
+        if value in (None, ""):
+            return None
+        inputs[name] = str(value)
+    return inputs
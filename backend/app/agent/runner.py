@@ -0,0 +1,138 @@
+"""Agent 异步工作池 — 有界队列 + 固定数量 worker，限制并发执行的 Agent 数量。"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from collections.abc import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+# 工作池配置（环境变量可覆盖）
+AGENT_WORKERS = int(os.environ.get("AGENT_WORKERS", "4"))
+AGENT_QUEUE_SIZE = int(os.environ.get("AGENT_QUEUE_SIZE", "100"))
+# 无历史耗时数据时返回给客户端的默认重试等待秒数
+AGENT_RETRY_AFTER_SECONDS = int(os.environ.get("AGENT_RETRY_AFTER_SECONDS", "5"))
+
+
+class QueueFullError(Exception):
+    """任务队列已满，调用方应稍后重试。"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Agent queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AgentRunner:
+    """asyncio 工作池：任务进入有界队列，由固定数量的 worker 协程依次消费。"""
+
+    def __init__(
+        self,
+        workers: int = AGENT_WORKERS,
+        queue_size: int = AGENT_QUEUE_SIZE,
+    ):
+        self._worker_count = workers
+        self._queue_size = queue_size
+        self._queue: asyncio.Queue | None = None
+        self._workers: list[asyncio.Task] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._running = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._total_duration = 0.0
+
+    # === 生命周期 ===
+
+    async def start(self) -> None:
+        """在当前事件循环中启动 worker（已启动则忽略）。"""
+        self._ensure_started()
+
+    async def stop(self) -> None:
+        """取消全部 worker 并丢弃未执行的任务。"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        self._loop = None
+
+    def _ensure_started(self) -> None:
+        """懒启动：首次提交或事件循环变更（如测试中重建 loop）时创建队列和 worker。"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._workers:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self._queue_size)
+        self._workers = [
+            loop.create_task(self._worker(), name=f"agent-worker-{i}")
+            for i in range(self._worker_count)
+        ]
+
+    # === 任务提交 ===
+
+    def submit(self, fn: Callable[..., Awaitable[None]], *args) -> None:
+        """提交一个 Agent 任务。队列已满时抛出 QueueFullError。"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((fn, args))
+        except asyncio.QueueFull:
+            self._rejected += 1
+            raise QueueFullError(self.retry_after()) from None
+        self._submitted += 1
+
+    def retry_after(self) -> int:
+        """按平均执行耗时估算排队清空所需秒数，作为 Retry-After 提示。"""
+        if not self._completed:
+            return AGENT_RETRY_AFTER_SECONDS
+        avg_duration = self._total_duration / self._completed
+        pending = self._queue.qsize() if self._queue else 0
+        return max(1, math.ceil(avg_duration * pending / self._worker_count))
+
+    async def _worker(self) -> None:
+        """worker 主循环：取出任务并执行，单个任务异常不影响 worker 存活。"""
+        while True:
+            fn, args = await self._queue.get()
+            self._running += 1
+            started = time.perf_counter()
+            try:
+                await fn(*args)
+            except Exception:
+                self._failed += 1
+                logger.exception("Agent task failed: %s", args)
+            finally:
+                self._running -= 1
+                self._completed += 1
+                self._total_duration += time.perf_counter() - started
+                self._queue.task_done()
+
+    async def join(self) -> None:
+        """等待队列中已提交的任务全部执行完成。"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    # === 可观测性 ===
+
+    def stats(self) -> dict:
+        """返回工作池运行指标。"""
+        return {
+            "workers": self._worker_count,
+            "queue_size": self._queue_size,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "running": self._running,
+            "submitted": self._submitted,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "avg_duration_ms": (
+                round(self._total_duration / self._completed * 1000, 2)
+                if self._completed
+                else None
+            ),
+        }
+
+
+# 模块级单例
+agent_runner = AgentRunner()
@@ -1,4 +1,20 @@
-"""Skill 注册表 — 自动扫描 skills/ 目录的 .md 文件并注册为 SkillDefinition。"""
+"""Skill 注册表 — 自动扫描 skills/ 目录的 .md 文件并注册为 SkillDefinition。
+
+Skill 文件可选以 front-matter 开头，声明意图快速匹配规则（关键词、正则与否决
+正则）和静态执行计划（计划格式见 app.agent.planner）：
+
+    ---
+    keywords:
+      - 提前离店
+    patterns:
+      - 申请.{0,10}离店
+    exclude_patterns:
+      - 不要.{0,4}提前离店
+    plan_inputs: order_id
+    plan:
+      - order_query order_id={input.order_id}
+    ---
+"""
 
 from pathlib import Path
 
@@ -6,13 +22,42 @@ from app.schemas.models import SkillDefinition
 
 # Skill 实例注册表
 _skill_registry: dict[str, SkillDefinition] = {}
+# 注册表版本号，每次（重新）扫描后递增，供依赖 Skill 集合的缓存失效使用
+_registry_version: int = 0
+
+
+def _parse_front_matter(content: str) -> tuple[dict[str, list[str]], str]:
+    """拆分 front-matter 与正文。仅支持 `key: a, b` 与 `key:` + `- item` 列表两种写法。"""
+    lines = content.splitlines()
+    if not lines or lines[0].strip() != "---":
+        return {}, content
+    meta: dict[str, list[str]] = {}
+    current_key: str | None = None
+    for i, line in enumerate(lines[1:], start=1):
+        stripped = line.strip()
+        if stripped == "---":
+            return meta, "\n".join(lines[i + 1 :]).lstrip("\n")
+        if not stripped:
+            continue
+        if stripped.startswith("- ") and current_key is not None:
+            meta[current_key].append(stripped[2:].strip())
+            continue
+        key, _, value = stripped.partition(":")
+        current_key = key.strip()
+        meta[current_key] = [
+            v.strip() for v in value.replace("，", ",").split(",") if v.strip()
+        ]
+    # 未闭合的 front-matter 视为普通正文
+    return {}, content
 
 
 def _load_skills() -> None:
     """扫描当前目录下所有 .md 文件，解析并注册为 SkillDefinition。"""
+    global _registry_version
     skills_dir = Path(__file__).parent
+    _skill_registry.clear()
     for md_file in sorted(skills_dir.glob("*.md")):
-        content = md_file.read_text(encoding="utf-8")
+        meta, content = _parse_front_matter(md_file.read_text(encoding="utf-8"))
         skill_id = md_file.stem  # 文件名去掉 .md 后缀
         lines = content.strip().splitlines()
         # 第一行（去掉 # 前缀）作为名称
@@ -29,7 +74,13 @@ def _load_skills() -> None:
             name=name,
             description=description,
             content=content,
+            keywords=meta.get("keywords", []),
+            patterns=meta.get("patterns", []),
+            exclude_patterns=meta.get("exclude_patterns", []),
+            plan=meta.get("plan", []),
+            plan_inputs=meta.get("plan_inputs", []),
         )
+    _registry_version += 1
 
 
 def get_skill(skill_id: str) -> SkillDefinition | None:
@@ -42,5 +93,15 @@ def get_all_skills() -> list[SkillDefinition]:
     return list(_skill_registry.values())
 
 
+def get_registry_version() -> int:
+    """获取当前 Skill 注册表版本号。"""
+    return _registry_version
+
+
+def reload_skills() -> None:
+    """重新扫描 skills/ 目录（Skill 文件变更后调用），注册表版本号随之递增。"""
+    _load_skills()
+
+
 # 模块加载时自动扫描并注册
 _load_skills()
@@ -9,6 +9,20 @@ from app.schemas.models import ToolDefinition
 
 # 工具实例注册表
 _tool_registry: dict[str, BaseTool] = {}
+# 注册表版本号，每次注册工具后递增，供依赖工具集合的缓存失效使用
+_registry_version: int = 0
+
+
+def register_tool(tool: BaseTool) -> None:
+    """注册（或替换同名）工具实例，注册表版本号随之递增。"""
+    global _registry_version
+    _tool_registry[tool.name] = tool
+    _registry_version += 1
+
+
+def get_registry_version() -> int:
+    """获取当前工具注册表版本号。"""
+    return _registry_version
 
 
 def get_tool(name: str) -> BaseTool | None:
@@ -35,5 +49,4 @@ for _, _module_name, _ in pkgutil.iter_modules([str(_package_dir)]):
 # 导入完成后，扫描 BaseTool 子类并注册具体实现（此时 __abstractmethods__ 已正确设置）
 for _cls in BaseTool.__subclasses__():
     if not getattr(_cls, "__abstractmethods__", None):
-        _instance = _cls()
-        _tool_registry[_instance.name] = _instance
+        register_tool(_cls())
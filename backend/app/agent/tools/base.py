@@ -8,6 +8,9 @@ from app.schemas.models import ToolDefinition
 class BaseTool(ABC):
     """工具基类接口。所有模拟工具必须继承此类。"""
 
+    # 无副作用的工具可声明为并发安全：同一轮 LLM 返回的多个调用将并发执行
+    parallel_safe: bool = False
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -1,7 +1,7 @@
 """订单取消工具 — 模拟取消订单操作（FR25）。"""
 
 from app.agent.tools.base import BaseTool
-from app.mock.data import MOCK_ORDERS
+from app.mock.data import MOCK_ORDERS, mark_orders_changed
 
 
 class OrderCancelTool(BaseTool):
@@ -42,6 +42,7 @@ class OrderCancelTool(BaseTool):
 
         # 执行取消（更新模拟数据状态）
         order["status"] = "cancelled"
+        mark_orders_changed()
 
         return {
             "success": True,
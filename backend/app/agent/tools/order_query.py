@@ -7,6 +7,8 @@ from app.mock.data import MOCK_ORDERS
 class OrderQueryTool(BaseTool):
     """模拟订单查询工具（FR23, FR26）。"""
 
+    parallel_safe = True
+
     @property
     def name(self) -> str:
         return "order_query"
@@ -1,13 +1,39 @@
 """FastAPI 应用入口，CORS 配置，路由挂载，统一异常处理。"""
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
-from app.routers import chat, messages, orders, session, status
+from app.agent.batch import batch_scheduler
+from app.agent.runner import agent_runner
+from app.routers import (
+    chat,
+    messages,
+    metrics,
+    orders,
+    session,
+    snapshot,
+    status,
+    stream,
+)
+from app.store.memory import store
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：启动/停止 Agent 工作池与会话回收，关闭存储。"""
+    await agent_runner.start()
+    store.start_sweeper()
+    yield
+    await batch_scheduler.stop()
+    await agent_runner.stop()
+    store.close()
+
 
-app = FastAPI(title="AI Agent Demo", version="0.1.0")
+app = FastAPI(title="AI Agent Demo", version="0.1.0", lifespan=lifespan)
 
 # CORS 配置：允许前端 localhost:5173 访问
 app.add_middleware(
@@ -16,6 +42,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # 前端条件轮询需读取 ETag；幂等重放标记供客户端区分新建与重放
+    expose_headers=["ETag", "Idempotent-Replayed"],
 )
 
 # 挂载路由
@@ -24,6 +52,9 @@ app.include_router(status.router)
 app.include_router(messages.router)
 app.include_router(session.router)
 app.include_router(orders.router)
+app.include_router(metrics.router)
+app.include_router(stream.router)
+app.include_router(snapshot.router)
 
 
 # === 统一异常处理 ===
@@ -39,6 +70,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
             "error_type": exc.detail if isinstance(exc.detail, str) else "HTTP_ERROR",
             "message": str(exc.detail),
         },
+        headers=exc.headers,
     )
 
 
@@ -1,5 +1,7 @@
 """硬编码模拟数据 — 订单记录和供应商映射。"""
 
+import threading
+
 MOCK_ORDERS: dict[str, dict] = {
     "HT20260301001": {
         "order_id": "HT20260301001",
@@ -32,3 +34,20 @@ MOCK_ORDERS: dict[str, dict] = {
         "status": "confirmed",
     },
 }
+
+# 订单数据版本号：修改 MOCK_ORDERS 后调用 mark_orders_changed() 递增，
+# 用作 GET /api/orders 的 ETag 依据
+_orders_version = 0
+_orders_version_lock = threading.Lock()
+
+
+def orders_version() -> int:
+    """当前订单数据版本号。"""
+    return _orders_version
+
+
+def mark_orders_changed() -> None:
+    """标记订单数据已变更。"""
+    global _orders_version
+    with _orders_version_lock:
+        _orders_version += 1
@@ -4,11 +4,15 @@ from app.schemas.models import Channel
 from app.store.memory import store
 
 
-def simulate_upstream_reply(supplier_order_id: str) -> str:
+def simulate_upstream_reply(
+    supplier_order_id: str,
+    session_id: str | None = None,
+) -> str:
     """模拟上游供应商自动回复（FR22）。
 
     Args:
         supplier_order_id: 供应商订单号，用于回复内容引用。
+        session_id: 所属会话 ID，缺省时使用当前会话。
 
     Returns:
         回复消息内容。
@@ -16,7 +20,7 @@ def simulate_upstream_reply(supplier_order_id: str) -> str:
     Raises:
         ValueError: 无活跃会话时抛出。
     """
-    if not store.get_session():
+    if not store.get_session(session_id):
         raise ValueError("No active session for upstream reply")
 
     reply_content = f"供应商订单 {supplier_order_id} 已处理完成，可以办理退款"
@@ -24,6 +28,7 @@ def simulate_upstream_reply(supplier_order_id: str) -> str:
         channel=Channel.upstream,
         sender="supplier",
         content=reply_content,
+        session_id=session_id,
     )
-    store.mark_channel_unread("upstream")
+    store.mark_channel_unread("upstream", session_id=session_id)
     return reply_content
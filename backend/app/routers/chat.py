@@ -1,9 +1,20 @@
-"""POST /api/chat — 发送消息触发 Agent 处理。"""
+"""POST /api/chat — 发送消息触发 Agent 处理；POST /api/chat/batch — 批量提交。"""
 
-from fastapi import APIRouter, BackgroundTasks
+from fastapi import APIRouter, Header, HTTPException, Response
 
+from app.agent.batch import AGENT_BATCH_CONCURRENCY, AGENT_BATCH_MAX_SIZE, batch_scheduler
 from app.agent.engine import run_agent
-from app.schemas.models import ChatRequest, ChatResponse
+from app.agent.runner import QueueFullError, agent_runner
+from app.schemas.models import (
+    BatchChatRequest,
+    BatchChatResponse,
+    BatchSessionStatus,
+    BatchStatusResponse,
+    ChatRequest,
+    ChatResponse,
+    SessionStatus,
+)
+from app.store.idempotency import IDEMPOTENCY_KEY_MAX_LENGTH, fingerprint, idempotency_cache
 from app.store.memory import store
 
 router = APIRouter(prefix="/api", tags=["chat"])
@@ -12,9 +23,89 @@ router = APIRouter(prefix="/api", tags=["chat"])
 @router.post("/chat", response_model=ChatResponse)
 async def send_message(
     request: ChatRequest,
-    background_tasks: BackgroundTasks,
+    response: Response,
+    idempotency_key: str | None = Header(
+        default=None, min_length=1, max_length=IDEMPOTENCY_KEY_MAX_LENGTH
+    ),
 ) -> ChatResponse:
-    """接收用户消息，创建会话并在后台启动 Agent 处理。"""
+    """接收用户消息，创建会话并提交到 Agent 工作池。队列已满时返回 429。
+
+    携带 Idempotency-Key 时，同一幂等键的重复请求直接返回已有会话（响应头
+    Idempotent-Replayed: true），不再重复执行；同一幂等键配不同消息返回 422。
+    """
+    if idempotency_key is not None:
+        # 幂等键在 TTL 内始终指向原会话，即使会话已被回收也不重新执行
+        entry = idempotency_cache.get(idempotency_key)
+        if entry is not None:
+            if entry.fingerprint != fingerprint(request.message):
+                raise HTTPException(status_code=422, detail="IDEMPOTENCY_KEY_REUSED")
+            response.headers["Idempotent-Replayed"] = "true"
+            return ChatResponse(session_id=entry.session_id)
+
     session = store.create_session()
-    background_tasks.add_task(run_agent, session.session_id, request.message)
+    try:
+        agent_runner.submit(run_agent, session.session_id, request.message)
+    except QueueFullError as e:
+        store.clear_session(session.session_id)
+        raise HTTPException(
+            status_code=429,
+            detail="AGENT_QUEUE_FULL",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    # 只记录已成功提交的请求：被 429 拒绝的请求重试时应重新提交
+    if idempotency_key is not None:
+        idempotency_cache.remember(idempotency_key, session.session_id, request.message)
     return ChatResponse(session_id=session.session_id)
+
+
+@router.post("/chat/batch", response_model=BatchChatResponse)
+async def send_batch(request: BatchChatRequest) -> BatchChatResponse:
+    """批量提交消息：为每条消息创建会话，立即返回全部 session_id。
+
+    任务由后台按批次并发上限逐条交给 Agent 工作池，工作池队列已满时等待而非拒绝。
+    """
+    if len(request.messages) > AGENT_BATCH_MAX_SIZE:
+        raise HTTPException(status_code=422, detail="BATCH_TOO_LARGE")
+    # 客户端只能调低并发：上限为服务端配置，避免单个批次占满共享工作池
+    concurrency = min(request.max_concurrency or AGENT_BATCH_CONCURRENCY, AGENT_BATCH_CONCURRENCY)
+    session_ids = [store.create_session().session_id for _ in request.messages]
+    batch = batch_scheduler.submit(
+        run_agent, session_ids, list(request.messages), concurrency=concurrency
+    )
+    return BatchChatResponse(batch_id=batch.batch_id, session_ids=session_ids)
+
+
+@router.get("/chat/batch/{batch_id}", response_model=BatchStatusResponse)
+async def get_batch_status(batch_id: str) -> BatchStatusResponse:
+    """汇总批次内各会话的执行进度。已被回收的会话计为 expired。"""
+    batch = batch_scheduler.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="BATCH_NOT_FOUND")
+
+    counts = {status.value: 0 for status in SessionStatus} | {"expired": 0}
+    sessions = []
+    for session_id in batch.session_ids:
+        session = store.get_session(session_id)
+        if session is None:
+            counts["expired"] += 1
+            sessions.append(BatchSessionStatus(session_id=session_id, status=None))
+            continue
+        counts[session.status.value] += 1
+        sessions.append(
+            BatchSessionStatus(
+                session_id=session_id,
+                status=session.status,
+                final_reply=session.final_reply,
+            )
+        )
+
+    finished = counts["completed"] + counts["error"] + counts["expired"]
+    return BatchStatusResponse(
+        batch_id=batch.batch_id,
+        total=len(batch.session_ids),
+        submitted=batch.submitted,
+        counts=counts,
+        done=batch.fully_submitted and finished == len(batch.session_ids),
+        sessions=sessions,
+        created_at=batch.created_at,
+    )
@@ -0,0 +1,31 @@
+"""条件请求（ETag / If-None-Match）辅助函数。"""
+
+import uuid
+
+from fastapi import Request, Response
+
+# 进程启动标识：进程内计数器在重启后归零的资源将其混入 ETag，
+# 避免重启前签发的 ETag 误命中重启后的不同内容
+BOOT_ID = uuid.uuid4().hex[:8]
+
+
+def make_etag(*parts) -> str:
+    """由资源标识与版本号构造强 ETag。"""
+    return '"' + ".".join(str(p) for p in parts) + '"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """请求的 If-None-Match 是否与当前 ETag 匹配（按弱比较，支持多个值与 *）。"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    """304 响应，不含响应体。"""
+    return Response(status_code=304, headers={"ETag": etag})
@@ -1,16 +1,32 @@
 """GET /api/messages/{channel} — 获取指定频道的消息列表。"""
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 
+from app.routers.conditional import is_not_modified, make_etag, not_modified
 from app.schemas.models import Channel, ChannelMessage
+from app.schemas.serialization import FastJSONResponse, json_array
 from app.store.memory import store
 
 router = APIRouter(prefix="/api", tags=["messages"])
 
+# 单次读取消息条数上限
+MAX_MESSAGES_LIMIT = 500
+
 
 @router.get("/messages/{channel}", response_model=list[ChannelMessage])
-async def get_messages(channel: str) -> list[ChannelMessage]:
-    """获取指定频道的消息列表。"""
+async def get_messages(
+    request: Request,
+    channel: str,
+    session_id: str = Query(min_length=1),
+    after_id: int = Query(default=0, ge=0),
+    limit: int | None = Query(default=None, ge=1, le=MAX_MESSAGES_LIMIT),
+) -> Response:
+    """获取指定会话在指定频道的消息列表。
+
+    session_id 必填：多个会话并发时不能回退到最近创建的会话，否则会读到他人的消息。
+    传入 after_id（上次收到的最后一条消息 id）只返回更新的消息，limit 限制返回条数。
+    ETag 由会话与频道最新消息 ID 构成，频道无新消息时 If-None-Match 命中返回 304。
+    """
     try:
         ch = Channel(channel)
     except ValueError:
@@ -18,4 +34,17 @@ async def get_messages(channel: str) -> list[ChannelMessage]:
             status_code=400,
             detail="INVALID_CHANNEL",
         )
-    return store.get_messages(ch)
+    session = store.get_session(session_id)
+    if session is None:
+        return FastJSONResponse(b"[]")
+    # 先取版本再读消息：并发追加时 ETag 只会旧于响应内容，下次请求重新返回
+    etag = make_etag(session.session_id, channel, store.last_message_id(ch, session.session_id))
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    messages = store.get_messages(
+        ch, session_id=session.session_id, after_id=after_id, limit=limit
+    )
+    # 消息记录不可变，直接拼接各记录缓存的 JSON 片段
+    return FastJSONResponse(
+        json_array([m.to_json() for m in messages]), headers={"ETag": etag}
+    )
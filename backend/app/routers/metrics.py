@@ -0,0 +1,34 @@
+"""GET /api/metrics — 运行时指标（工作池、意图缓存等）。"""
+
+from fastapi import APIRouter
+
+from app.agent.batch import batch_scheduler
+from app.agent.engine import get_tool_binding_stats
+from app.agent.intent_cache import intent_cache
+from app.agent.intent_rules import get_matcher
+from app.agent.runner import agent_runner
+from app.routers.status import status_cache
+from app.schemas.serialization import serializer_name
+from app.store.idempotency import idempotency_cache
+from app.store.memory import store
+
+router = APIRouter(prefix="/api", tags=["metrics"])
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """返回后端运行时指标快照。"""
+    return {
+        "agent_runner": agent_runner.stats(),
+        "chat_batches": batch_scheduler.stats(),
+        "idempotency": idempotency_cache.stats(),
+        "intent_rules": get_matcher().stats(),
+        "intent_cache": intent_cache.stats(),
+        "tool_binding": get_tool_binding_stats(),
+        "event_subscribers": store.events.subscriber_count(),
+        "sessions": store.session_stats(),
+        "history": store.history_stats(),
+        "storage": store.storage_stats(),
+        "status_cache": status_cache.stats(),
+        "json_serializer": serializer_name(),
+    }
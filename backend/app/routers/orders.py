@@ -1,8 +1,10 @@
 """订单数据查看与重置路由。"""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 
-from app.mock.data import MOCK_ORDERS
+from app.mock.data import MOCK_ORDERS, mark_orders_changed, orders_version
+from app.routers.conditional import BOOT_ID, is_not_modified, make_etag, not_modified
+from app.schemas.serialization import FastJSONResponse
 
 router = APIRouter(prefix="/api", tags=["orders"])
 
@@ -10,9 +12,12 @@ _INITIAL_STATUS = "confirmed"
 
 
 @router.get("/orders")
-async def get_orders():
-    """返回所有订单当前状态。"""
-    return list(MOCK_ORDERS.values())
+async def get_orders(request: Request) -> Response:
+    """返回所有订单当前状态。支持 If-None-Match，订单未变更时返回 304。"""
+    etag = make_etag(BOOT_ID, "orders", orders_version())
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    return FastJSONResponse(list(MOCK_ORDERS.values()), headers={"ETag": etag})
 
 
 @router.post("/orders/reset")
@@ -20,4 +25,5 @@ async def reset_orders():
     """将所有订单状态重置为 confirmed，返回重置后的列表。"""
     for order in MOCK_ORDERS.values():
         order["status"] = _INITIAL_STATUS
+    mark_orders_changed()
     return list(MOCK_ORDERS.values())
@@ -1,6 +1,6 @@
-"""DELETE /api/session — 清空当前会话。"""
+"""DELETE /api/session — 清空会话。"""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 
 from app.store.memory import store
 
@@ -8,7 +8,10 @@ router = APIRouter(prefix="/api", tags=["session"])
 
 
 @router.delete("/session")
-async def delete_session():
-    """清空当前会话，保留历史记录（FR31）。"""
-    store.clear_session()
+async def delete_session(session_id: str = Query(min_length=1)):
+    """清空指定会话，保留历史记录（FR31）。
+
+    session_id 必填：多个会话并发时不能回退到最近创建的会话，否则会清空他人执行中的会话。
+    """
+    store.clear_session(session_id)
     return {"message": "会话已清空"}
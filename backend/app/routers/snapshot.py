@@ -0,0 +1,89 @@
+"""GET /api/snapshot/{session_id} — 一次请求获取状态、各频道消息与订单的合并快照。"""
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+
+from app.mock.data import MOCK_ORDERS, orders_version
+from app.routers.conditional import BOOT_ID, is_not_modified, make_etag, not_modified
+from app.routers.status import render_status
+from app.schemas.models import Channel, SnapshotResponse
+from app.schemas.serialization import FastJSONResponse, dumps, json_array
+from app.store.memory import store
+
+router = APIRouter(prefix="/api", tags=["snapshot"])
+
+
+def _orders_cursor() -> str:
+    """订单分区游标。混入进程启动标识：重启后版本号归零，旧游标不会误判为未变更。"""
+    return f"{BOOT_ID}.{orders_version()}"
+
+
+@router.get("/snapshot/{session_id}", response_model=SnapshotResponse)
+async def get_snapshot(
+    request: Request,
+    session_id: str,
+    since_version: int | None = None,
+    chat_after: int = Query(default=0, ge=0),
+    upstream_after: int = Query(default=0, ge=0),
+    downstream_after: int = Query(default=0, ge=0),
+    orders_cursor: str | None = None,
+) -> Response:
+    """合并快照，替代分别轮询状态、三个频道消息与订单的五次请求。
+
+    - since_version：状态分区只返回 version 大于该值的动作（changed_actions），缺省返回全部动作
+    - chat_after / upstream_after / downstream_after：各频道只返回 ID 大于游标的消息
+    - orders_cursor：订单自该游标以来未变更时 orders 为 null
+
+    状态与消息取自会话的同一版本；响应中的 cursors 可原样作为下次请求的查询参数。
+    会话与订单均未变更时 If-None-Match 命中返回 304。
+    """
+    orders_now = _orders_cursor()
+    session = store.get_session(session_id)
+    if session is not None:
+        etag = make_etag(session_id, session.version, orders_now)
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+
+    cursors = {
+        Channel.chat: chat_after,
+        Channel.upstream: upstream_after,
+        Channel.downstream: downstream_after,
+    }
+    snap = store.snapshot(session_id, since_version=since_version, message_cursors=cursors)
+    if snap is None:
+        raise HTTPException(status_code=404, detail="SESSION_NOT_FOUND")
+    etag = make_etag(session_id, snap.version, orders_now)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    # 下一次请求的游标：无新消息的频道沿用原游标
+    next_cursors = {
+        "since_version": snap.version,
+        **{
+            f"{channel.value}_after": messages[-1].id if messages else cursors[channel]
+            for channel, messages in snap.messages.items()
+        },
+        "orders_cursor": orders_now,
+    }
+    orders = (
+        b"null"
+        if orders_cursor == orders_now
+        else dumps(list(MOCK_ORDERS.values()))
+    )
+    field = "changed_actions" if since_version is not None else "actions"
+    body = b"".join(
+        (
+            b'{"status":',
+            render_status(snap, field, since_version),
+            b',"messages":{',
+            b",".join(
+                dumps(channel.value) + b":" + json_array([m.to_json() for m in messages])
+                for channel, messages in snap.messages.items()
+            ),
+            b'},"orders":',
+            orders,
+            b',"cursors":',
+            dumps(next_cursors),
+            b"}",
+        )
+    )
+    return FastJSONResponse(body, headers={"ETag": etag})
@@ -1,39 +1,167 @@
 """GET /api/status/{session_id} — 轮询获取 Agent 执行状态。"""
 
-from fastapi import APIRouter, HTTPException
+import os
 
-from app.schemas.models import StatusResponse
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+
+from app.routers.conditional import is_not_modified, make_etag, not_modified
+from app.schemas.models import SessionStatus, StatusResponse
+from app.schemas.serialization import BytesCache, FastJSONResponse, dumps, json_array
 from app.store.memory import store
+from app.store.records import SessionSnapshot
 
 router = APIRouter(prefix="/api", tags=["status"])
 
+# 长轮询最长等待时间（毫秒）
+MAX_WAIT_MS = 30000
+
+# 状态响应序列化缓存容量（按会话、版本号与查询条件缓存响应字节）
+STATUS_CACHE_SIZE = int(os.environ.get("STATUS_CACHE_SIZE", "1024"))
+
+_TERMINAL_STATUSES = (SessionStatus.completed, SessionStatus.error)
+
+# 同一会话同一版本的并发轮询共享一次序列化结果
+status_cache = BytesCache(STATUS_CACHE_SIZE)
+
+
+def actions_field(after_index: int | None, since_version: int | None) -> str:
+    """查询模式对应的动作字段：版本变更模式、增量模式或完整模式。"""
+    if since_version is not None:
+        return "changed_actions"
+    if after_index is not None:
+        return "new_actions"
+    return "actions"
+
+
+def render_status(snap: SessionSnapshot, field: str, cursor: int | None) -> bytes:
+    """序列化状态响应，按（会话、版本号、查询条件）缓存。cursor 为查询模式对应的游标值。"""
+    key = (snap.session_id, snap.version, field, cursor)
+    body = status_cache.get(key)
+    if body is None:
+        body = _render(snap, field)
+        status_cache.put(key, body)
+    return body
+
+
+def _render(snap: SessionSnapshot, field: str) -> bytes:
+    """按 StatusResponse 的字段顺序序列化响应，动作使用记录缓存的 JSON 片段。"""
+    parts = {"new_actions": b"null", "actions": b"null", "changed_actions": b"null"}
+    parts[field] = json_array([a.to_json() for a in snap.actions])
+    return b"".join(
+        (
+            b'{"session_id":',
+            dumps(snap.session_id),
+            b',"status":',
+            dumps(snap.status.value),
+            b',"new_actions":',
+            parts["new_actions"],
+            b',"actions":',
+            parts["actions"],
+            b',"changed_actions":',
+            parts["changed_actions"],
+            b',"unread_channels":',
+            dumps(snap.unread_channels),
+            b',"final_reply":',
+            dumps(snap.final_reply),
+            b',"version":',
+            dumps(snap.version),
+            b"}",
+        )
+    )
+
+
+def _require_snapshot(
+    session_id: str,
+    after_index: int | None,
+    since_version: int | None,
+) -> SessionSnapshot:
+    """读取会话一致视图，不存在时返回 404。"""
+    snap = store.snapshot(session_id, after_index=after_index, since_version=since_version)
+    if snap is None:
+        raise HTTPException(status_code=404, detail="SESSION_NOT_FOUND")
+    return snap
+
+
+def _has_changes(snap: SessionSnapshot, since_version: int | None) -> bool:
+    """增量查询是否有可返回的变更：版本模式看版本号，增量模式看新动作。"""
+    if since_version is not None:
+        return snap.version > since_version
+    return bool(snap.actions)
+
+
+async def _wait_for_change(
+    session_id: str,
+    after_index: int | None,
+    since_version: int | None,
+    wait_ms: int,
+) -> None:
+    """长轮询：无新变更时挂起，直到会话发生变更或超时。
+
+    先订阅再复查，避免检查与订阅之间到达的变更被错过。
+    """
+    sub = store.events.subscribe(session_id)
+    try:
+        snap = store.snapshot(session_id, after_index=after_index, since_version=since_version)
+        if (
+            snap is None
+            or snap.status in _TERMINAL_STATUSES
+            or _has_changes(snap, since_version)
+        ):
+            return
+        await sub.get(timeout=wait_ms / 1000)
+    finally:
+        store.events.unsubscribe(sub)
+
 
 @router.get("/status/{session_id}", response_model=StatusResponse)
 async def get_status(
+    request: Request,
     session_id: str,
     after_index: int | None = None,
-) -> StatusResponse:
-    """获取 Agent 执行状态。支持完整模式和增量模式。"""
-    session = store.get_session()
-    if not session or session.session_id != session_id:
-        raise HTTPException(status_code=404, detail="SESSION_NOT_FOUND")
+    since_version: int | None = None,
+    wait_ms: int = Query(default=0, ge=0, le=MAX_WAIT_MS),
+) -> Response:
+    """获取 Agent 执行状态。支持完整模式、增量模式和版本变更模式。
 
-    if after_index is not None:
-        # 增量模式：只返回 index > after_index 的新动作
-        new_actions = store.get_actions(after_index=after_index)
-        return StatusResponse(
-            session_id=session.session_id,
-            status=session.status,
-            new_actions=new_actions,
-            unread_channels=session.unread_channels,
-            final_reply=session.final_reply,
-        )
+    - since_version：返回 version 大于该值的新增或已更新动作（优先于 after_index）
+    - after_index：只返回 index 大于该值的新动作
+    - wait_ms：以上两种模式下启用长轮询，没有变更时最多等待 wait_ms 毫秒，
+      期间会话任一变更即返回；完整模式下 If-None-Match 命中当前版本时同样等待
 
-    # 完整模式：返回所有 actions
-    return StatusResponse(
-        session_id=session.session_id,
-        status=session.status,
-        actions=session.actions,
-        unread_channels=session.unread_channels,
-        final_reply=session.final_reply,
-    )
+    响应中的状态、动作与版本号取自会话的同一版本（见 MemoryStore.snapshot）。
+    ETag 由会话 ID 与版本号构成；If-None-Match 命中时返回 304（长轮询在等待结束后再比较）。
+    响应体按（会话、版本号、查询条件）缓存序列化字节，不经 response_model 校验。
+    """
+    if since_version is not None:
+        after_index = None
+    field = actions_field(after_index, since_version)
+    cursor = since_version if since_version is not None else after_index
+
+    if not wait_ms:
+        # 快速路径：只读版本号，未变更或已有序列化结果时不读取快照
+        session = store.get_session(session_id)
+        if session is not None:
+            etag = make_etag(session_id, session.version)
+            if is_not_modified(request, etag):
+                return not_modified(etag)
+            cached = status_cache.get((session_id, session.version, field, cursor))
+            if cached is not None:
+                return FastJSONResponse(cached, headers={"ETag": etag})
+
+    snap = _require_snapshot(session_id, after_index, since_version)
+
+    if wait_ms:
+        incremental = since_version is not None or after_index is not None
+        if incremental and not _has_changes(snap, since_version):
+            await _wait_for_change(session_id, after_index, since_version, wait_ms)
+            # 等待期间会话可能已被重置
+            snap = _require_snapshot(session_id, after_index, since_version)
+        elif not incremental and is_not_modified(request, make_etag(session_id, snap.version)):
+            # 客户端已持有当前版本：等待会话版本前进
+            await _wait_for_change(session_id, None, snap.version, wait_ms)
+            snap = _require_snapshot(session_id, after_index, since_version)
+
+    etag = make_etag(session_id, snap.version)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    return FastJSONResponse(render_status(snap, field, cursor), headers={"ETag": etag})
@@ -0,0 +1,71 @@
+"""GET /api/stream/{session_id} — 以 Server-Sent Events 推送 Agent 执行进度。"""
+
+import json
+import os
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.schemas.models import SessionStatus, StatusResponse
+from app.store.memory import store
+
+router = APIRouter(prefix="/api", tags=["stream"])
+
+# 无事件时发送心跳注释的间隔（秒），防止代理断开空闲连接
+SSE_KEEPALIVE_SECONDS = float(os.environ.get("SSE_KEEPALIVE_SECONDS", "15"))
+
+_TERMINAL_STATUSES = (SessionStatus.completed, SessionStatus.error)
+
+
+def _format_event(event_type: str, data: dict) -> str:
+    """按 SSE 协议格式化单条事件。"""
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event_type}\ndata: {payload}\n\n"
+
+
+async def _event_stream(session_id: str) -> AsyncIterator[str]:
+    """事件流：先推送完整快照，再实时推送增量事件，直至执行结束或客户端断开。
+
+    先订阅再取快照，快照之后的变更不会丢失；客户端可按 action index 去重。
+    """
+    sub = store.events.subscribe(session_id)
+    try:
+        snap = store.snapshot(session_id)
+        if snap is None:
+            return
+        snapshot = StatusResponse(
+            session_id=snap.session_id,
+            status=snap.status,
+            actions=[a.to_model() for a in snap.actions],
+            unread_channels=snap.unread_channels,
+            final_reply=snap.final_reply,
+            version=snap.version,
+        )
+        yield _format_event("snapshot", snapshot.model_dump(mode="json"))
+        if snap.status in _TERMINAL_STATUSES:
+            return
+
+        while True:
+            event = await sub.get(timeout=SSE_KEEPALIVE_SECONDS)
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            yield _format_event(event.type, event.data)
+            if event.type == "end":
+                return
+    finally:
+        store.events.unsubscribe(sub)
+
+
+@router.get("/stream/{session_id}")
+async def stream_status(session_id: str) -> StreamingResponse:
+    """订阅会话进度事件流（snapshot / action_appended / action_updated /
+    message / unread / status / final_reply / end）。"""
+    if not store.get_session(session_id):
+        raise HTTPException(status_code=404, detail="SESSION_NOT_FOUND")
+    return StreamingResponse(
+        _event_stream(session_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -2,6 +2,7 @@
 
 from datetime import UTC, datetime
 from enum import Enum
+from typing import Annotated
 
 from pydantic import BaseModel, Field
 
@@ -58,11 +59,15 @@ class ActionLogEntry(BaseModel):
     status: ActionStatus
     detail: dict | None = None
     timestamp: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    # 最近一次变更时的会话版本号
+    version: int = 0
 
 
 class ChannelMessage(BaseModel):
     """频道消息。"""
 
+    # 会话内单调递增的消息 ID（从 1 开始），用作增量读取游标
+    id: int = 0
     channel: Channel
     sender: str
     content: str
@@ -77,6 +82,8 @@ class AgentExecutionState(BaseModel):
     actions: list[ActionLogEntry] = Field(default_factory=list)
     final_reply: str | None = None
     unread_channels: list[str] = Field(default_factory=list)
+    # 会话变更版本号，任一变更单调递增
+    version: int = 0
 
 
 class SkillDefinition(BaseModel):
@@ -86,6 +93,12 @@ class SkillDefinition(BaseModel):
     name: str
     description: str
     content: str
+    keywords: list[str] = Field(default_factory=list)
+    patterns: list[str] = Field(default_factory=list)
+    # 否决规则：消息命中时不走规则快速匹配，交给 LLM 判断（否定、疑问等）
+    exclude_patterns: list[str] = Field(default_factory=list)
+    plan: list[str] = Field(default_factory=list)
+    plan_inputs: list[str] = Field(default_factory=list)
 
 
 class ToolDefinition(BaseModel):
@@ -122,6 +135,43 @@ class ChatResponse(BaseModel):
     session_id: str
 
 
+class BatchChatRequest(BaseModel):
+    """POST /api/chat/batch 请求体。"""
+
+    messages: list[Annotated[str, Field(min_length=1)]] = Field(min_length=1)
+    # 本批次同时交给工作池的任务数上限；缺省与上限均为服务端配置 AGENT_BATCH_CONCURRENCY
+    max_concurrency: int | None = Field(default=None, ge=1)
+
+
+class BatchChatResponse(BaseModel):
+    """POST /api/chat/batch 响应体。session_ids 与请求消息顺序一致。"""
+
+    batch_id: str
+    session_ids: list[str]
+
+
+class BatchSessionStatus(BaseModel):
+    """批次内单个会话的进度。会话已被回收时 status 为 None。"""
+
+    session_id: str
+    status: SessionStatus | None
+    final_reply: str | None = None
+
+
+class BatchStatusResponse(BaseModel):
+    """GET /api/chat/batch/{batch_id} 响应体：批次整体进度。"""
+
+    batch_id: str
+    total: int
+    # 已交给工作池的任务数
+    submitted: int
+    # 各状态会话数（idle / running / completed / error / expired）
+    counts: dict[str, int]
+    done: bool
+    sessions: list[BatchSessionStatus]
+    created_at: datetime
+
+
 class ErrorResponse(BaseModel):
     """统一错误响应格式。"""
 
@@ -131,11 +181,33 @@ class ErrorResponse(BaseModel):
 
 
 class StatusResponse(BaseModel):
-    """GET /api/status/{session_id} 响应体。支持完整模式和增量模式。"""
+    """GET /api/status/{session_id} 响应体。支持完整模式、增量模式和版本变更模式。"""
 
     session_id: str
     status: SessionStatus
     new_actions: list[ActionLogEntry] | None = None
     actions: list[ActionLogEntry] | None = None
+    changed_actions: list[ActionLogEntry] | None = None
     unread_channels: list[str]
     final_reply: str | None = None
+    version: int = 0
+
+
+class SnapshotCursors(BaseModel):
+    """快照各分区游标。下次请求原样作为查询参数带回，各分区只返回增量。"""
+
+    since_version: int
+    chat_after: int = 0
+    upstream_after: int = 0
+    downstream_after: int = 0
+    orders_cursor: str
+
+
+class SnapshotResponse(BaseModel):
+    """GET /api/snapshot/{session_id} 响应体：状态、三个频道消息与订单的合并快照。"""
+
+    status: StatusResponse
+    messages: dict[Channel, list[ChannelMessage]]
+    # 订单自 orders_cursor 以来未变更时为 None
+    orders: list[dict] | None = None
+    cursors: SnapshotCursors
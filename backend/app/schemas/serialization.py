@@ -0,0 +1,97 @@
+"""快速 JSON 序列化 — 优先使用 orjson，未安装时回退到标准库 json。
+
+热点轮询接口（状态、消息、订单）绕过 response_model 校验与默认编码器，
+直接由内部记录序列化为字节并以 FastJSONResponse 返回。
+"""
+
+import json
+from collections import OrderedDict
+from collections.abc import Hashable
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 取决于运行环境
+    orjson = None
+
+
+def _default(value):
+    """无法直接序列化的值（如 datetime、Decimal）按字符串输出。"""
+    return str(value)
+
+
+def dumps(value) -> bytes:
+    """序列化为紧凑的 UTF-8 JSON 字节。
+
+    动作详情是任意的工具输出，字典键可能不是字符串：与标准库 json 一致转为字符串键。
+    """
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        value, ensure_ascii=False, separators=(",", ":"), default=_default
+    ).encode()
+
+
+def json_array(items: list[bytes]) -> bytes:
+    """将已序列化的元素拼接为 JSON 数组。"""
+    return b"[" + b",".join(items) + b"]"
+
+
+def serializer_name() -> str:
+    """当前使用的序列化实现。"""
+    return "orjson" if orjson is not None else "json"
+
+
+class FastJSONResponse(Response):
+    """JSON 响应：content 为已序列化的字节时原样发送，否则经 dumps 序列化。"""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+class BytesCache:
+    """序列化结果的 LRU 缓存：相同键（如会话 + 版本号）的请求共享一次序列化。
+
+    仅在事件循环线程中使用，不加锁。
+    """
+
+    def __init__(self, max_entries: int):
+        self._max_entries = max_entries
+        self._entries: OrderedDict[Hashable, bytes] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable) -> bytes | None:
+        value = self._entries.get(key)
+        if value is None:
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return value
+
+    def put(self, key: Hashable, value: bytes) -> None:
+        if self._max_entries <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """返回缓存命中指标。"""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self._max_entries,
+            "bytes": sum(len(v) for v in self._entries.values()),
+            "hits": self._hits,
+            "misses": self._misses,
+        }
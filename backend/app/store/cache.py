@@ -0,0 +1,66 @@
+"""带 TTL 的有界 LRU 缓存 — 意图识别缓存、幂等键缓存等共用。"""
+
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Generic, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """带 TTL 的 LRU 缓存，记录命中/未命中/淘汰计数。
+
+    不加锁：调用方只在事件循环内访问，查询与写入之间没有 await。
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self._maxsize = maxsize
+        self._ttl = ttl_seconds
+        self._entries: OrderedDict[K, tuple[V, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: K) -> V | None:
+        """查询缓存。命中则刷新 LRU 位置；过期条目视为未命中并移除。"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+            self.evictions += 1
+        self.misses += 1
+        return None
+
+    def put(self, key: K, value: V) -> None:
+        """写入缓存，超出容量时淘汰最久未使用的条目。"""
+        self._entries[key] = (value, time.monotonic() + self._ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """清空缓存和计数器。"""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> dict:
+        """返回缓存指标。"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self._maxsize,
+            "ttl_seconds": self._ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
@@ -0,0 +1,171 @@
+"""存储事件日志 — MemoryStore 的全部状态变更以只追加事件记录，当前状态为事件的物化视图。
+
+日志文件格式（小端）：
+
+    文件头   8 字节魔数 b"AGEVLOG1"
+    每帧     u32 载荷长度 | u8 事件类型 | i64 时间戳（纳秒） | 载荷（UTF-8 JSON）
+
+帧头定长，回放时以 mmap 顺序扫描，可只读帧头按事件类型跳过不关心的载荷。
+写入中断导致的末尾残缺帧在回放时忽略，并在恢复写入前截断。
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+from collections.abc import Iterator
+from dataclasses import dataclass
+from enum import IntEnum
+
+_MAGIC = b"AGEVLOG1"
+_FRAME = struct.Struct("<IBq")
+
+
+class EventKind(IntEnum):
+    """存储事件类型。"""
+
+    SESSION_CREATED = 1
+    SESSION_STATUS_CHANGED = 2
+    FINAL_REPLY_SET = 3
+    ACTION_ADDED = 4
+    ACTION_STATUS_CHANGED = 5
+    MESSAGE_ADDED = 6
+    UNREAD_MARKED = 7
+    UNREAD_CLEARED = 8
+    HISTORY_SAVED = 9
+    SESSION_CLEARED = 10
+
+
+@dataclass(frozen=True, slots=True)
+class StoreEvent:
+    """单条存储事件。data 仅含可 JSON 序列化的值（枚举按值序列化）。"""
+
+    kind: EventKind
+    session_id: str
+    data: dict
+    ts_ns: int
+
+
+def encode_event(event: StoreEvent) -> bytes:
+    """将事件编码为一帧。"""
+    payload = json.dumps(
+        {"sid": event.session_id, "data": event.data},
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=str,
+    ).encode()
+    return _FRAME.pack(len(payload), event.kind, event.ts_ns) + payload
+
+
+def _scan(buf, kinds: frozenset[EventKind] | None) -> Iterator[tuple[int, StoreEvent | None]]:
+    """逐帧扫描缓冲区，产出 (帧结束偏移, 事件)。被 kinds 过滤的帧不解码载荷，事件为 None。"""
+    if len(buf) < len(_MAGIC) or buf[: len(_MAGIC)] != _MAGIC:
+        return
+    offset = len(_MAGIC)
+    end = len(buf)
+    while offset + _FRAME.size <= end:
+        length, kind, ts_ns = _FRAME.unpack_from(buf, offset)
+        payload_start = offset + _FRAME.size
+        if payload_start + length > end:
+            return  # 残缺帧
+        event = None
+        if kinds is None or kind in kinds:
+            try:
+                payload = json.loads(bytes(buf[payload_start : payload_start + length]))
+                event = StoreEvent(EventKind(kind), payload["sid"], payload["data"], ts_ns)
+            except ValueError:
+                return  # 载荷损坏视同残缺
+        offset = payload_start + length
+        yield offset, event
+
+
+def iter_events(
+    path: str,
+    kinds: set[EventKind] | None = None,
+) -> Iterator[StoreEvent]:
+    """以 mmap 顺序读取日志文件中的事件，可按事件类型过滤。"""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        wanted = frozenset(kinds) if kinds is not None else None
+        for _, event in _scan(buf, wanted):
+            if event is not None:
+                yield event
+
+
+class EventLog:
+    """只追加的事件日志文件。"""
+
+    def __init__(self, path: str):
+        self._path = path
+        self._file = None
+        self._valid_end: int | None = None
+        self._lock = threading.Lock()
+        self._appended = 0
+        self._replayed = 0
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def replay(self) -> Iterator[StoreEvent]:
+        """回放日志中的全部事件（崩溃恢复），并记录有效数据末尾位置。"""
+        self._valid_end = len(_MAGIC)
+        if not os.path.exists(self._path) or os.path.getsize(self._path) == 0:
+            return
+        with open(self._path, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as buf:
+            if buf[: len(_MAGIC)] != _MAGIC:
+                raise ValueError(f"Invalid event log file: {self._path}")
+            for end, event in _scan(buf, None):
+                self._valid_end = end
+                self._replayed += 1
+                yield event
+
+    def _open(self) -> None:
+        """打开日志用于追加：新文件写入魔数，已有文件截断末尾残缺帧。"""
+        if self._valid_end is None:
+            for _ in self.replay():
+                pass
+        exists = os.path.exists(self._path) and os.path.getsize(self._path) > 0
+        self._file = open(self._path, "r+b" if exists else "wb")
+        if exists:
+            self._file.truncate(self._valid_end)
+            self._file.seek(self._valid_end)
+        else:
+            self._file.write(_MAGIC)
+
+    def append(self, event: StoreEvent) -> None:
+        """追加一条事件（写入缓冲，flush 时落盘）。"""
+        frame = encode_event(event)
+        with self._lock:
+            if self._file is None:
+                self._open()
+            self._file.write(frame)
+            self._appended += 1
+
+    def flush(self) -> None:
+        """将已追加的事件写入操作系统。"""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self._valid_end = None
+
+    def stats(self) -> dict:
+        """返回日志指标。"""
+        with self._lock:
+            size = self._file.tell() if self._file is not None else None
+        return {
+            "path": self._path,
+            "appended": self._appended,
+            "replayed": self._replayed,
+            "bytes": size,
+        }
@@ -0,0 +1,78 @@
+"""会话事件总线 — 按 session_id 将 MemoryStore 变更推送给订阅者（SSE 等）。
+
+发布方可能运行在事件循环线程之外（LangGraph 同步节点在线程池执行），
+因此事件通过 loop.call_soon_threadsafe 投递到订阅者所在事件循环。
+"""
+
+import asyncio
+import threading
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class SessionEvent:
+    """单条会话事件。"""
+
+    type: str
+    data: dict
+
+
+@dataclass(eq=False)
+class Subscription:
+    """单个订阅者：绑定创建时所在的事件循环和接收队列。"""
+
+    session_id: str
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue = field(default_factory=asyncio.Queue)
+
+    async def get(self, timeout: float | None = None) -> SessionEvent | None:
+        """等待下一条事件，超时返回 None。"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class SessionEventBus:
+    """按会话分组的订阅者集合，负责事件扇出。"""
+
+    def __init__(self):
+        self._subscribers: dict[str, set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, session_id: str) -> Subscription:
+        """订阅会话事件。须在事件循环中调用。"""
+        sub = Subscription(session_id=session_id, loop=asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(session_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        """取消订阅（重复调用安全）。"""
+        with self._lock:
+            subs = self._subscribers.get(sub.session_id)
+            if subs is None:
+                return
+            subs.discard(sub)
+            if not subs:
+                del self._subscribers[sub.session_id]
+
+    def has_subscribers(self, session_id: str) -> bool:
+        """会话是否有订阅者（无订阅者时发布方可跳过事件序列化）。"""
+        return session_id in self._subscribers
+
+    def subscriber_count(self) -> int:
+        """当前订阅者总数。"""
+        with self._lock:
+            return sum(len(subs) for subs in self._subscribers.values())
+
+    def publish(self, session_id: str, event_type: str, data: dict) -> None:
+        """向会话的全部订阅者投递事件。订阅者事件循环已关闭时自动移除。"""
+        with self._lock:
+            subs = list(self._subscribers.get(session_id, ()))
+        event = SessionEvent(type=event_type, data=data)
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub.queue.put_nowait, event)
+            except RuntimeError:
+                self.unsubscribe(sub)
@@ -0,0 +1,140 @@
+"""执行历史分层存储 — 内存中保留最近 N 条，更早的记录溢出到磁盘 JSONL 文件。
+
+内存层为按 execution_id 索引的有序环形缓冲；溢出记录只在内存中保留
+execution_id -> 文件偏移量，详情查询时按偏移量懒加载。
+"""
+
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from app.schemas.models import ExecutionHistory
+from app.store.records import HistoryRecord
+
+# 内存中保留的最近执行记录条数
+HISTORY_MEMORY_SIZE = int(os.environ.get("HISTORY_MEMORY_SIZE", "200"))
+# 溢出文件路径；未配置时首次溢出创建进程私有的临时文件
+HISTORY_SPILL_PATH = os.environ.get("HISTORY_SPILL_PATH", "")
+
+
+class HistoryStore:
+    """执行历史：内存环形缓冲 + 磁盘追加文件。"""
+
+    def __init__(
+        self,
+        memory_size: int = HISTORY_MEMORY_SIZE,
+        spill_path: str = HISTORY_SPILL_PATH,
+    ):
+        self._memory_size = memory_size
+        self._spill_path = spill_path or None
+        self._recent: OrderedDict[str, HistoryRecord] = OrderedDict()
+        # 内存记录的序列化字节数（近似内存占用），查询指标时懒计算并缓存
+        self._recent_bytes: dict[str, int] = {}
+        self._spilled: dict[str, int] = {}
+        self._spill_bytes = 0
+        self._spill_loads = 0
+        self._index_loaded = False
+        self._lock = threading.Lock()
+
+    # === 写入 ===
+
+    def append(self, history: HistoryRecord) -> None:
+        """追加一条记录，超出内存容量时将最旧的记录溢出到磁盘。"""
+        with self._lock:
+            self._recent[history.execution_id] = history
+            while len(self._recent) > self._memory_size:
+                execution_id, oldest = self._recent.popitem(last=False)
+                self._recent_bytes.pop(execution_id, None)
+                self._spill(oldest)
+
+    def _spill(self, history: HistoryRecord) -> None:
+        """将记录追加写入溢出文件并记录偏移量。调用方须持有锁。
+
+        溢出文件中已有的记录（如启动时回放事件日志重建的历史）不重复写入。
+        """
+        self._ensure_index()
+        if history.execution_id in self._spilled:
+            return
+        line = history.to_model().model_dump_json().encode() + b"\n"
+        with open(self._spill_path, "ab") as f:
+            offset = f.seek(0, os.SEEK_END)
+            f.write(line)
+        self._spilled[history.execution_id] = offset
+        self._spill_bytes = offset + len(line)
+
+    def _ensure_index(self) -> None:
+        """首次访问溢出文件时确定路径，并为已有文件内容重建偏移量索引。"""
+        if self._index_loaded:
+            return
+        self._index_loaded = True
+        if self._spill_path is None:
+            fd, self._spill_path = tempfile.mkstemp(
+                prefix="agent_history_", suffix=".jsonl"
+            )
+            os.close(fd)
+            return
+        if not os.path.exists(self._spill_path):
+            return
+        with open(self._spill_path, "rb") as f:
+            offset = 0
+            for line in f:
+                try:
+                    history = ExecutionHistory.model_validate_json(line)
+                except ValueError:
+                    break  # 末尾残缺行（写入中断），之后的内容忽略
+                self._spilled[history.execution_id] = offset
+                offset += len(line)
+            self._spill_bytes = offset
+
+    # === 查询 ===
+
+    def list_recent(self) -> list[HistoryRecord]:
+        """内存中的最近记录（按保存时间先后）。"""
+        with self._lock:
+            return list(self._recent.values())
+
+    def get(self, execution_id: str) -> HistoryRecord | None:
+        """按 execution_id 查询：先查内存，再按偏移量从溢出文件懒加载。"""
+        with self._lock:
+            history = self._recent.get(execution_id)
+            if history is not None:
+                return history
+            self._ensure_index()
+            offset = self._spilled.get(execution_id)
+            if offset is None:
+                return None
+            with open(self._spill_path, "rb") as f:
+                f.seek(offset)
+                line = f.readline()
+            self._spill_loads += 1
+        return HistoryRecord.from_model(ExecutionHistory.model_validate_json(line))
+
+    @property
+    def memory_size(self) -> int:
+        """内存层容量。"""
+        return self._memory_size
+
+    def __len__(self) -> int:
+        # 回放重建的记录可能同时在内存层与溢出文件中
+        return len(self._recent) + sum(1 for e in self._spilled if e not in self._recent)
+
+    # === 可观测性 ===
+
+    def stats(self) -> dict:
+        """返回历史分层存储的容量与内存占用指标。"""
+        with self._lock:
+            for execution_id, history in self._recent.items():
+                if execution_id not in self._recent_bytes:
+                    self._recent_bytes[execution_id] = len(
+                        history.to_model().model_dump_json().encode()
+                    )
+            return {
+                "memory_size": self._memory_size,
+                "in_memory": len(self._recent),
+                "in_memory_bytes": sum(self._recent_bytes.values()),
+                "spilled": len(self._spilled),
+                "spill_bytes": self._spill_bytes,
+                "spill_loads": self._spill_loads,
+                "spill_path": self._spill_path,
+            }
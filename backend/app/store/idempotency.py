@@ -0,0 +1,48 @@
+"""幂等键缓存 — 将 POST /api/chat 的 Idempotency-Key 映射到已创建的会话（LRU + TTL）。
+
+客户端重试或重复点击时携带同一幂等键，命中缓存则返回已有会话，不再重复启动 Agent。
+条目同时记录请求消息的摘要，同一幂等键配不同消息视为客户端误用。
+"""
+
+import hashlib
+import os
+from typing import NamedTuple
+
+from app.store.cache import TTLCache
+
+# 缓存配置（环境变量可覆盖）
+IDEMPOTENCY_CACHE_SIZE = int(os.environ.get("IDEMPOTENCY_CACHE_SIZE", "4096"))
+IDEMPOTENCY_TTL_SECONDS = float(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "600"))
+# 幂等键最大长度
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+class IdempotencyEntry(NamedTuple):
+    """幂等键对应的会话与请求消息摘要。"""
+
+    session_id: str
+    fingerprint: str
+
+
+def fingerprint(message: str) -> str:
+    """请求消息摘要，用于识别同一幂等键下的不同请求。"""
+    return hashlib.sha256(message.encode()).hexdigest()
+
+
+class IdempotencyCache(TTLCache[str, IdempotencyEntry]):
+    """幂等键 -> 会话的缓存。条目在 TTL 内始终有效，与会话是否已被回收无关。"""
+
+    def __init__(
+        self,
+        maxsize: int = IDEMPOTENCY_CACHE_SIZE,
+        ttl_seconds: float = IDEMPOTENCY_TTL_SECONDS,
+    ):
+        super().__init__(maxsize, ttl_seconds)
+
+    def remember(self, key: str, session_id: str, message: str) -> None:
+        """记录幂等键对应的会话与请求消息摘要。"""
+        self.put(key, IdempotencyEntry(session_id, fingerprint(message)))
+
+
+# 模块级单例
+idempotency_cache = IdempotencyCache()
@@ -1,53 +1,363 @@
 """In-memory state management for sessions, messages, and history."""
 
-import copy
+import logging
+import os
+import threading
+import time
 import uuid
+from bisect import bisect_right
+from collections import OrderedDict
+from collections.abc import Callable
+from contextvars import ContextVar
+from typing import TypeVar
 
-from app.schemas.models import (
-    ActionLogEntry,
-    ActionStatus,
-    ActionType,
-    AgentExecutionState,
-    Channel,
-    ChannelMessage,
-    ExecutionHistory,
-    SessionStatus,
+from app.schemas.models import ActionStatus, ActionType, Channel, SessionStatus
+from app.store.eventlog import EventKind, EventLog, StoreEvent
+from app.store.events import SessionEventBus
+from app.store.history import HistoryStore
+from app.store.records import (
+    ActionRecord,
+    HistoryRecord,
+    MessageRecord,
+    SessionRecord,
+    SessionSnapshot,
+    approx_size,
+)
+
+logger = logging.getLogger(__name__)
+
+# 会话锁分片数：会话按 session_id 哈希映射到固定数量的锁，不同分片的写入互不阻塞
+STORE_LOCK_SHARDS = int(os.environ.get("STORE_LOCK_SHARDS", "64"))
+
+# 会话空闲过期时间（秒）：最近一次变更后超过该时长且未在执行中的会话被回收，0 表示不过期
+SESSION_IDLE_TTL_SECONDS = float(os.environ.get("SESSION_IDLE_TTL_SECONDS", "3600"))
+# 会话内存预算（字节，近似值）：超出时优先回收最早结束的会话，0 表示不限制
+STORE_MEMORY_BUDGET_BYTES = int(os.environ.get("STORE_MEMORY_BUDGET_BYTES", str(256 * 1024 * 1024)))
+# 后台回收线程的扫描间隔（秒）
+SESSION_SWEEP_INTERVAL_SECONDS = float(os.environ.get("SESSION_SWEEP_INTERVAL_SECONDS", "30"))
+
+T = TypeVar("T")
+
+# 无需会话存在即可记录的事件类型
+_SESSIONLESS_KINDS = frozenset(
+    {EventKind.SESSION_CREATED, EventKind.HISTORY_SAVED, EventKind.SESSION_CLEARED}
+)
+
+# 已结束的会话状态，只有这些会话可被回收
+_FINISHED_STATUSES = (SessionStatus.completed, SessionStatus.error)
+# 重启时被中断的会话的最终回复
+_INTERRUPTED_REPLY = "系统错误：服务重启，本次执行已中断"
+
+# 当前执行上下文绑定的会话 ID。run_agent 入口设置，
+# 工具等不感知 session_id 的调用方据此定位所属会话（asyncio 任务间互相隔离）。
+current_session_id: ContextVar[str | None] = ContextVar(
+    "current_session_id", default=None
 )
 
 
 class MemoryStore:
-    """单例内存存储，管理会话状态、消息、历史记录。"""
+    """单例内存存储，按 session_id 管理多个并发会话的状态、消息，以及历史记录。
 
-    def __init__(self):
-        self._session: AgentExecutionState | None = None
-        self._messages: list[ChannelMessage] = []
-        self._history: list[ExecutionHistory] = []
-        self._action_counter: int = 0
+    所有会话级方法均接受可选的 session_id；未传入时依次回退到
+    current_session_id 上下文变量、最近创建的会话（兼容单会话调用方）。
 
-    # === 会话管理 ===
+    状态变更均以存储事件（见 app.store.eventlog）经 _apply 物化到内存视图；
+    配置事件日志时事件同时追加写入，启动时回放日志恢复状态。
 
-    def create_session(self) -> AgentExecutionState:
-        """创建新会话，返回初始状态。同时清除旧消息和计数器。"""
-        self._session = AgentExecutionState(session_id=str(uuid.uuid4()))
-        self._messages = []
-        self._action_counter = 0
-        return self._session
+    并发：同一会话的写入由其所在分片的锁串行化（存储同时被事件循环与执行器
+    线程中的同步节点调用，故使用线程锁；临界区内不含 await）。读取不加锁，
+    按会话序列锁（SessionRecord.seq）检测并重试被并发写入打断的读取；
+    已发布的动作与消息记录不可变，读者持有的引用不会被改写。
+    """
 
-    def get_session(self) -> AgentExecutionState | None:
-        """获取当前会话状态。"""
-        return self._session
+    def __init__(
+        self,
+        event_log: EventLog | None = None,
+        lock_shards: int = STORE_LOCK_SHARDS,
+        idle_ttl_seconds: float = SESSION_IDLE_TTL_SECONDS,
+        memory_budget_bytes: int = STORE_MEMORY_BUDGET_BYTES,
+    ):
+        self._sessions: dict[str, SessionRecord] = {}
+        # 按会话、频道分区存储消息，各分区按消息 ID 有序
+        self._messages: dict[str, dict[Channel, list[MessageRecord]]] = {}
+        self._message_counters: dict[str, int] = {}
+        self._action_counters: dict[str, int] = {}
+        # 每个会话的动作按最近变更顺序排列（index -> action），用于版本增量查询
+        self._action_changes: dict[str, OrderedDict[int, ActionRecord]] = {}
+        self._latest_session_id: str | None = None
+        self._history = HistoryStore()
+        # 会话变更事件扇出（SSE 订阅）
+        self.events = SessionEventBus()
+        # 只追加的存储事件日志；启动时回放已有日志恢复状态
+        self._event_log = event_log
+        # 分片会话写锁；同一会话的事件应用顺序与日志写入顺序一致
+        self._session_locks = [threading.RLock() for _ in range(max(1, lock_shards))]
+        # 会话回收：最近变更时间（纪元纳秒）与近似内存占用
+        self._idle_ttl_ns = int(idle_ttl_seconds * 1e9)
+        self._memory_budget = memory_budget_bytes
+        self._last_active: dict[str, int] = {}
+        self._session_bytes: dict[str, int] = {}
+        self._evictions = {"ttl": 0, "budget": 0}
+        self._sweeper: threading.Thread | None = None
+        self._sweeper_stop = threading.Event()
+        if event_log is not None:
+            for event in event_log.replay():
+                self._apply(event)
+            self._abort_interrupted_runs()
 
-    def update_session_status(self, status: SessionStatus) -> None:
-        """更新会话状态。无活跃会话时抛出 ValueError。"""
-        if not self._session:
-            raise ValueError("No active session")
-        self._session.status = status
+    def _abort_interrupted_runs(self) -> None:
+        """回放后将未结束的会话标记为 error：执行中与排队中的任务已随上个进程丢失。
+
+        标记以事件写入日志，下次回放结果一致；否则这些会话永远停留在未结束状态，
+        既不会被回收，轮询方也等不到结束。
+        """
+        for sid, session in list(self._sessions.items()):
+            if session.status in _FINISHED_STATUSES:
+                continue
+            if session.final_reply is None:
+                self._emit(EventKind.FINAL_REPLY_SET, sid, {"reply": _INTERRUPTED_REPLY})
+            self._emit(EventKind.SESSION_STATUS_CHANGED, sid, {"status": SessionStatus.error})
+
+    def _resolve_session_id(self, session_id: str | None) -> str | None:
+        """解析实际作用的 session_id（显式参数 > 上下文变量 > 最近创建的会话）。
 
-    def set_final_reply(self, reply: str) -> None:
-        """设置 Agent 最终回复。无活跃会话时抛出 ValueError。"""
-        if not self._session:
+        隐式回退仅供进程内调用方（Agent 节点、工具、测试）使用；HTTP 路由须显式传入
+        session_id，多个会话并发时最近创建的会话可能属于其他用户。
+        """
+        return session_id or current_session_id.get() or self._latest_session_id
+
+    def _require_session(self, session_id: str | None) -> SessionRecord:
+        """获取会话，不存在时抛出 ValueError。"""
+        session = self.get_session(session_id)
+        if not session:
             raise ValueError("No active session")
-        self._session.final_reply = reply
+        return session
+
+    def _session_lock(self, session_id: str) -> threading.RLock:
+        """会话所在分片的写锁。"""
+        return self._session_locks[hash(session_id) % len(self._session_locks)]
+
+    @staticmethod
+    def _read(session: SessionRecord, read: Callable[[SessionRecord], T]) -> T:
+        """无锁一致读取：读取期间会话发生写入（seq 变化或为奇数）时重试。"""
+        while True:
+            seq = session.seq
+            if not seq & 1:
+                try:
+                    result = read(session)
+                except (IndexError, RuntimeError):
+                    # 与写入交错时容器可能在迭代中被修改；未发生写入则为真实错误
+                    if session.seq == seq:
+                        raise
+                else:
+                    if session.seq == seq:
+                        return result
+            time.sleep(0)
+
+    @staticmethod
+    def _bump_version(session: SessionRecord) -> int:
+        """递增并返回会话变更版本号。"""
+        session.version += 1
+        return session.version
+
+    def _account(self, session_id: str, ts_ns: int, size_delta: int) -> None:
+        """记录会话最近变更时间与内存占用变化。调用方须持有会话锁。"""
+        self._last_active[session_id] = ts_ns
+        self._session_bytes[session_id] += size_delta
+
+    def _publish(self, session_id: str, event_type: str, build: Callable[[], dict]) -> None:
+        """发布会话事件。无订阅者时跳过事件体构造。"""
+        if self.events.has_subscribers(session_id):
+            self.events.publish(session_id, event_type, build())
+
+    # === 事件物化 ===
+
+    def _emit(self, kind: EventKind, session_id: str, data: dict):
+        """记录一条状态变更事件：应用到物化视图，并追加到事件日志（如已配置）。
+
+        返回应用事件产生的对象（会话、动作、消息或历史记录）。
+        """
+        # 时间戳取微秒精度，与 API 模型的 datetime 互转无损
+        event = StoreEvent(kind, session_id, data, time.time_ns() // 1000 * 1000)
+        with self._session_lock(session_id):
+            session = self._sessions.get(session_id)
+            if session is None and kind not in _SESSIONLESS_KINDS:
+                raise ValueError("No active session")
+            if session is not None:
+                session.seq += 1
+            try:
+                result = self._apply(event)
+            finally:
+                if session is not None:
+                    session.seq += 1
+            if self._event_log is not None:
+                self._event_log.append(event)
+        return result
+
+    def _apply(self, event: StoreEvent):
+        """将事件应用到内存视图。实时写入与日志回放共用此路径，保证状态一致。"""
+        sid, data = event.session_id, event.data
+        match event.kind:
+            case EventKind.SESSION_CREATED:
+                session = SessionRecord(sid)
+                self._sessions[sid] = session
+                self._messages[sid] = {channel: [] for channel in Channel}
+                self._message_counters[sid] = 0
+                self._action_counters[sid] = 0
+                self._action_changes[sid] = OrderedDict()
+                self._latest_session_id = sid
+                self._session_bytes[sid] = approx_size(session)
+                self._last_active[sid] = event.ts_ns
+                return session
+            case EventKind.SESSION_STATUS_CHANGED:
+                session = self._sessions[sid]
+                session.status = SessionStatus(data["status"])
+                self._bump_version(session)
+                self._last_active[sid] = event.ts_ns
+            case EventKind.FINAL_REPLY_SET:
+                session = self._sessions[sid]
+                self._account(
+                    sid, event.ts_ns, approx_size(data["reply"]) - approx_size(session.final_reply)
+                )
+                session.final_reply = data["reply"]
+                self._bump_version(session)
+            case EventKind.ACTION_ADDED:
+                session = self._sessions[sid]
+                action = ActionRecord(
+                    self._action_counters[sid],
+                    ActionType(data["action_type"]),
+                    data["title"],
+                    data["summary"],
+                    ActionStatus(data["status"]),
+                    data["detail"],
+                    event.ts_ns,
+                    self._bump_version(session),
+                )
+                self._action_counters[sid] += 1
+                session.actions.append(action)
+                self._action_changes[sid][action.index] = action
+                self._account(sid, event.ts_ns, approx_size(action))
+                return action
+            case EventKind.ACTION_STATUS_CHANGED:
+                # 以新记录替换原记录：读者、历史快照持有的旧记录保持不变
+                session = self._sessions[sid]
+                index = data["index"]
+                previous = session.actions[index]
+                action = previous.updated(
+                    ActionStatus(data["status"]),
+                    data["detail"],
+                    data["summary"],
+                    self._bump_version(session),
+                )
+                session.actions[index] = action
+                # 新旧记录结构相同，只计入被替换字段的大小变化
+                delta = 0
+                if data["summary"] is not None:
+                    delta += approx_size(action.summary) - approx_size(previous.summary)
+                if data["detail"] is not None:
+                    delta += approx_size(action.detail) - approx_size(previous.detail)
+                self._account(sid, event.ts_ns, delta)
+                changes = self._action_changes[sid]
+                changes[index] = action
+                changes.move_to_end(index)
+                return action
+            case EventKind.MESSAGE_ADDED:
+                session = self._sessions[sid]
+                self._message_counters[sid] += 1
+                channel = Channel(data["channel"])
+                msg = MessageRecord(
+                    self._message_counters[sid],
+                    channel,
+                    data["sender"],
+                    data["content"],
+                    event.ts_ns,
+                )
+                self._messages[sid][channel].append(msg)
+                self._bump_version(session)
+                self._account(sid, event.ts_ns, approx_size(msg))
+                return msg
+            case EventKind.UNREAD_MARKED:
+                session = self._sessions[sid]
+                session.unread_channels = [*session.unread_channels, data["channel"]]
+                self._bump_version(session)
+                self._last_active[sid] = event.ts_ns
+            case EventKind.UNREAD_CLEARED:
+                session = self._sessions[sid]
+                session.unread_channels = [
+                    c for c in session.unread_channels if c != data["channel"]
+                ]
+                self._bump_version(session)
+                self._last_active[sid] = event.ts_ns
+            case EventKind.HISTORY_SAVED:
+                # 动作记录不可变，快照直接共享动作对象（浅拷贝列表）而非深拷贝；
+                # 此后的动作更新以新记录替换，快照不受影响。
+                session = self._sessions.get(sid)
+                actions_snapshot = list(session.actions) if session else []
+                history = HistoryRecord(
+                    data["execution_id"],
+                    data["trigger_message"],
+                    data["skill_name"],
+                    session.status if session else SessionStatus.error,
+                    actions_snapshot,
+                    event.ts_ns,
+                )
+                self._history.append(history)
+                return history
+            case EventKind.SESSION_CLEARED:
+                session = self._sessions.pop(sid, None)
+                self._messages.pop(sid, None)
+                self._message_counters.pop(sid, None)
+                self._action_counters.pop(sid, None)
+                self._action_changes.pop(sid, None)
+                self._last_active.pop(sid, None)
+                self._session_bytes.pop(sid, None)
+                if sid == self._latest_session_id:
+                    self._latest_session_id = None
+                return session
+        return None
+
+    # === 会话管理 ===
+
+    def create_session(self, session_id: str | None = None) -> SessionRecord:
+        """创建新会话并设为最近会话，返回初始状态。已有会话不受影响。"""
+        return self._emit(EventKind.SESSION_CREATED, session_id or str(uuid.uuid4()), {})
+
+    def get_session(self, session_id: str | None = None) -> SessionRecord | None:
+        """获取会话状态。未传 session_id 时返回当前会话。"""
+        resolved = self._resolve_session_id(session_id)
+        if resolved is None:
+            return None
+        return self._sessions.get(resolved)
+
+    def list_sessions(self) -> list[SessionRecord]:
+        """获取全部存活会话。"""
+        return list(self._sessions.values())
+
+    def update_session_status(
+        self,
+        status: SessionStatus,
+        session_id: str | None = None,
+    ) -> None:
+        """更新会话状态。会话不存在时抛出 ValueError。"""
+        session = self._require_session(session_id)
+        self._emit(EventKind.SESSION_STATUS_CHANGED, session.session_id, {"status": status})
+        self._publish(session.session_id, "status", lambda: {"status": status.value})
+
+    def set_final_reply(self, reply: str, session_id: str | None = None) -> None:
+        """设置 Agent 最终回复。会话不存在时抛出 ValueError。"""
+        session = self._require_session(session_id)
+        self._emit(EventKind.FINAL_REPLY_SET, session.session_id, {"reply": reply})
+        self._publish(session.session_id, "final_reply", lambda: {"final_reply": reply})
+
+    def end_run(self, session_id: str | None = None) -> None:
+        """标记会话本轮执行结束：事件日志落盘，通知订阅者关闭事件流。"""
+        if self._event_log is not None:
+            self._event_log.flush()
+        session = self.get_session(session_id)
+        if session:
+            self._publish(
+                session.session_id, "end", lambda: {"status": session.status.value}
+            )
 
     # === 动作日志 ===
 
@@ -58,20 +368,24 @@ class MemoryStore:
         summary: str,
         status: ActionStatus,
         detail: dict | None = None,
-    ) -> ActionLogEntry:
-        """追加一条动作记录，自动分配递增 index。无活跃会话时抛出 ValueError。"""
-        if not self._session:
-            raise ValueError("No active session")
-        action = ActionLogEntry(
-            index=self._action_counter,
-            action_type=action_type,
-            title=title,
-            summary=summary,
-            status=status,
-            detail=detail,
+        session_id: str | None = None,
+    ) -> ActionRecord:
+        """追加一条动作记录，自动分配会话内递增 index。会话不存在时抛出 ValueError。"""
+        session = self._require_session(session_id)
+        action = self._emit(
+            EventKind.ACTION_ADDED,
+            session.session_id,
+            {
+                "action_type": action_type,
+                "title": title,
+                "summary": summary,
+                "status": status,
+                "detail": detail,
+            },
+        )
+        self._publish(
+            session.session_id, "action_appended", lambda: action.to_model().model_dump(mode="json")
         )
-        self._action_counter += 1
-        self._session.actions.append(action)
         return action
 
     def update_action_status(
@@ -80,25 +394,120 @@ class MemoryStore:
         status: ActionStatus,
         detail: dict | None = None,
         summary: str | None = None,
+        session_id: str | None = None,
     ) -> None:
-        """更新指定 index 的动作状态、详情和摘要。"""
-        if not self._session:
-            raise ValueError("No active session")
-        for action in self._session.actions:
-            if action.index == index:
-                action.status = status
-                if detail is not None:
-                    action.detail = detail
-                if summary is not None:
-                    action.summary = summary
-                return
-        raise ValueError(f"Action with index {index} not found")
-
-    def get_actions(self, after_index: int = -1) -> list[ActionLogEntry]:
-        """获取动作日志，支持增量查询。after_index=-1 返回全部。"""
-        if not self._session:
+        """更新指定 index 的动作状态、详情和摘要。
+
+        会话内 index 从 0 连续分配且只追加，动作在列表中的位置即其 index，O(1) 定位。
+        """
+        session = self._require_session(session_id)
+        with self._session_lock(session.session_id):
+            if not 0 <= index < len(session.actions):
+                raise ValueError(f"Action with index {index} not found")
+            action = self._emit(
+                EventKind.ACTION_STATUS_CHANGED,
+                session.session_id,
+                {"index": index, "status": status, "detail": detail, "summary": summary},
+            )
+        self._publish(
+            session.session_id,
+            "action_updated",
+            lambda: action.to_model().model_dump(mode="json"),
+        )
+
+    def get_actions(
+        self,
+        after_index: int = -1,
+        session_id: str | None = None,
+    ) -> list[ActionRecord]:
+        """获取动作日志，支持增量查询。after_index=-1 返回全部。
+
+        actions 按 index 有序，二分定位起点后切片，开销与返回条数成正比。
+        """
+        session = self.get_session(session_id)
+        if not session:
+            return []
+        return self._read(session, lambda s: self._actions_after(s, after_index))
+
+    @staticmethod
+    def _actions_after(session: SessionRecord, after_index: int) -> list[ActionRecord]:
+        start = bisect_right(session.actions, after_index, key=lambda a: a.index)
+        return session.actions[start:]
+
+    def get_changed_actions(
+        self,
+        since_version: int,
+        session_id: str | None = None,
+    ) -> list[ActionRecord]:
+        """获取 version > since_version 的动作（新增或更新），按 index 排序。
+
+        仅回溯最近变更的条目，开销与变更数量成正比。
+        """
+        session = self.get_session(session_id)
+        if not session:
             return []
-        return [a for a in self._session.actions if a.index > after_index]
+        return self._read(session, lambda s: self._actions_changed(s, since_version))
+
+    def _actions_changed(
+        self, session: SessionRecord, since_version: int
+    ) -> list[ActionRecord]:
+        changes = self._action_changes.get(session.session_id)
+        if changes is None:
+            return []  # 会话已被重置
+        changed = []
+        for action in reversed(changes.values()):
+            if action.version <= since_version:
+                break
+            changed.append(action)
+        changed.sort(key=lambda a: a.index)
+        return changed
+
+    def snapshot(
+        self,
+        session_id: str | None = None,
+        after_index: int | None = None,
+        since_version: int | None = None,
+        message_cursors: dict[Channel, int] | None = None,
+    ) -> SessionSnapshot | None:
+        """读取会话的一致视图（状态、动作、消息、最终回复、未读频道与版本号取自同一版本）。
+
+        since_version 优先：actions 为 version 大于该值的动作；其次 after_index：
+        actions 为 index 大于该值的动作；均未指定时为全部动作。
+        传入 message_cursors（频道 -> 消息 ID 游标）时同时读取各频道游标之后的消息。
+        会话不存在时返回 None。
+        """
+        session = self.get_session(session_id)
+        if not session:
+            return None
+
+        def read(s: SessionRecord) -> SessionSnapshot:
+            if since_version is not None:
+                actions = self._actions_changed(s, since_version)
+            elif after_index is not None:
+                actions = self._actions_after(s, after_index)
+            else:
+                actions = s.actions[:]
+            messages = None
+            if message_cursors is not None:
+                partitions = self._messages.get(s.session_id, {})
+                messages = {
+                    channel: partitions[channel][
+                        bisect_right(partitions[channel], after_id, key=lambda m: m.id) :
+                    ]
+                    for channel, after_id in message_cursors.items()
+                    if channel in partitions
+                }
+            return SessionSnapshot(
+                s.session_id,
+                s.status,
+                actions,
+                s.final_reply,
+                s.unread_channels,
+                s.version,
+                messages,
+            )
+
+        return self._read(session, read)
 
     # === 消息管理 ===
 
@@ -107,27 +516,70 @@ class MemoryStore:
         channel: Channel,
         sender: str,
         content: str,
-    ) -> ChannelMessage:
-        """添加一条频道消息。"""
-        msg = ChannelMessage(channel=channel, sender=sender, content=content)
-        self._messages.append(msg)
+        session_id: str | None = None,
+    ) -> MessageRecord:
+        """向会话添加一条频道消息。会话不存在时抛出 ValueError。"""
+        session = self._require_session(session_id)
+        msg = self._emit(
+            EventKind.MESSAGE_ADDED,
+            session.session_id,
+            {"channel": channel, "sender": sender, "content": content},
+        )
+        self._publish(session.session_id, "message", lambda: msg.to_model().model_dump(mode="json"))
         return msg
 
-    def get_messages(self, channel: Channel) -> list[ChannelMessage]:
-        """按频道查询消息列表。"""
-        return [m for m in self._messages if m.channel == channel]
+    def get_messages(
+        self,
+        channel: Channel,
+        session_id: str | None = None,
+        after_id: int = 0,
+        limit: int | None = None,
+    ) -> list[MessageRecord]:
+        """按频道查询会话消息，支持游标增量读取。会话不存在时返回空列表。
+
+        返回 ID 大于 after_id 的消息，最多 limit 条（按 ID 升序）。
+        频道分区内二分定位游标，开销与返回条数成正比。
+        """
+        session = self.get_session(session_id)
+        if not session:
+            return []
+        # 会话可能在取得后被回收线程并发移除
+        partition = self._messages.get(session.session_id, {}).get(channel, [])
+        start = bisect_right(partition, after_id, key=lambda m: m.id)
+        end = None if limit is None else start + limit
+        return partition[start:end]
+
+    def last_message_id(self, channel: Channel, session_id: str | None = None) -> int:
+        """频道分区内最新消息的 ID（分区只追加，可作为分区版本号）。无消息时返回 0。"""
+        session = self.get_session(session_id)
+        if not session:
+            return 0
+        partition = self._messages.get(session.session_id, {}).get(channel, [])
+        return partition[-1].id if partition else 0
 
     # === 未读频道 ===
 
-    def mark_channel_unread(self, channel: str) -> None:
+    def mark_channel_unread(self, channel: str, session_id: str | None = None) -> None:
         """标记频道有未读消息。"""
-        if self._session and channel not in self._session.unread_channels:
-            self._session.unread_channels.append(channel)
+        session = self.get_session(session_id)
+        if session and channel not in session.unread_channels:
+            self._emit(EventKind.UNREAD_MARKED, session.session_id, {"channel": channel})
+            self._publish_unread(session)
 
-    def clear_channel_unread(self, channel: str) -> None:
+    def clear_channel_unread(self, channel: str, session_id: str | None = None) -> None:
         """清除频道未读标记。"""
-        if self._session and channel in self._session.unread_channels:
-            self._session.unread_channels.remove(channel)
+        session = self.get_session(session_id)
+        if session and channel in session.unread_channels:
+            self._emit(EventKind.UNREAD_CLEARED, session.session_id, {"channel": channel})
+            self._publish_unread(session)
+
+    def _publish_unread(self, session: SessionRecord) -> None:
+        """发布未读频道变更事件（携带完整未读列表）。"""
+        self._publish(
+            session.session_id,
+            "unread",
+            lambda: {"unread_channels": list(session.unread_channels)},
+        )
 
     # === 历史记录 ===
 
@@ -135,39 +587,160 @@ class MemoryStore:
         self,
         trigger_message: str,
         skill_name: str | None = None,
-    ) -> ExecutionHistory:
-        """保存当前执行为历史记录（深拷贝 actions 快照）。"""
-        actions_snapshot = copy.deepcopy(self._session.actions) if self._session else []
-
-        history = ExecutionHistory(
-            execution_id=str(uuid.uuid4()),
-            trigger_message=trigger_message,
-            skill_name=skill_name,
-            status=self._session.status if self._session else SessionStatus.error,
-            actions=actions_snapshot,
+        session_id: str | None = None,
+    ) -> HistoryRecord:
+        """保存会话执行为历史记录（共享已完成的动作对象，见 HISTORY_SAVED 事件）。"""
+        session = self.get_session(session_id)
+        return self._emit(
+            EventKind.HISTORY_SAVED,
+            session.session_id if session else "",
+            {
+                "execution_id": str(uuid.uuid4()),
+                "trigger_message": trigger_message,
+                "skill_name": skill_name,
+            },
         )
-        self._history.append(history)
-        return history
-
-    def get_history_list(self) -> list[ExecutionHistory]:
-        """获取所有历史执行记录。"""
-        return self._history
-
-    def get_history_detail(self, execution_id: str) -> ExecutionHistory | None:
-        """根据 execution_id 获取某次执行详情。"""
-        for h in self._history:
-            if h.execution_id == execution_id:
-                return h
-        return None
+
+    def get_history_list(self) -> list[HistoryRecord]:
+        """获取内存中保留的最近历史执行记录（更早的记录已溢出到磁盘）。"""
+        return self._history.list_recent()
+
+    def get_history_detail(self, execution_id: str) -> HistoryRecord | None:
+        """根据 execution_id 获取某次执行详情（含已溢出到磁盘的记录）。"""
+        return self._history.get(execution_id)
+
+    def history_stats(self) -> dict:
+        """历史记录分层存储指标。"""
+        return self._history.stats()
 
     # === 会话重置 ===
 
-    def clear_session(self) -> None:
-        """清空当前会话（保留历史记录）。"""
-        self._session = None
-        self._messages = []
-        self._action_counter = 0
+    def clear_session(self, session_id: str | None = None) -> None:
+        """移除会话及其消息（保留历史记录）。会话不存在时静默返回。"""
+        resolved = self._resolve_session_id(session_id)
+        if resolved is None or resolved not in self._sessions:
+            return
+        session = self._emit(EventKind.SESSION_CLEARED, resolved, {})
+        # 通知仍在订阅的事件流结束
+        self._publish(resolved, "end", lambda: {"status": session.status.value})
+
+    # === 会话回收 ===
+
+    def sweep(self, now_ns: int | None = None) -> int:
+        """回收过期会话并执行内存预算，返回本次回收的会话数。
+
+        只回收已结束（completed / error）的会话：idle 会话可能已提交、仍在工作池中
+        排队，running 会话正在执行，回收后执行时将找不到会话。
+        先回收空闲超过 TTL 的会话；仍超出内存预算时按最近变更时间从早到晚回收。
+        """
+        now_ns = now_ns if now_ns is not None else time.time_ns()
+        evicted = 0
+
+        if self._idle_ttl_ns:
+            deadline = now_ns - self._idle_ttl_ns
+            for sid, last_active in list(self._last_active.items()):
+                if last_active < deadline and self._evict(
+                    sid, "ttl", lambda s: self._last_active.get(s.session_id, now_ns) < deadline
+                ):
+                    evicted += 1
+
+        if self._memory_budget:
+            total = sum(self._session_bytes.values())
+            if total > self._memory_budget:
+                candidates = sorted(
+                    (self._last_active.get(sid, 0), sid)
+                    for sid, session in list(self._sessions.items())
+                    if session.status in _FINISHED_STATUSES
+                )
+                for _, sid in candidates:
+                    if total <= self._memory_budget:
+                        break
+                    size = self._session_bytes.get(sid, 0)
+                    if self._evict(sid, "budget", lambda s: True):
+                        total -= size
+                        evicted += 1
+        return evicted
+
+    def _evict(
+        self,
+        session_id: str,
+        reason: str,
+        still_evictable: Callable[[SessionRecord], bool],
+    ) -> bool:
+        """在会话锁内复查后回收会话（与 clear_session 相同：保留历史记录，通知订阅者结束）。"""
+        with self._session_lock(session_id):
+            session = self._sessions.get(session_id)
+            if (
+                session is None
+                or session.status not in _FINISHED_STATUSES
+                or not still_evictable(session)
+            ):
+                return False
+            self.clear_session(session_id)
+        self._evictions[reason] += 1
+        return True
+
+    def start_sweeper(self, interval_seconds: float = SESSION_SWEEP_INTERVAL_SECONDS) -> None:
+        """启动后台回收线程（未配置 TTL 与内存预算时不启动）。"""
+        if self._sweeper is not None or not (self._idle_ttl_ns or self._memory_budget):
+            return
+        self._sweeper_stop.clear()
+        self._sweeper = threading.Thread(
+            target=self._sweep_loop, args=(interval_seconds,), name="session-sweeper", daemon=True
+        )
+        self._sweeper.start()
+
+    def _sweep_loop(self, interval_seconds: float) -> None:
+        while not self._sweeper_stop.wait(interval_seconds):
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("Session sweep failed")
+
+    def _stop_sweeper(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper_stop.set()
+            self._sweeper.join()
+            self._sweeper = None
+
+    def session_stats(self) -> dict:
+        """会话数量、回收次数与近似内存占用指标。"""
+        return {
+            "live": len(self._sessions),
+            "evicted": dict(self._evictions),
+            "approx_bytes": sum(self._session_bytes.values()),
+            "memory_budget_bytes": self._memory_budget,
+            "idle_ttl_seconds": self._idle_ttl_ns / 1e9,
+        }
+
+    # === 存储后端 ===
+
+    def storage_stats(self) -> dict:
+        """存储后端指标。"""
+        stats = {"backend": "memory"}
+        if self._event_log is not None:
+            stats["event_log"] = self._event_log.stats()
+        return stats
+
+    def close(self) -> None:
+        """释放存储资源（停止回收线程，关闭事件日志）。"""
+        self._stop_sweeper()
+        if self._event_log is not None:
+            self._event_log.close()
+
+
+def create_store() -> MemoryStore:
+    """按 STORE_BACKEND 环境变量创建存储实例（memory / sqlite）。"""
+    backend = os.environ.get("STORE_BACKEND", "memory")
+    if backend == "sqlite":
+        from app.store.sqlite import SQLiteStore
+
+        return SQLiteStore()
+    if backend != "memory":
+        raise ValueError(f"Unknown STORE_BACKEND: {backend}")
+    event_log_path = os.environ.get("EVENT_LOG_PATH", "")
+    return MemoryStore(event_log=EventLog(event_log_path) if event_log_path else None)
 
 
 # 模块级单例实例
-store = MemoryStore()
+store = create_store()
@@ -0,0 +1,358 @@
+"""存储内部紧凑记录 — __slots__ 对象，时间戳为纪元纳秒整数。
+
+热路径（每次执行多次的 add_action / add_message）只构造这些轻量对象，
+不做 pydantic 校验也不创建 datetime；路由层通过 to_model() 转换为
+app.schemas.models 中的 API 模型。枚举字段保存枚举成员本身（单例），
+重复出现的短字符串（标题、发送方）经 sys.intern 驻留。
+"""
+
+import sys
+from datetime import UTC, datetime, timedelta
+from enum import Enum
+
+from app.schemas.models import (
+    ActionLogEntry,
+    ActionStatus,
+    ActionType,
+    AgentExecutionState,
+    Channel,
+    ChannelMessage,
+    ExecutionHistory,
+    SessionStatus,
+)
+from app.schemas.serialization import dumps
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def ns_to_datetime(ts_ns: int) -> datetime:
+    """纪元纳秒转 UTC datetime（微秒精度）。"""
+    return _EPOCH + timedelta(microseconds=ts_ns // 1000)
+
+
+def datetime_to_ns(value: datetime) -> int:
+    """datetime 转纪元纳秒。微秒精度的时间戳往返转换无损。"""
+    return (value - _EPOCH) // _MICROSECOND * 1000
+
+
+def ns_to_iso(ts_ns: int) -> str:
+    """纪元纳秒转 ISO 8601 字符串，格式与 API 模型的 JSON 输出一致（UTC 以 Z 结尾）。"""
+    return ns_to_datetime(ts_ns).isoformat().removesuffix("+00:00") + "Z"
+
+
+def approx_size(value) -> int:
+    """近似内存占用（字节）：对象自身加上其引用的记录字段、容器元素与字符串。
+
+    枚举成员为共享单例，不计入。
+    """
+    if isinstance(value, Enum):
+        return 0
+    size = sys.getsizeof(value)
+    if isinstance(value, _Record):
+        size += sum(approx_size(getattr(value, name)) for name in value.__slots__)
+    elif isinstance(value, dict):
+        size += sum(approx_size(k) + approx_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(approx_size(v) for v in value)
+    return size
+
+
+class _Record:
+    """按 __slots__ 字段实现相等比较与 repr（下划线开头的缓存字段除外）。"""
+
+    __slots__ = ()
+
+    def _fields(self) -> tuple[str, ...]:
+        return tuple(name for name in self.__slots__ if not name.startswith("_"))
+
+    def _values(self) -> tuple:
+        return tuple(getattr(self, name) for name in self._fields())
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._values() == other._values()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields())
+        return f"{type(self).__name__}({fields})"
+
+
+class ActionRecord(_Record):
+    """动作记录（对应 ActionLogEntry）。"""
+
+    __slots__ = (
+        "index",
+        "action_type",
+        "title",
+        "summary",
+        "status",
+        "detail",
+        "ts_ns",
+        "version",
+        "_json",
+    )
+
+    def __init__(
+        self,
+        index: int,
+        action_type: ActionType,
+        title: str,
+        summary: str,
+        status: ActionStatus,
+        detail: dict | None,
+        ts_ns: int,
+        version: int = 0,
+    ):
+        self.index = index
+        self.action_type = action_type
+        self.title = sys.intern(title)
+        self.summary = summary
+        self.status = status
+        self.detail = detail
+        self.ts_ns = ts_ns
+        self.version = version
+        self._json: bytes | None = None
+
+    @property
+    def timestamp(self) -> datetime:
+        return ns_to_datetime(self.ts_ns)
+
+    def updated(
+        self,
+        status: ActionStatus,
+        detail: dict | None,
+        summary: str | None,
+        version: int,
+    ) -> "ActionRecord":
+        """返回更新后的新记录；detail、summary 为 None 时沿用原值。
+
+        已发布的动作记录不再原地修改，读者与历史快照持有的引用始终不变。
+        """
+        return ActionRecord(
+            self.index,
+            self.action_type,
+            self.title,
+            self.summary if summary is None else summary,
+            status,
+            self.detail if detail is None else detail,
+            self.ts_ns,
+            version,
+        )
+
+    def to_json(self) -> bytes:
+        """序列化为 JSON 字节，与 to_model() 的 JSON 输出一致。记录不可变，结果缓存复用。"""
+        if self._json is None:
+            self._json = dumps(
+                {
+                    "index": self.index,
+                    "action_type": self.action_type.value,
+                    "title": self.title,
+                    "summary": self.summary,
+                    "status": self.status.value,
+                    "detail": self.detail,
+                    "timestamp": ns_to_iso(self.ts_ns),
+                    "version": self.version,
+                }
+            )
+        return self._json
+
+    def to_model(self) -> ActionLogEntry:
+        return ActionLogEntry(
+            index=self.index,
+            action_type=self.action_type,
+            title=self.title,
+            summary=self.summary,
+            status=self.status,
+            detail=self.detail,
+            timestamp=self.timestamp,
+            version=self.version,
+        )
+
+    @classmethod
+    def from_model(cls, model: ActionLogEntry) -> "ActionRecord":
+        return cls(
+            model.index,
+            model.action_type,
+            model.title,
+            model.summary,
+            model.status,
+            model.detail,
+            datetime_to_ns(model.timestamp),
+            model.version,
+        )
+
+
+class MessageRecord(_Record):
+    """频道消息记录（对应 ChannelMessage）。"""
+
+    __slots__ = ("id", "channel", "sender", "content", "ts_ns", "_json")
+
+    def __init__(self, id: int, channel: Channel, sender: str, content: str, ts_ns: int):
+        self.id = id
+        self.channel = channel
+        self.sender = sys.intern(sender)
+        self.content = content
+        self.ts_ns = ts_ns
+        self._json: bytes | None = None
+
+    @property
+    def timestamp(self) -> datetime:
+        return ns_to_datetime(self.ts_ns)
+
+    def to_json(self) -> bytes:
+        """序列化为 JSON 字节，与 to_model() 的 JSON 输出一致，结果缓存复用。"""
+        if self._json is None:
+            self._json = dumps(
+                {
+                    "id": self.id,
+                    "channel": self.channel.value,
+                    "sender": self.sender,
+                    "content": self.content,
+                    "timestamp": ns_to_iso(self.ts_ns),
+                }
+            )
+        return self._json
+
+    def to_model(self) -> ChannelMessage:
+        return ChannelMessage(
+            id=self.id,
+            channel=self.channel,
+            sender=self.sender,
+            content=self.content,
+            timestamp=self.timestamp,
+        )
+
+
+class SessionRecord(_Record):
+    """会话状态记录（对应 AgentExecutionState）。
+
+    seq 为序列锁计数：写入期间为奇数，读者据此检测并重试被并发写入打断的读取。
+    """
+
+    __slots__ = (
+        "session_id",
+        "status",
+        "actions",
+        "final_reply",
+        "unread_channels",
+        "version",
+        "seq",
+    )
+
+    def __init__(
+        self,
+        session_id: str,
+        status: SessionStatus = SessionStatus.idle,
+        actions: list[ActionRecord] | None = None,
+        final_reply: str | None = None,
+        unread_channels: list[str] | None = None,
+        version: int = 0,
+    ):
+        self.session_id = session_id
+        self.status = status
+        self.actions = actions if actions is not None else []
+        self.final_reply = final_reply
+        self.unread_channels = unread_channels if unread_channels is not None else []
+        self.version = version
+        self.seq = 0
+
+    def _fields(self) -> tuple[str, ...]:
+        # seq 只反映写入次数，不参与状态比较
+        return tuple(name for name in self.__slots__ if name != "seq")
+
+    def to_model(self) -> AgentExecutionState:
+        return AgentExecutionState(
+            session_id=self.session_id,
+            status=self.status,
+            actions=[a.to_model() for a in self.actions],
+            final_reply=self.final_reply,
+            unread_channels=list(self.unread_channels),
+            version=self.version,
+        )
+
+
+class SessionSnapshot(_Record):
+    """会话在某一版本上的一致只读视图。
+
+    actions 为按查询条件选取的动作；messages 为按频道游标选取的消息（未请求时为 None）。
+    """
+
+    __slots__ = (
+        "session_id",
+        "status",
+        "actions",
+        "final_reply",
+        "unread_channels",
+        "version",
+        "messages",
+    )
+
+    def __init__(
+        self,
+        session_id: str,
+        status: SessionStatus,
+        actions: list[ActionRecord],
+        final_reply: str | None,
+        unread_channels: list[str],
+        version: int,
+        messages: dict[Channel, list[MessageRecord]] | None = None,
+    ):
+        self.session_id = session_id
+        self.status = status
+        self.actions = actions
+        self.final_reply = final_reply
+        self.unread_channels = unread_channels
+        self.version = version
+        self.messages = messages
+
+
+class HistoryRecord(_Record):
+    """历史执行记录（对应 ExecutionHistory）。actions 与会话共享动作记录。"""
+
+    __slots__ = ("execution_id", "trigger_message", "skill_name", "status", "actions", "ts_ns")
+
+    def __init__(
+        self,
+        execution_id: str,
+        trigger_message: str,
+        skill_name: str | None,
+        status: SessionStatus,
+        actions: list[ActionRecord],
+        ts_ns: int,
+    ):
+        self.execution_id = execution_id
+        self.trigger_message = trigger_message
+        self.skill_name = skill_name
+        self.status = status
+        self.actions = actions
+        self.ts_ns = ts_ns
+
+    @property
+    def created_at(self) -> datetime:
+        return ns_to_datetime(self.ts_ns)
+
+    def to_model(self) -> ExecutionHistory:
+        return ExecutionHistory(
+            execution_id=self.execution_id,
+            trigger_message=self.trigger_message,
+            skill_name=self.skill_name,
+            status=self.status,
+            actions=[a.to_model() for a in self.actions],
+            created_at=self.created_at,
+        )
+
+    @classmethod
+    def from_model(cls, model: ExecutionHistory) -> "HistoryRecord":
+        return cls(
+            model.execution_id,
+            model.trigger_message,
+            model.skill_name,
+            model.status,
+            [ActionRecord.from_model(a) for a in model.actions],
+            datetime_to_ns(model.created_at),
+        )
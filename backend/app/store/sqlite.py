@@ -0,0 +1,588 @@
+"""SQLite 持久化存储 — 与 MemoryStore 相同的 API，状态写入 SQLite（WAL 模式）。
+
+内存结构仍作为本进程会话的读缓存，热路径上的变更只记入写缓冲（同一动作的
+多次更新合并为一行），由后台线程按批次在单个事务中落盘。非本进程创建的会话
+（重启前的会话、其他 uvicorn worker 的会话）在数据库版本更新时重新加载。
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+from app.schemas.models import (
+    ActionStatus,
+    ActionType,
+    Channel,
+    ExecutionHistory,
+    SessionStatus,
+)
+from app.store.memory import (
+    SESSION_IDLE_TTL_SECONDS,
+    STORE_MEMORY_BUDGET_BYTES,
+    _FINISHED_STATUSES,
+    _INTERRUPTED_REPLY,
+    MemoryStore,
+)
+from app.store.records import (
+    ActionRecord,
+    HistoryRecord,
+    MessageRecord,
+    SessionRecord,
+    approx_size,
+)
+
+logger = logging.getLogger(__name__)
+
+# 数据库文件路径，":memory:" 为进程内数据库
+STORE_SQLITE_PATH = os.environ.get("STORE_SQLITE_PATH", "agent_store.db")
+# 后台刷盘间隔（毫秒）与触发立即刷盘的缓冲条数
+STORE_FLUSH_INTERVAL_MS = int(os.environ.get("STORE_FLUSH_INTERVAL_MS", "50"))
+STORE_FLUSH_BATCH_SIZE = int(os.environ.get("STORE_FLUSH_BATCH_SIZE", "200"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    final_reply TEXT,
+    unread_channels TEXT NOT NULL,
+    version INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS actions (
+    session_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    action_type TEXT NOT NULL,
+    title TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    status TEXT NOT NULL,
+    detail TEXT,
+    ts_ns INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    PRIMARY KEY (session_id, idx)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    sender TEXT NOT NULL,
+    content TEXT NOT NULL,
+    ts_ns INTEGER NOT NULL,
+    PRIMARY KEY (session_id, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_messages_channel ON messages (session_id, channel, id);
+CREATE TABLE IF NOT EXISTS history (
+    execution_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_created_at ON history (created_at);
+"""
+
+
+class SQLiteStore(MemoryStore):
+    """SQLite 持久化的 MemoryStore：写缓冲 + 后台批量刷盘。"""
+
+    def __init__(
+        self,
+        path: str = STORE_SQLITE_PATH,
+        flush_interval_ms: int = STORE_FLUSH_INTERVAL_MS,
+        flush_batch_size: int = STORE_FLUSH_BATCH_SIZE,
+        idle_ttl_seconds: float = SESSION_IDLE_TTL_SECONDS,
+        memory_budget_bytes: int = STORE_MEMORY_BUDGET_BYTES,
+    ):
+        super().__init__(
+            idle_ttl_seconds=idle_ttl_seconds, memory_budget_bytes=memory_budget_bytes
+        )
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._db_lock = threading.Lock()
+        self._abort_interrupted_runs()
+        # 串行化刷盘，保证批次按产生顺序提交
+        self._flush_lock = threading.Lock()
+
+        # 写缓冲：会话与动作按主键合并，消息和历史只追加
+        self._buffer_lock = threading.Lock()
+        self._dirty_sessions: set[str] = set()
+        self._dirty_actions: dict[tuple[str, int], ActionRecord] = {}
+        self._pending_messages: list[tuple[str, MessageRecord]] = []
+        self._pending_history: list[HistoryRecord] = []
+        self._pending_deletes: set[str] = set()
+        self._flush_batch_size = flush_batch_size
+        self._flushes = 0
+        self._flushed_rows = 0
+
+        # 本进程创建的会话以内存为准；其余会话从数据库加载
+        self._owned: set[str] = set()
+
+        self._flush_interval = flush_interval_ms / 1000
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._flusher = threading.Thread(
+            target=self._flush_loop, name="sqlite-store-flusher", daemon=True
+        )
+        self._flusher.start()
+
+    def _abort_interrupted_runs(self) -> None:
+        """启动时将库中未结束的会话标记为 error：执行中与排队中的任务已随上个进程丢失。
+
+        与事件日志回放后的处理一致（见 MemoryStore._abort_interrupted_runs）；
+        在单个事务中更新，版本号递增使其他 worker 的缓存副本重新加载。
+        """
+        finished = [status.value for status in _FINISHED_STATUSES]
+        with self._db_lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN")
+            try:
+                cur.execute(
+                    "UPDATE sessions SET status = ?, "
+                    "final_reply = COALESCE(final_reply, ?), version = version + 1 "
+                    f"WHERE status NOT IN ({', '.join('?' for _ in finished)})",
+                    (SessionStatus.error.value, _INTERRUPTED_REPLY, *finished),
+                )
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+        if cur.rowcount:
+            logger.warning("Marked %d interrupted session(s) as error", cur.rowcount)
+
+    # === 写缓冲 ===
+
+    def _pending_count(self) -> int:
+        return (
+            len(self._dirty_sessions)
+            + len(self._dirty_actions)
+            + len(self._pending_messages)
+            + len(self._pending_history)
+            + len(self._pending_deletes)
+        )
+
+    def _mark(self) -> None:
+        """缓冲达到批次大小时唤醒刷盘线程。调用方须持有 _buffer_lock。"""
+        if self._pending_count() >= self._flush_batch_size:
+            self._wakeup.set()
+
+    def _mark_session(self, session_id: str) -> None:
+        with self._buffer_lock:
+            self._dirty_sessions.add(session_id)
+            self._mark()
+
+    def _mark_action(self, session_id: str, action: ActionRecord) -> None:
+        with self._buffer_lock:
+            self._dirty_actions[(session_id, action.index)] = action
+            self._dirty_sessions.add(session_id)
+            self._mark()
+
+    def _flush_loop(self) -> None:
+        """后台刷盘线程：按间隔或缓冲满时刷盘。"""
+        while not self._closed:
+            self._wakeup.wait(self._flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("SQLite store flush failed")
+
+    def flush(self) -> None:
+        """将写缓冲在单个事务中落盘。"""
+        with self._flush_lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        with self._buffer_lock:
+            if not self._pending_count():
+                return
+            session_ids = self._dirty_sessions
+            actions = self._dirty_actions
+            messages = self._pending_messages
+            history = self._pending_history
+            deletes = self._pending_deletes
+            self._dirty_sessions = set()
+            self._dirty_actions = {}
+            self._pending_messages = []
+            self._pending_history = []
+            self._pending_deletes = set()
+
+        session_rows = [
+            self._read(
+                session,
+                lambda s: (
+                    s.session_id,
+                    s.status.value,
+                    s.final_reply,
+                    json.dumps(s.unread_channels),
+                    s.version,
+                ),
+            )
+            for sid in session_ids
+            if (session := self._sessions.get(sid)) is not None
+        ]
+        action_rows = [
+            (
+                sid,
+                a.index,
+                a.action_type.value,
+                a.title,
+                a.summary,
+                a.status.value,
+                json.dumps(a.detail, ensure_ascii=False, default=str)
+                if a.detail is not None
+                else None,
+                a.ts_ns,
+                a.version,
+            )
+            for (sid, _), a in actions.items()
+        ]
+        message_rows = [
+            (sid, m.id, m.channel.value, m.sender, m.content, m.ts_ns)
+            for sid, m in messages
+        ]
+        history_rows = [
+            (h.execution_id, h.created_at.isoformat(), h.to_model().model_dump_json())
+            for h in history
+        ]
+        delete_rows = [(sid,) for sid in deletes]
+
+        with self._db_lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN")
+            try:
+                cur.executemany(
+                    "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?)", session_rows
+                )
+                cur.executemany(
+                    "INSERT OR REPLACE INTO actions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    action_rows,
+                )
+                cur.executemany(
+                    "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?, ?)",
+                    message_rows,
+                )
+                cur.executemany(
+                    "INSERT OR REPLACE INTO history VALUES (?, ?, ?)", history_rows
+                )
+                for table in ("sessions", "actions", "messages"):
+                    cur.executemany(
+                        f"DELETE FROM {table} WHERE session_id = ?", delete_rows
+                    )
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+        self._flushes += 1
+        self._flushed_rows += (
+            len(session_rows)
+            + len(action_rows)
+            + len(message_rows)
+            + len(history_rows)
+            + len(delete_rows)
+        )
+
+    def close(self) -> None:
+        """停止刷盘线程，落盘剩余缓冲并关闭连接。"""
+        if self._closed:
+            return
+        self._closed = True
+        self._stop_sweeper()
+        self._wakeup.set()
+        self._flusher.join()
+        self.flush()
+        self._conn.close()
+
+    # === 从数据库加载 ===
+
+    def _load_session(self, session_id: str) -> SessionRecord | None:
+        """从数据库加载会话并替换内存缓存。会话不存在时返回 None。"""
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT status, final_reply, unread_channels, version "
+                "FROM sessions WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            action_rows = self._conn.execute(
+                "SELECT idx, action_type, title, summary, status, detail, ts_ns, version "
+                "FROM actions WHERE session_id = ? ORDER BY idx",
+                (session_id,),
+            ).fetchall()
+            message_rows = self._conn.execute(
+                "SELECT id, channel, sender, content, ts_ns "
+                "FROM messages WHERE session_id = ? ORDER BY id",
+                (session_id,),
+            ).fetchall()
+
+        actions = [
+            ActionRecord(
+                idx,
+                ActionType(action_type),
+                title,
+                summary,
+                ActionStatus(status),
+                json.loads(detail) if detail is not None else None,
+                ts_ns,
+                version,
+            )
+            for idx, action_type, title, summary, status, detail, ts_ns, version in action_rows
+        ]
+        session = SessionRecord(
+            session_id,
+            status=SessionStatus(row[0]),
+            actions=actions,
+            final_reply=row[1],
+            unread_channels=json.loads(row[2]),
+            version=row[3],
+        )
+        partitions: dict[Channel, list[MessageRecord]] = {c: [] for c in Channel}
+        for msg_id, channel, sender, content, ts_ns in message_rows:
+            partitions[Channel(channel)].append(
+                MessageRecord(msg_id, Channel(channel), sender, content, ts_ns)
+            )
+
+        with self._session_lock(session_id):
+            self._sessions[session_id] = session
+            self._messages[session_id] = partitions
+            self._message_counters[session_id] = message_rows[-1][0] if message_rows else 0
+            self._action_counters[session_id] = len(actions)
+            self._action_changes[session_id] = OrderedDict(
+                (a.index, a) for a in sorted(actions, key=lambda a: a.version)
+            )
+            self._last_active[session_id] = time.time_ns()
+            self._session_bytes[session_id] = (
+                approx_size(session)
+                + sum(approx_size(m) for partition in partitions.values() for m in partition)
+            )
+        return session
+
+    def _get_foreign_session(self, session_id: str) -> SessionRecord | None:
+        """获取非本进程创建的会话：数据库版本较新时重新加载，否则复用缓存。
+
+        本进程对缓存的修改使其版本领先于数据库，刷盘前不会被覆盖。已清除、
+        等待落盘删除的会话不再从数据库加载；数据库中已不存在的会话同时移出缓存。
+        """
+        with self._buffer_lock:
+            if session_id in self._pending_deletes:
+                return None
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT version FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        cached = self._sessions.get(session_id)
+        if row is None:
+            with self._buffer_lock:
+                pending = session_id in self._dirty_sessions
+            if pending:
+                return cached
+            if cached is not None:
+                # 已被其他 worker 删除：只移出本进程缓存，不再记录删除
+                super().clear_session(session_id)
+            return None
+        if cached is not None and cached.version >= row[0]:
+            return cached
+        return self._load_session(session_id)
+
+    # === 会话管理 ===
+
+    def create_session(self, session_id: str | None = None) -> SessionRecord:
+        session = super().create_session(session_id)
+        self._owned.add(session.session_id)
+        self._mark_session(session.session_id)
+        return session
+
+    def get_session(self, session_id: str | None = None) -> SessionRecord | None:
+        """本进程会话读内存；其他会话按数据库版本按需加载。"""
+        resolved = self._resolve_session_id(session_id)
+        if resolved is None:
+            return None
+        if resolved in self._owned:
+            return self._sessions.get(resolved)
+        return self._get_foreign_session(resolved)
+
+    def update_session_status(
+        self,
+        status: SessionStatus,
+        session_id: str | None = None,
+    ) -> None:
+        session = self._require_session(session_id)
+        super().update_session_status(status, session_id=session.session_id)
+        self._mark_session(session.session_id)
+
+    def set_final_reply(self, reply: str, session_id: str | None = None) -> None:
+        session = self._require_session(session_id)
+        super().set_final_reply(reply, session_id=session.session_id)
+        self._mark_session(session.session_id)
+
+    def end_run(self, session_id: str | None = None) -> None:
+        """执行结束时立即落盘，保证其他 worker 读到最终状态。"""
+        super().end_run(session_id)
+        self.flush()
+
+    # === 动作日志 ===
+
+    def add_action(
+        self,
+        action_type: ActionType,
+        title: str,
+        summary: str,
+        status: ActionStatus,
+        detail: dict | None = None,
+        session_id: str | None = None,
+    ) -> ActionRecord:
+        session = self._require_session(session_id)
+        action = super().add_action(
+            action_type, title, summary, status, detail, session_id=session.session_id
+        )
+        self._mark_action(session.session_id, action)
+        return action
+
+    def update_action_status(
+        self,
+        index: int,
+        status: ActionStatus,
+        detail: dict | None = None,
+        summary: str | None = None,
+        session_id: str | None = None,
+    ) -> None:
+        session = self._require_session(session_id)
+        super().update_action_status(
+            index, status, detail, summary, session_id=session.session_id
+        )
+        # 写时复制可能替换了动作对象，取更新后的实例
+        self._mark_action(session.session_id, session.actions[index])
+
+    # === 消息管理 ===
+
+    def add_message(
+        self,
+        channel: Channel,
+        sender: str,
+        content: str,
+        session_id: str | None = None,
+    ) -> MessageRecord:
+        session = self._require_session(session_id)
+        msg = super().add_message(channel, sender, content, session_id=session.session_id)
+        with self._buffer_lock:
+            self._pending_messages.append((session.session_id, msg))
+            self._dirty_sessions.add(session.session_id)
+            self._mark()
+        return msg
+
+    # === 未读频道 ===
+
+    def mark_channel_unread(self, channel: str, session_id: str | None = None) -> None:
+        session = self.get_session(session_id)
+        if session:
+            super().mark_channel_unread(channel, session_id=session.session_id)
+            self._mark_session(session.session_id)
+
+    def clear_channel_unread(self, channel: str, session_id: str | None = None) -> None:
+        session = self.get_session(session_id)
+        if session:
+            super().clear_channel_unread(channel, session_id=session.session_id)
+            self._mark_session(session.session_id)
+
+    # === 历史记录 ===
+
+    def save_execution_history(
+        self,
+        trigger_message: str,
+        skill_name: str | None = None,
+        session_id: str | None = None,
+    ) -> HistoryRecord:
+        history = super().save_execution_history(trigger_message, skill_name, session_id)
+        with self._buffer_lock:
+            self._pending_history.append(history)
+            self._mark()
+        return history
+
+    def get_history_list(self) -> list[HistoryRecord]:
+        """按 created_at 返回最近的历史记录（含重启前及其他 worker 的记录）。"""
+        self.flush()
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT data FROM history ORDER BY created_at DESC LIMIT ?",
+                (self._history.memory_size,),
+            ).fetchall()
+        return [
+            HistoryRecord.from_model(ExecutionHistory.model_validate_json(data))
+            for (data,) in reversed(rows)
+        ]
+
+    def get_history_detail(self, execution_id: str) -> HistoryRecord | None:
+        history = super().get_history_detail(execution_id)
+        if history is not None:
+            return history
+        self.flush()
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT data FROM history WHERE execution_id = ?", (execution_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return HistoryRecord.from_model(ExecutionHistory.model_validate_json(row[0]))
+
+    # === 会话重置 ===
+
+    def clear_session(self, session_id: str | None = None) -> None:
+        resolved = self._resolve_session_id(session_id)
+        if resolved is None:
+            return
+        super().clear_session(resolved)
+        self._owned.discard(resolved)
+        with self._buffer_lock:
+            # 丢弃该会话尚未落盘的写入，删除在下一批次中执行
+            self._dirty_sessions.discard(resolved)
+            self._dirty_actions = {
+                key: a for key, a in self._dirty_actions.items() if key[0] != resolved
+            }
+            self._pending_messages = [
+                (sid, m) for sid, m in self._pending_messages if sid != resolved
+            ]
+            self._pending_deletes.add(resolved)
+            self._mark()
+
+    # === 会话回收 ===
+
+    def _evict(
+        self,
+        session_id: str,
+        reason: str,
+        still_evictable: Callable[[SessionRecord], bool],
+    ) -> bool:
+        """回收只丢弃内存副本：数据库中的会话保留，之后按需重新加载。
+
+        持有会话锁期间先落盘（刷盘不取会话锁），保证该会话的写入全部落盘后再移出缓存；
+        不经 clear_session，不记录删除。
+        """
+        with self._session_lock(session_id):
+            session = self._sessions.get(session_id)
+            if (
+                session is None
+                or session.status not in _FINISHED_STATUSES
+                or not still_evictable(session)
+            ):
+                return False
+            self.flush()
+            MemoryStore.clear_session(self, session_id)
+            self._owned.discard(session_id)
+        self._evictions[reason] += 1
+        return True
+
+    # === 可观测性 ===
+
+    def storage_stats(self) -> dict:
+        """返回写缓冲与刷盘指标。"""
+        with self._buffer_lock:
+            pending = self._pending_count()
+        return {
+            "backend": "sqlite",
+            "pending_writes": pending,
+            "flushes": self._flushes,
+            "flushed_rows": self._flushed_rows,
+        }
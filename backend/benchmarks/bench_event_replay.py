@@ -0,0 +1,60 @@
+"""存储事件日志回放基准 — 数千次历史执行的全量回放与按类型过滤扫描耗时。
+
+    cd backend && python -m benchmarks.bench_event_replay
+"""
+
+import os
+import tempfile
+import time
+
+from app.schemas.models import ActionStatus, ActionType, Channel, SessionStatus
+from app.store.eventlog import EventKind, EventLog, iter_events
+from app.store.memory import MemoryStore
+
+EXECUTIONS = 5_000
+
+
+def _write_log(path: str) -> None:
+    store = MemoryStore(event_log=EventLog(path))
+    for i in range(EXECUTIONS):
+        sid = f"s{i}"
+        store.create_session(sid)
+        store.update_session_status(SessionStatus.running, session_id=sid)
+        store.add_message(Channel.chat, "user", f"订单 HT{i:08d} 提前离店", session_id=sid)
+        for step in range(4):
+            store.add_action(ActionType.tool_call, f"步骤{step}", "执行中", ActionStatus.running, session_id=sid)
+            store.update_action_status(
+                step, ActionStatus.success, detail={"order_id": f"HT{i:08d}"}, session_id=sid
+            )
+        store.set_final_reply("处理完成", session_id=sid)
+        store.update_session_status(SessionStatus.completed, session_id=sid)
+        store.save_execution_history(f"订单 HT{i:08d} 提前离店", session_id=sid)
+    store.close()
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "events.log")
+        _write_log(path)
+        size_mb = os.path.getsize(path) / 1e6
+
+        started = time.perf_counter()
+        total = sum(1 for _ in iter_events(path))
+        scan = time.perf_counter() - started
+
+        started = time.perf_counter()
+        saved = sum(1 for _ in iter_events(path, kinds={EventKind.HISTORY_SAVED}))
+        filtered = time.perf_counter() - started
+
+        started = time.perf_counter()
+        MemoryStore(event_log=EventLog(path)).close()
+        rebuild = time.perf_counter() - started
+
+        print(f"log: {EXECUTIONS} executions, {total} events, {size_mb:.1f} MB")
+        print(f"decode all events (mmap):       {scan * 1e3:8.1f} ms")
+        print(f"scan HISTORY_SAVED ({saved}):   {filtered * 1e3:8.1f} ms")
+        print(f"rebuild store (full replay):    {rebuild * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""执行历史快照微基准 — 深拷贝与共享冻结动作（写时复制）两种快照方式的耗时对比。
+
+    cd backend && python -m benchmarks.bench_history_snapshot
+
+模拟工具密集型会话：每条动作携带较大的 detail（工具返回数据）。
+"""
+
+import copy
+import timeit
+
+from app.schemas.models import ActionStatus, ActionType
+from app.store.history import HistoryStore
+from app.store.memory import MemoryStore
+
+SIZES = (10, 100, 1_000)
+
+
+def _detail(i: int) -> dict:
+    """构造与订单查询结果规模相当的 detail。"""
+    return {
+        "tool": "order_query",
+        "input": {"order_id": f"HT{20260301000 + i}"},
+        "output": {
+            "success": True,
+            "data": {
+                "order_id": f"HT{20260301000 + i}",
+                "supplier_order_id": f"SUP-{i:06d}",
+                "guest_name": "张三",
+                "room_type": "豪华大床房",
+                "nights": [{"date": f"2026-03-{d:02d}", "price": 688.0} for d in range(1, 8)],
+                "remarks": "客人要求高楼层，无烟房" * 5,
+            },
+        },
+    }
+
+
+def _build_store(size: int) -> MemoryStore:
+    store = MemoryStore()
+    # 只测快照本身，避免重复保存触发磁盘溢出
+    store._history = HistoryStore(memory_size=1_000_000)
+    store.create_session("bench")
+    for i in range(size):
+        store.add_action(
+            ActionType.tool_call, f"步骤 {i}", "完成", ActionStatus.success, detail=_detail(i)
+        )
+    return store
+
+
+def main() -> None:
+    print(f"{'actions':>8} | {'deepcopy (ms)':>14} | {'shared (ms)':>12} | {'speedup':>8}")
+    print("-" * 52)
+    for size in SIZES:
+        store = _build_store(size)
+        actions = store.get_session("bench").actions
+        number = max(1, 2_000 // size)
+
+        deep = min(timeit.repeat(lambda: copy.deepcopy(actions), number=number, repeat=3)) / number
+        shared = min(
+            timeit.repeat(
+                lambda: store.save_execution_history("bench", session_id="bench"),
+                number=number,
+                repeat=3,
+            )
+        ) / number
+        print(f"{size:>8} | {deep * 1e3:>14.3f} | {shared * 1e3:>12.3f} | {deep / shared:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
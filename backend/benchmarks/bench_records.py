@@ -0,0 +1,84 @@
+"""动作/消息记录微基准 — pydantic 模型与紧凑 __slots__ 记录的构造耗时与内存占用对比。
+
+    cd backend && python -m benchmarks.bench_records
+"""
+
+import time
+import timeit
+import tracemalloc
+from datetime import datetime
+
+from app.schemas.models import (
+    ActionLogEntry,
+    ActionStatus,
+    ActionType,
+    Channel,
+    ChannelMessage,
+)
+from app.store.records import ActionRecord, MessageRecord
+
+COUNT = 10_000
+
+
+def _pydantic_action(i: int) -> ActionLogEntry:
+    return ActionLogEntry(
+        index=i,
+        action_type=ActionType.tool_call,
+        title="调用工具",
+        summary=f"查询订单 HT{i}",
+        status=ActionStatus.success,
+        timestamp=datetime.now(),
+    )
+
+
+def _record_action(i: int) -> ActionRecord:
+    return ActionRecord(
+        i, ActionType.tool_call, "调用工具", f"查询订单 HT{i}", ActionStatus.success, None, time.time_ns()
+    )
+
+
+def _pydantic_message(i: int) -> ChannelMessage:
+    return ChannelMessage(
+        id=i,
+        channel=Channel.downstream,
+        sender="Agent",
+        content=f"订单 HT{i} 已取消",
+        timestamp=datetime.now(),
+    )
+
+
+def _record_message(i: int) -> MessageRecord:
+    return MessageRecord(i, Channel.downstream, "Agent", f"订单 HT{i} 已取消", time.time_ns())
+
+
+def _bytes_per_item(factory) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = [factory(i) for i in range(COUNT)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del items
+    return (after - before) / COUNT
+
+
+def _us_per_item(factory) -> float:
+    elapsed = min(
+        timeit.repeat(lambda: [factory(i) for i in range(COUNT)], number=1, repeat=5)
+    )
+    return elapsed / COUNT * 1e6
+
+
+def main() -> None:
+    print(f"{'kind':>18} | {'build (us)':>10} | {'bytes/item':>10}")
+    print("-" * 45)
+    for name, factory in (
+        ("ActionLogEntry", _pydantic_action),
+        ("ActionRecord", _record_action),
+        ("ChannelMessage", _pydantic_message),
+        ("MessageRecord", _record_message),
+    ):
+        print(f"{name:>18} | {_us_per_item(factory):>10.2f} | {_bytes_per_item(factory):>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
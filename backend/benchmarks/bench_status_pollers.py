@@ -0,0 +1,109 @@
+"""状态轮询吞吐基准 — 50 个并发轮询方请求同一会话的 GET /api/status（完整模式）。
+
+    cd backend && python -m benchmarks.bench_status_pollers
+
+进程内经 ASGI 直接调用应用（不含网络与 HTTP 解析开销），测量路由、快照与序列化成本。
+"静态" 场景会话不变；"写入中" 场景后台每 5ms 更新一次动作，版本号持续前进。
+
+"baseline" 为序列化缓存引入前的路径：每次请求读取快照、构造 StatusResponse 并经
+response_model 校验与默认编码器序列化；"fast" 为当前路由（缓存的 JSON 字节）。
+"""
+
+import asyncio
+import time
+
+import httpx
+from fastapi import Response
+
+from app.main import app
+from app.routers import status
+from app.routers.conditional import make_etag
+from app.schemas.models import ActionStatus, ActionType, StatusResponse
+from app.store.memory import MemoryStore
+
+POLLERS = 50
+DURATION_SECONDS = 3.0
+ACTIONS = 30
+
+
+def _build_store() -> MemoryStore:
+    store = MemoryStore()
+    store.create_session("bench")
+    for i in range(ACTIONS):
+        store.add_action(
+            ActionType.tool_call,
+            f"步骤 {i}",
+            "完成",
+            ActionStatus.success,
+            detail={"tool": "order_query", "output": {"order_id": f"HT{i:08d}", "nights": list(range(7))}},
+        )
+    return store
+
+
+# 基线路由挂在同一应用上（相同中间件与异常处理），只有路由实现不同
+BASELINE_PATH = "/bench/baseline-status"
+_baseline_store: MemoryStore | None = None
+
+
+@app.get(BASELINE_PATH + "/{session_id}", response_model=StatusResponse, include_in_schema=False)
+async def _baseline_status(session_id: str, response: Response) -> StatusResponse:
+    """缓存引入前的完整模式状态路由：快照 → 响应模型 → response_model 序列化。"""
+    snap = _baseline_store.snapshot(session_id)
+    response.headers["ETag"] = make_etag(session_id, snap.version)
+    return StatusResponse(
+        session_id=snap.session_id,
+        status=snap.status,
+        actions=[a.to_model() for a in snap.actions],
+        unread_channels=snap.unread_channels,
+        final_reply=snap.final_reply,
+        version=snap.version,
+    )
+
+
+async def _poller(client: httpx.AsyncClient, url: str, deadline: float) -> int:
+    count = 0
+    while time.perf_counter() < deadline:
+        response = await client.get(url)
+        assert response.status_code == 200
+        count += 1
+    return count
+
+
+async def _writer(store: MemoryStore, deadline: float) -> None:
+    i = 0
+    while time.perf_counter() < deadline:
+        store.update_action_status(i % ACTIONS, ActionStatus.success, summary=f"更新 {i}")
+        i += 1
+        await asyncio.sleep(0.005)
+
+
+async def _run(path: str, with_writer: bool) -> float:
+    global _baseline_store
+    store = _build_store()
+    status.store = _baseline_store = store
+    status.status_cache.clear()
+    url = f"{BASELINE_PATH}/bench" if path == "baseline" else "/api/status/bench"
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get(url)  # 预热
+        deadline = time.perf_counter() + DURATION_SECONDS
+        tasks = [_poller(client, url, deadline) for _ in range(POLLERS)]
+        if with_writer:
+            tasks.append(_writer(store, deadline))
+        started = time.perf_counter()
+        counts = await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+    return sum(c for c in counts if c) / elapsed
+
+
+def main() -> None:
+    print(f"{POLLERS} pollers, {ACTIONS} actions, {DURATION_SECONDS:.0f}s per scenario")
+    print(f"{'':>8}  {'baseline':>10}  {'fast':>10}")
+    for name, with_writer in (("static", False), ("writing", True)):
+        before = asyncio.run(_run("baseline", with_writer))
+        after = asyncio.run(_run("fast", with_writer))
+        print(f"{name:>8}: {before:>6.0f} req/s  {after:>6.0f} req/s  ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""MemoryStore 动作日志微基准 — update_action_status / get_actions 单次调用耗时随动作数量的变化。
+
+    cd backend && python -m benchmarks.bench_store_actions
+
+期望结果：各规模下单次调用耗时基本持平（与会话累计动作数无关）。
+"""
+
+import timeit
+
+from app.schemas.models import ActionStatus, ActionType
+from app.store.memory import MemoryStore
+
+SIZES = (100, 1_000, 10_000, 50_000)
+CALLS = 10_000
+
+
+def _build_store(size: int) -> MemoryStore:
+    """构造包含 size 条动作的会话。"""
+    store = MemoryStore()
+    store.create_session("bench")
+    for i in range(size):
+        store.add_action(ActionType.tool_call, f"步骤 {i}", "执行中", ActionStatus.running)
+    return store
+
+
+def _per_call_us(stmt, calls: int = CALLS) -> float:
+    """单次调用平均耗时（微秒），取 3 轮最优。"""
+    return min(timeit.repeat(stmt, number=calls, repeat=3)) / calls * 1e6
+
+
+def main() -> None:
+    print(f"{'actions':>8} | {'update tail (us)':>16} | {'update head (us)':>16} | {'get_actions tail-5 (us)':>23}")
+    print("-" * 72)
+    for size in SIZES:
+        store = _build_store(size)
+        update_tail = _per_call_us(
+            lambda: store.update_action_status(size - 1, ActionStatus.success)
+        )
+        update_head = _per_call_us(
+            lambda: store.update_action_status(0, ActionStatus.success)
+        )
+        poll_tail = _per_call_us(lambda: store.get_actions(after_index=size - 6))
+        print(f"{size:>8} | {update_tail:>16.2f} | {update_head:>16.2f} | {poll_tail:>23.2f}")
+
+
+if __name__ == "__main__":
+    main()
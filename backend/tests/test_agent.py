@@ -29,6 +29,20 @@ def fresh_store(monkeypatch):
     return new_store
 
 
+@pytest.fixture
+def llm_tool_chain(monkeypatch):
+    """关闭 Skill 静态计划执行，使匹配的 Skill 走 LLM 驱动的工具调用链。"""
+    monkeypatch.setattr("app.agent.engine.SKILL_PLAN_EXECUTION", False)
+
+
+@pytest.fixture(autouse=True)
+def _clear_intent_cache():
+    """每个测试前清空意图缓存，避免跨测试命中。"""
+    from app.agent.intent_cache import intent_cache
+
+    intent_cache.clear()
+
+
 # === Task 1: Skill 注册表测试 ===
 
 
@@ -139,18 +153,19 @@ class TestAgentGraphState:
 class TestIntentRecognitionNode:
     """测试意图识别节点。"""
 
-    def test_intent_recognition_success(self, fresh_store):
+    @pytest.mark.asyncio
+    async def test_intent_recognition_success(self, fresh_store):
         """成功识别意图时应返回 matched_intent 并记录 ActionLogEntry。"""
         from app.agent.engine import intent_recognition_node
 
-        fresh_store.create_session()
+        fresh_store.create_session("test-1")
 
         mock_response = MagicMock()
         mock_response.content = "early_checkout"
 
         with patch("app.agent.engine._llm") as mock_llm:
-            mock_llm.invoke.return_value = mock_response
-            result = intent_recognition_node(
+            mock_llm.ainvoke = AsyncMock(return_value=mock_response)
+            result = await intent_recognition_node(
                 {
                     "session_id": "test-1",
                     "trigger_message": "订单号 HT20260301001 的客人申请提前离店",
@@ -167,15 +182,16 @@ class TestIntentRecognitionNode:
         assert actions[0].status == ActionStatus.success
         assert actions[0].detail["intent"] == "early_checkout"
 
-    def test_intent_recognition_error(self, fresh_store):
+    @pytest.mark.asyncio
+    async def test_intent_recognition_error(self, fresh_store):
         """LLM 调用失败时应记录 error 状态。"""
         from app.agent.engine import intent_recognition_node
 
-        fresh_store.create_session()
+        fresh_store.create_session("test-1")
 
         with patch("app.agent.engine._llm") as mock_llm:
-            mock_llm.invoke.side_effect = Exception("API Error")
-            result = intent_recognition_node(
+            mock_llm.ainvoke = AsyncMock(side_effect=Exception("API Error"))
+            result = await intent_recognition_node(
                 {
                     "session_id": "test-1",
                     "trigger_message": "测试",
@@ -190,18 +206,19 @@ class TestIntentRecognitionNode:
         actions = fresh_store.get_actions()
         assert actions[0].status == ActionStatus.error
 
-    def test_intent_recognition_records_running_then_success(self, fresh_store):
+    @pytest.mark.asyncio
+    async def test_intent_recognition_records_running_then_success(self, fresh_store):
         """意图识别应先记录 running 状态，完成后更新为 success。"""
         from app.agent.engine import intent_recognition_node
 
-        fresh_store.create_session()
+        fresh_store.create_session("test-1")
 
         mock_response = MagicMock()
         mock_response.content = "early_checkout"
 
         with patch("app.agent.engine._llm") as mock_llm:
-            mock_llm.invoke.return_value = mock_response
-            intent_recognition_node(
+            mock_llm.ainvoke = AsyncMock(return_value=mock_response)
+            await intent_recognition_node(
                 {
                     "session_id": "test-1",
                     "trigger_message": "提前离店",
@@ -216,6 +233,102 @@ class TestIntentRecognitionNode:
         assert actions[0].status == ActionStatus.success
 
 
+    @pytest.mark.asyncio
+    async def test_intent_recognition_interleaves_llm_calls(self, fresh_store):
+        """多个会话的意图识别应并发等待 LLM，而不是串行阻塞。"""
+        import asyncio
+
+        from app.agent.engine import intent_recognition_node
+
+        in_flight = 0
+        peak = 0
+
+        async def slow_ainvoke(messages):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            response = MagicMock()
+            response.content = "early_checkout"
+            return response
+
+        states = []
+        for i in range(3):
+            session = fresh_store.create_session(f"test-{i}")
+            states.append(
+                {
+                    "session_id": session.session_id,
+                    "trigger_message": "客人想早点走",
+                    "matched_intent": None,
+                    "matched_skill": None,
+                    "error_message": None,
+                }
+            )
+
+        with patch("app.agent.engine._llm") as mock_llm:
+            mock_llm.ainvoke = slow_ainvoke
+            results = await asyncio.gather(
+                *[intent_recognition_node(st) for st in states]
+            )
+
+        assert peak == 3
+        assert all(r["matched_intent"] == "early_checkout" for r in results)
+
+
+    @pytest.mark.asyncio
+    async def test_intent_recognition_cache_hit_skips_llm(self, fresh_store):
+        """相同句式（订单号不同）第二次识别应命中缓存，不再调用 LLM。"""
+        from app.agent.engine import intent_recognition_node
+        from app.agent.intent_cache import intent_cache
+
+        mock_response = MagicMock()
+        mock_response.content = "early_checkout"
+
+        with patch("app.agent.engine._llm") as mock_llm:
+            mock_llm.ainvoke = AsyncMock(return_value=mock_response)
+            for sid, order_id in (("test-1", "HT20260301001"), ("test-2", "HT20260301002")):
+                fresh_store.create_session(sid)
+                result = await intent_recognition_node(
+                    {
+                        "session_id": sid,
+                        "trigger_message": f"订单 {order_id} 的客人想早点走",
+                        "matched_intent": None,
+                        "matched_skill": None,
+                        "error_message": None,
+                    }
+                )
+                assert result["matched_intent"] == "early_checkout"
+
+        assert mock_llm.ainvoke.await_count == 1
+        cached_action = fresh_store.get_actions(session_id="test-2")[0]
+        assert cached_action.action_type == ActionType.intent_recognition
+        assert cached_action.status == ActionStatus.success
+        assert cached_action.detail == {"intent": "early_checkout", "cached": True}
+        assert intent_cache.hits == 1
+        assert intent_cache.misses == 1
+
+    @pytest.mark.asyncio
+    async def test_intent_recognition_error_not_cached(self, fresh_store):
+        """LLM 调用失败时不写入缓存。"""
+        from app.agent.engine import intent_recognition_node
+        from app.agent.intent_cache import intent_cache
+
+        fresh_store.create_session("test-1")
+        with patch("app.agent.engine._llm") as mock_llm:
+            mock_llm.ainvoke = AsyncMock(side_effect=Exception("API Error"))
+            await intent_recognition_node(
+                {
+                    "session_id": "test-1",
+                    "trigger_message": "测试",
+                    "matched_intent": None,
+                    "matched_skill": None,
+                    "error_message": None,
+                }
+            )
+        assert intent_cache.stats()["size"] == 0
+
+
 # === Task 4: Skill 加载节点测试 ===
 
 
@@ -226,7 +339,7 @@ class TestSkillLoadingNode:
         """匹配到 Skill 时应返回 matched_skill 并记录成功。"""
         from app.agent.engine import skill_loading_node
 
-        fresh_store.create_session()
+        fresh_store.create_session("test-1")
         result = skill_loading_node(
             {
                 "session_id": "test-1",
@@ -248,7 +361,7 @@ class TestSkillLoadingNode:
         """未匹配到 Skill 时应返回 None 并设置友好回复。"""
         from app.agent.engine import skill_loading_node
 
-        fresh_store.create_session()
+        fresh_store.create_session("test-1")
         result = skill_loading_node(
             {
                 "session_id": "test-1",
@@ -276,7 +389,7 @@ class TestSkillLoadingNode:
         """intent 为 None 时应视为未匹配。"""
         from app.agent.engine import skill_loading_node
 
-        fresh_store.create_session()
+        fresh_store.create_session("test-1")
         result = skill_loading_node(
             {
                 "session_id": "test-1",
@@ -300,7 +413,7 @@ class TestCompletionNode:
         """无错误时应设置 completed 状态并记录成功。"""
         from app.agent.engine import completion_node
 
-        fresh_store.create_session()
+        fresh_store.create_session("test-1")
         completion_node(
             {
                 "session_id": "test-1",
@@ -321,7 +434,7 @@ class TestCompletionNode:
         """有错误时应设置 error 状态。"""
         from app.agent.engine import completion_node
 
-        fresh_store.create_session()
+        fresh_store.create_session("test-1")
         completion_node(
             {
                 "session_id": "test-1",
@@ -341,7 +454,7 @@ class TestCompletionNode:
         """完成节点应保存执行历史。"""
         from app.agent.engine import completion_node
 
-        fresh_store.create_session()
+        fresh_store.create_session("test-1")
         completion_node(
             {
                 "session_id": "test-1",
@@ -361,7 +474,7 @@ class TestCompletionNode:
         """未匹配 Skill 时历史记录的 skill_name 应为 None。"""
         from app.agent.engine import completion_node
 
-        fresh_store.create_session()
+        fresh_store.create_session("test-1")
         completion_node(
             {
                 "session_id": "test-1",
@@ -382,7 +495,7 @@ class TestCompletionNode:
 class TestRouting:
     """测试条件路由逻辑。"""
 
-    def test_route_to_tool_chain_when_skill_matched(self):
+    def test_route_to_tool_chain_when_skill_matched(self, llm_tool_chain):
         """匹配到 Skill 时应路由到 tool_chain_execution。"""
         from app.agent.engine import _route_after_skill_loading
 
@@ -397,6 +510,21 @@ class TestRouting:
         )
         assert result == "tool_chain_execution"
 
+    def test_route_to_plan_execution_when_skill_has_plan(self):
+        """匹配的 Skill 声明了静态计划时应路由到 plan_execution。"""
+        from app.agent.engine import _route_after_skill_loading
+
+        result = _route_after_skill_loading(
+            {
+                "session_id": "test",
+                "trigger_message": "test",
+                "matched_intent": "early_checkout",
+                "matched_skill": "early_checkout",
+                "error_message": None,
+            }
+        )
+        assert result == "plan_execution"
+
     def test_route_to_completion_when_no_skill(self):
         """未匹配 Skill 时应路由到 completion。"""
         from app.agent.engine import _route_after_skill_loading
@@ -424,7 +552,7 @@ class TestRunAgent:
         """run_agent 应将会话状态设为 running。"""
         from app.agent.engine import run_agent
 
-        fresh_store.create_session()
+        fresh_store.create_session("test-session")
 
         # Mock 整个图执行
         with patch("app.agent.engine._graph") as mock_graph:
@@ -441,7 +569,7 @@ class TestRunAgent:
         """run_agent 应在 chat 频道记录用户消息。"""
         from app.agent.engine import run_agent
 
-        fresh_store.create_session()
+        fresh_store.create_session("test-session")
 
         with patch("app.agent.engine._graph") as mock_graph:
             mock_graph.ainvoke = AsyncMock(return_value={})
@@ -457,7 +585,7 @@ class TestRunAgent:
         """run_agent 应捕获未处理异常并设置 error 状态。"""
         from app.agent.engine import run_agent
 
-        fresh_store.create_session()
+        fresh_store.create_session("test-session")
 
         with patch("app.agent.engine._graph") as mock_graph:
             mock_graph.ainvoke = AsyncMock(side_effect=Exception("Unexpected"))
@@ -467,10 +595,29 @@ class TestRunAgent:
         assert session.status == SessionStatus.error
         assert "系统错误" in session.final_reply
 
+    @pytest.mark.asyncio
+    async def test_run_agent_session_cleared_while_queued(self, fresh_store):
+        """排队期间会话被清除时不执行图，且复位上下文会话并结束本轮执行。"""
+        from app.agent.engine import run_agent
+        from app.store.memory import current_session_id
+
+        with (
+            patch("app.agent.engine._graph") as mock_graph,
+            patch.object(fresh_store, "end_run") as end_run,
+        ):
+            mock_graph.ainvoke = AsyncMock(return_value={})
+            await run_agent("gone-session", "测试")
+
+        mock_graph.ainvoke.assert_not_called()
+        end_run.assert_called_once_with(session_id="gone-session")
+        assert current_session_id.get() is None
+        assert fresh_store.get_session("gone-session") is None
+
 
 # === Task 9: 端到端集成测试 ===
 
 
+@pytest.mark.usefixtures("llm_tool_chain")
 class TestEndToEndIntegration:
     """端到端集成测试 — mock LLM 跑完提前离店完整流程。"""
 
@@ -479,7 +626,7 @@ class TestEndToEndIntegration:
         """完整提前离店流程：意图识别 → Skill 加载 → 工具调用链 → 完成。"""
         from app.agent.engine import run_agent
 
-        fresh_store.create_session()
+        fresh_store.create_session("test-session")
 
         # 构建 mock LLM 响应序列
         # 第 1 次调用：意图识别
@@ -544,7 +691,7 @@ class TestEndToEndIntegration:
         # 设置 mock LLM 调用序列
         call_count = 0
 
-        def mock_invoke(messages):
+        async def mock_invoke(messages):
             nonlocal call_count
             call_count += 1
             if call_count == 1:
@@ -561,11 +708,11 @@ class TestEndToEndIntegration:
                 return final_response
 
         mock_llm = MagicMock()
-        mock_llm.invoke = mock_invoke
+        mock_llm.ainvoke = mock_invoke
         mock_llm.bind_tools = MagicMock(return_value=mock_llm)
 
         with patch("app.agent.engine._llm", mock_llm):
-            await run_agent("test-session", "订单号 HT20260301001 的客人申请提前离店")
+            await run_agent("test-session", "订单号 HT20260301001 的客人想早点走")
 
         # 验证会话状态
         session = fresh_store.get_session()
@@ -603,18 +750,49 @@ class TestEndToEndIntegration:
         assert len(history) == 1
         assert history[0].skill_name == "提前离店"
 
+    @pytest.mark.asyncio
+    async def test_rule_matched_intent_skips_intent_llm(self, fresh_store):
+        """消息命中唯一 Skill 规则时，不调用 LLM 做意图识别，直接进入工具调用链。"""
+        from app.agent.engine import run_agent
+
+        fresh_store.create_session("test-session")
+
+        final_response = MagicMock()
+        final_response.content = "处理完成"
+        final_response.tool_calls = []
+        captured = []
+
+        async def mock_invoke(messages):
+            captured.append(messages)
+            return final_response
+
+        mock_llm = MagicMock()
+        mock_llm.ainvoke = mock_invoke
+        mock_llm.bind_tools = MagicMock(return_value=mock_llm)
+
+        with patch("app.agent.engine._llm", mock_llm):
+            await run_agent("test-session", "订单号 HT20260301001 的客人申请提前离店")
+
+        # 唯一一次 LLM 调用来自工具调用链（系统提示为 Skill 内容）
+        assert len(captured) == 1
+        assert "处理流程" in captured[0][0].content
+        intent_action = fresh_store.get_actions()[0]
+        assert intent_action.action_type == ActionType.intent_recognition
+        assert intent_action.detail == {"intent": "early_checkout", "rule_matched": True}
+        assert fresh_store.get_session().status == SessionStatus.completed
+
     @pytest.mark.asyncio
     async def test_unmatched_intent_flow(self, fresh_store):
         """未匹配意图时应直接完成并返回友好提示。"""
         from app.agent.engine import run_agent
 
-        fresh_store.create_session()
+        fresh_store.create_session("test-session")
 
         mock_response = MagicMock()
         mock_response.content = "unknown"
 
         mock_llm = MagicMock()
-        mock_llm.invoke = MagicMock(return_value=mock_response)
+        mock_llm.ainvoke = AsyncMock(return_value=mock_response)
 
         with patch("app.agent.engine._llm", mock_llm):
             await run_agent("test-session", "今天天气怎么样")
@@ -639,7 +817,7 @@ class TestEndToEndIntegration:
         """工具调用返回错误时应优雅终止流程（FR33）。"""
         from app.agent.engine import run_agent
 
-        fresh_store.create_session()
+        fresh_store.create_session("test-session")
 
         # 意图识别返回 early_checkout
         intent_response = MagicMock()
@@ -658,7 +836,7 @@ class TestEndToEndIntegration:
 
         call_count = 0
 
-        def mock_invoke(messages):
+        async def mock_invoke(messages):
             nonlocal call_count
             call_count += 1
             if call_count == 1:
@@ -667,11 +845,11 @@ class TestEndToEndIntegration:
                 return tool_call_1
 
         mock_llm = MagicMock()
-        mock_llm.invoke = mock_invoke
+        mock_llm.ainvoke = mock_invoke
         mock_llm.bind_tools = MagicMock(return_value=mock_llm)
 
         with patch("app.agent.engine._llm", mock_llm):
-            await run_agent("test-session", "订单号 INVALID_ORDER 提前离店")
+            await run_agent("test-session", "订单号 INVALID_ORDER 的客人想早点走")
 
         session = fresh_store.get_session()
         assert session.status == SessionStatus.error
@@ -710,11 +888,11 @@ class TestCodeReviewFixes:
         assert MAX_TOOL_ITERATIONS > 0
 
     @pytest.mark.asyncio
-    async def test_h2_tool_chain_respects_max_iterations(self, fresh_store):
+    async def test_h2_tool_chain_respects_max_iterations(self, fresh_store, llm_tool_chain):
         """[H2] 工具调用链应在超过最大迭代次数时优雅终止。"""
         from app.agent.engine import MAX_TOOL_ITERATIONS, run_agent
 
-        fresh_store.create_session()
+        fresh_store.create_session("test-session")
 
         # 意图识别返回 early_checkout
         intent_response = MagicMock()
@@ -733,7 +911,7 @@ class TestCodeReviewFixes:
 
         call_count = 0
 
-        def mock_invoke(messages):
+        async def mock_invoke(messages):
             nonlocal call_count
             call_count += 1
             if call_count == 1:
@@ -741,11 +919,11 @@ class TestCodeReviewFixes:
             return infinite_tool_call
 
         mock_llm = MagicMock()
-        mock_llm.invoke = mock_invoke
+        mock_llm.ainvoke = mock_invoke
         mock_llm.bind_tools = MagicMock(return_value=mock_llm)
 
         with patch("app.agent.engine._llm", mock_llm):
-            await run_agent("test-session", "提前离店 HT20260301001")
+            await run_agent("test-session", "HT20260301001 的客人想早点走")
 
         session = fresh_store.get_session()
         assert session.status == SessionStatus.error
@@ -756,7 +934,7 @@ class TestCodeReviewFixes:
         """[H3] 上游回复应注入 LLM 消息历史。"""
         from app.agent.engine import tool_chain_execution_node
 
-        fresh_store.create_session()
+        fresh_store.create_session("test-1")
 
         # 模拟 order_query → message_send(upstream) → refund → message_send(downstream) → 完成
         tool_call_order_query = MagicMock()
@@ -790,7 +968,7 @@ class TestCodeReviewFixes:
         call_count = 0
         captured_messages = []
 
-        def mock_invoke(messages):
+        async def mock_invoke(messages):
             nonlocal call_count
             call_count += 1
             # 捕获传给 LLM 的 messages 以验证上游回复是否被注入
@@ -807,11 +985,11 @@ class TestCodeReviewFixes:
                 return final_resp
 
         mock_llm = MagicMock()
-        mock_llm.invoke = mock_invoke
+        mock_llm.ainvoke = mock_invoke
         mock_llm.bind_tools = MagicMock(return_value=mock_llm)
 
         with patch("app.agent.engine._llm", mock_llm):
-            tool_chain_execution_node(
+            await tool_chain_execution_node(
                 {
                     "session_id": "test-1",
                     "trigger_message": "提前离店 HT20260301001",
@@ -832,7 +1010,7 @@ class TestCodeReviewFixes:
         """[M2] 未匹配意图时 Agent 回复应同时写入 chat 频道和 final_reply。"""
         from app.agent.engine import skill_loading_node
 
-        fresh_store.create_session()
+        fresh_store.create_session("test-1")
         skill_loading_node(
             {
                 "session_id": "test-1",
@@ -848,3 +1026,291 @@ class TestCodeReviewFixes:
         chat_msgs = fresh_store.get_messages(Channel.chat)
         assert len(chat_msgs) == 1
         assert chat_msgs[0].content == session.final_reply
+
+
+# === 工具 schema 绑定缓存测试 ===
+
+
+class TestToolBindingCache:
+    """测试绑定工具后的 LLM 按工具注册表版本缓存。"""
+
+    def test_bind_tools_built_once_per_registry_version(self):
+        """多次获取只构建一次；注册新工具后重建。"""
+        from app.agent import tools as tools_mod
+        from app.agent.engine import _get_llm_with_tools, get_tool_binding_stats
+
+        mock_llm = MagicMock()
+        mock_llm.bind_tools = MagicMock(return_value="bound-v1")
+
+        with patch("app.agent.engine._llm", mock_llm):
+            builds_before = get_tool_binding_stats()["builds"]
+            assert _get_llm_with_tools() == "bound-v1"
+            assert _get_llm_with_tools() == "bound-v1"
+            assert mock_llm.bind_tools.call_count == 1
+
+            # 重新注册同名工具 → 版本号递增 → 重建
+            tools_mod.register_tool(tools_mod.get_tool("order_query"))
+            mock_llm.bind_tools.return_value = "bound-v2"
+            assert _get_llm_with_tools() == "bound-v2"
+            assert mock_llm.bind_tools.call_count == 2
+
+        stats = get_tool_binding_stats()
+        assert stats["builds"] == builds_before + 2
+        assert stats["registry_version"] == tools_mod.get_registry_version()
+        assert stats["last_build_ms"] is not None
+
+
+# === 并发工具调用测试 ===
+
+
+class TestParallelToolCalls:
+    """测试同一轮多个并发安全工具调用的并发执行。"""
+
+    def test_plan_tool_batches_groups_parallel_safe_tools(self):
+        """相邻的并发安全工具合并为一批，其余工具单独成批。"""
+        from app.agent.engine import _plan_tool_batches
+
+        calls = [
+            {"name": "order_query", "args": {}, "id": "1"},
+            {"name": "order_query", "args": {}, "id": "2"},
+            {"name": "message_send", "args": {}, "id": "3"},
+            {"name": "order_query", "args": {}, "id": "4"},
+        ]
+        batches = _plan_tool_batches(calls)
+        assert [([c["id"] for c in b], p) for b, p in batches] == [
+            (["1", "2"], True),
+            (["3"], False),
+            (["4"], True),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_parallel_tool_calls_keep_deterministic_order(self, fresh_store):
+        """并发执行的工具调用，动作 index 与 ToolMessage 顺序仍与 tool_calls 一致。"""
+        import threading
+        import time
+
+        from app.agent.engine import tool_chain_execution_node
+        from app.agent.tools.order_query import OrderQueryTool
+
+        fresh_store.create_session("test-1")
+        order_ids = ["HT20260301003", "HT20260301001", "HT20260301002"]
+
+        multi_call = MagicMock()
+        multi_call.content = ""
+        multi_call.tool_calls = [
+            {"name": "order_query", "args": {"order_id": oid}, "id": f"c{i}"}
+            for i, oid in enumerate(order_ids)
+        ]
+        final_resp = MagicMock()
+        final_resp.content = "查询完成"
+        final_resp.tool_calls = []
+
+        captured = []
+
+        async def mock_invoke(messages):
+            captured.append(list(messages))
+            return multi_call if len(captured) == 1 else final_resp
+
+        mock_llm = MagicMock()
+        mock_llm.ainvoke = mock_invoke
+        mock_llm.bind_tools = MagicMock(return_value=mock_llm)
+
+        lock = threading.Lock()
+        active = 0
+        peak = 0
+        original_execute = OrderQueryTool.execute
+
+        def slow_execute(self, **kwargs):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            # 让先提交的调用更晚完成，验证结果顺序不受完成顺序影响
+            time.sleep(0.03 if kwargs["order_id"] == order_ids[0] else 0.01)
+            with lock:
+                active -= 1
+            return original_execute(self, **kwargs)
+
+        with patch("app.agent.engine._llm", mock_llm), patch.object(
+            OrderQueryTool, "execute", slow_execute
+        ):
+            await tool_chain_execution_node(
+                {
+                    "session_id": "test-1",
+                    "trigger_message": "查询订单",
+                    "matched_intent": "early_checkout",
+                    "matched_skill": "early_checkout",
+                    "error_message": None,
+                }
+            )
+
+        assert peak > 1
+        actions = fresh_store.get_actions(session_id="test-1")
+        assert [a.index for a in actions] == [0, 1, 2]
+        assert [a.detail["input"]["order_id"] for a in actions] == order_ids
+        assert all(a.status == ActionStatus.success for a in actions)
+        tool_messages = [m for m in captured[1] if m.__class__.__name__ == "ToolMessage"]
+        assert [m.tool_call_id for m in tool_messages] == ["c0", "c1", "c2"]
+        assert [json.loads(m.content)["data"]["order_id"] for m in tool_messages] == order_ids
+
+    @pytest.mark.asyncio
+    async def test_parallel_batch_error_finalizes_all_actions(self, fresh_store):
+        """并发批次中有调用失败时，所有动作都落定状态并终止流程。"""
+        from app.agent.engine import tool_chain_execution_node
+
+        fresh_store.create_session("test-1")
+        multi_call = MagicMock()
+        multi_call.content = ""
+        multi_call.tool_calls = [
+            {"name": "order_query", "args": {"order_id": "INVALID"}, "id": "c0"},
+            {"name": "order_query", "args": {"order_id": "HT20260301001"}, "id": "c1"},
+        ]
+        mock_llm = MagicMock()
+        mock_llm.ainvoke = AsyncMock(return_value=multi_call)
+        mock_llm.bind_tools = MagicMock(return_value=mock_llm)
+
+        with patch("app.agent.engine._llm", mock_llm):
+            result = await tool_chain_execution_node(
+                {
+                    "session_id": "test-1",
+                    "trigger_message": "查询订单",
+                    "matched_intent": "early_checkout",
+                    "matched_skill": "early_checkout",
+                    "error_message": None,
+                }
+            )
+
+        assert result["error_message"] == "订单不存在"
+        statuses = [a.status for a in fresh_store.get_actions(session_id="test-1")]
+        assert statuses == [ActionStatus.error, ActionStatus.success]
+        assert "订单不存在" in fresh_store.get_session("test-1").final_reply
+
+
+# === Skill 静态计划执行测试 ===
+
+
+def _plan_llm(extraction: str, final_reply: str = "您的请求已处理完成。"):
+    """构造计划执行用 mock LLM：第 1 次返回参数 JSON，之后返回最终回复。"""
+    captured = []
+
+    async def mock_invoke(messages):
+        captured.append(messages)
+        response = MagicMock()
+        response.tool_calls = []
+        response.content = extraction if len(captured) == 1 else final_reply
+        return response
+
+    mock_llm = MagicMock()
+    mock_llm.ainvoke = mock_invoke
+    mock_llm.bind_tools = MagicMock(return_value=mock_llm)
+    return mock_llm, captured
+
+
+@pytest.mark.usefixtures("_restore_orders")
+class TestPlanExecution:
+    """测试 Skill 静态计划：LLM 仅用于参数提取和最终回复。"""
+
+    @pytest.fixture
+    def _restore_orders(self):
+        from app.mock.data import MOCK_ORDERS
+
+        original = {oid: o["status"] for oid, o in MOCK_ORDERS.items()}
+        yield
+        for oid, status in original.items():
+            MOCK_ORDERS[oid]["status"] = status
+
+    @pytest.mark.asyncio
+    async def test_early_checkout_plan_uses_two_llm_calls(self, fresh_store):
+        """提前离店按计划执行：参数提取 + 最终回复共 2 次 LLM 调用。"""
+        from app.agent.engine import run_agent
+
+        fresh_store.create_session("test-session")
+        mock_llm, captured = _plan_llm(
+            '```json\n{"order_id": "HT20260301001", "request": "提前离店"}\n```'
+        )
+
+        with patch("app.agent.engine._llm", mock_llm):
+            await run_agent("test-session", "订单号 HT20260301001 的客人申请提前离店")
+
+        assert len(captured) == 2
+        mock_llm.bind_tools.assert_not_called()
+
+        session = fresh_store.get_session()
+        assert session.status == SessionStatus.completed
+        assert session.final_reply == "您的请求已处理完成。"
+
+        tool_actions = [a for a in fresh_store.get_actions() if a.action_type == ActionType.tool_call]
+        assert [a.title for a in tool_actions] == [
+            "调用工具：order_query",
+            "调用工具：message_send",
+            "调用工具：refund",
+            "调用工具：message_send",
+        ]
+        assert all(a.status == ActionStatus.success for a in tool_actions)
+        # 参数从前序工具输出获取：order_query → supplier_order_id → refund
+        assert tool_actions[2].detail["input"] == {
+            "order_id": "HT20260301001",
+            "supplier_order_id": "SUP-88901",
+        }
+        action_types = [a.action_type for a in fresh_store.get_actions()]
+        assert ActionType.waiting in action_types
+
+        upstream = fresh_store.get_messages(Channel.upstream)
+        assert "SUP-88901" in upstream[0].content
+        assert upstream[1].sender == "supplier"
+        downstream = fresh_store.get_messages(Channel.downstream)
+        assert "HT20260301001" in downstream[0].content
+
+    @pytest.mark.asyncio
+    async def test_plan_tool_error_terminates(self, fresh_store):
+        """计划中工具返回错误时优雅终止（FR33）。"""
+        from app.agent.engine import run_agent
+
+        fresh_store.create_session("test-session")
+        mock_llm, captured = _plan_llm('{"order_id": "INVALID", "request": "提前离店"}')
+
+        with patch("app.agent.engine._llm", mock_llm):
+            await run_agent("test-session", "订单号 INVALID 的客人申请提前离店")
+
+        session = fresh_store.get_session()
+        assert session.status == SessionStatus.error
+        assert "订单不存在" in session.final_reply
+        # 失败后不再调用 LLM 生成最终回复
+        assert len(captured) == 1
+
+    @pytest.mark.asyncio
+    async def test_extraction_failure_falls_back_to_tool_chain(self, fresh_store):
+        """参数提取失败时回退到 LLM 驱动的工具调用链。"""
+        from app.agent.engine import run_agent
+
+        fresh_store.create_session("test-session")
+        mock_llm, captured = _plan_llm('{"order_id": null}', final_reply="无法识别订单号")
+
+        with patch("app.agent.engine._llm", mock_llm):
+            await run_agent("test-session", "客人申请提前离店")
+
+        # 第 2 次调用来自工具调用链（已绑定工具，系统提示为 Skill 内容）
+        assert len(captured) == 2
+        mock_llm.bind_tools.assert_called_once()
+        assert "处理流程" in captured[1][0].content
+        session = fresh_store.get_session()
+        assert session.status == SessionStatus.completed
+        assert session.final_reply == "无法识别订单号"
+
+    @pytest.mark.asyncio
+    async def test_order_cancel_plan(self, fresh_store):
+        """订单取消计划：取消订单并通知下游。"""
+        from app.agent.engine import run_agent
+        from app.mock.data import MOCK_ORDERS
+
+        fresh_store.create_session("test-session")
+        mock_llm, captured = _plan_llm('{"order_id": "HT20260301002"}')
+
+        with patch("app.agent.engine._llm", mock_llm):
+            await run_agent("test-session", "请帮我取消订单 HT20260301002")
+
+        assert len(captured) == 2
+        assert MOCK_ORDERS["HT20260301002"]["status"] == "cancelled"
+        downstream = fresh_store.get_messages(Channel.downstream)
+        assert downstream[0].content == "订单 HT20260301002 已成功取消"
+        assert fresh_store.get_session().status == SessionStatus.completed
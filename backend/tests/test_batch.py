@@ -0,0 +1,135 @@
+"""批量对话投递测试 — 批次并发上限、队列满退避、批次淘汰与停止。"""
+
+import asyncio
+
+import pytest
+
+from app.agent.batch import BatchScheduler
+from app.agent.runner import AgentRunner
+
+
+async def _wait_fed(batch, timeout: float = 2.0) -> None:
+    """等待批次投递协程结束。"""
+    await asyncio.wait_for(asyncio.shield(batch.task), timeout)
+
+
+class TestBatchScheduler:
+    @pytest.mark.asyncio
+    async def test_all_messages_run_in_order(self):
+        """批次内每条消息按顺序交给工作池，与会话一一对应。"""
+        runner = AgentRunner(workers=1, queue_size=10)
+        scheduler = BatchScheduler(runner=runner)
+        done = []
+
+        async def run(session_id, message):
+            done.append((session_id, message))
+
+        batch = scheduler.submit(run, ["s1", "s2", "s3"], ["a", "b", "c"], concurrency=3)
+        await _wait_fed(batch)
+        await runner.join()
+        assert done == [("s1", "a"), ("s2", "b"), ("s3", "c")]
+        assert batch.submitted == 3
+        assert batch.fully_submitted
+        await runner.stop()
+
+    @pytest.mark.asyncio
+    async def test_concurrency_bounded_per_batch(self):
+        """工作池 worker 充足时，同一批次同时执行的任务数仍不超过批次上限。"""
+        runner = AgentRunner(workers=8, queue_size=50)
+        scheduler = BatchScheduler(runner=runner)
+        active = 0
+        peak = 0
+
+        async def run(session_id, message):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+        ids = [f"s{i}" for i in range(10)]
+        batch = scheduler.submit(run, ids, ["m"] * 10, concurrency=2)
+        await _wait_fed(batch)
+        await runner.join()
+        assert peak == 2
+        assert batch.submitted == 10
+        await runner.stop()
+
+    @pytest.mark.asyncio
+    async def test_queue_full_retries_instead_of_failing(self, monkeypatch):
+        """工作池队列已满时投递协程退避重试，最终全部执行。"""
+        monkeypatch.setattr("app.agent.batch._QUEUE_FULL_BACKOFF_SECONDS", 0.01)
+        runner = AgentRunner(workers=1, queue_size=1)
+        scheduler = BatchScheduler(runner=runner)
+        done = []
+
+        async def run(session_id, message):
+            await asyncio.sleep(0.01)
+            done.append(session_id)
+
+        # 占满工作池：一个执行中、一个排队
+        runner.submit(run, "busy-1", "x")
+        await asyncio.sleep(0)
+        runner.submit(run, "busy-2", "x")
+        batch = scheduler.submit(run, ["s1", "s2"], ["a", "b"], concurrency=2)
+        await _wait_fed(batch, timeout=10.0)
+        await runner.join()
+        assert sorted(done) == ["busy-1", "busy-2", "s1", "s2"]
+        assert scheduler.stats()["queue_full_retries"] > 0
+        await runner.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_run_releases_slot(self):
+        """任务抛出异常时释放批次并发名额，后续任务继续投递。"""
+        runner = AgentRunner(workers=1, queue_size=10)
+        scheduler = BatchScheduler(runner=runner)
+        done = []
+
+        async def run(session_id, message):
+            if session_id == "s1":
+                raise RuntimeError("boom")
+            done.append(session_id)
+
+        batch = scheduler.submit(run, ["s1", "s2"], ["a", "b"], concurrency=1)
+        await _wait_fed(batch)
+        await runner.join()
+        assert done == ["s2"]
+        await runner.stop()
+
+    @pytest.mark.asyncio
+    async def test_trim_keeps_recent_batches(self):
+        """超出保留数量时淘汰最早的已投递完成批次。"""
+        runner = AgentRunner(workers=1, queue_size=10)
+        scheduler = BatchScheduler(runner=runner, max_batches=1)
+
+        async def run(session_id, message):
+            pass
+
+        first = scheduler.submit(run, ["s1"], ["a"])
+        await _wait_fed(first)
+        second = scheduler.submit(run, ["s2"], ["b"])
+        assert scheduler.get(first.batch_id) is None
+        assert scheduler.get(second.batch_id) is second
+        await _wait_fed(second)
+        await runner.join()
+        await runner.stop()
+
+    @pytest.mark.asyncio
+    async def test_stop_cancels_feeding(self):
+        """stop 取消仍在投递中的批次。"""
+        runner = AgentRunner(workers=1, queue_size=10)
+        scheduler = BatchScheduler(runner=runner)
+        release = asyncio.Event()
+
+        async def run(session_id, message):
+            await release.wait()
+
+        batch = scheduler.submit(run, ["s1", "s2", "s3"], ["a", "b", "c"], concurrency=1)
+        await asyncio.sleep(0.01)
+        assert scheduler.stats()["feeding"] == 1
+        await scheduler.stop()
+        assert batch.task.cancelled()
+        assert batch.submitted == 1
+        release.set()
+        await runner.join()
+        await runner.stop()
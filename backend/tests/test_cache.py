@@ -0,0 +1,44 @@
+"""TTL + LRU 缓存测试 — 命中计数、LRU 淘汰、TTL 过期、清空。"""
+
+from app.store.cache import TTLCache
+
+
+class TestTTLCache:
+    def test_miss_then_hit(self):
+        cache = TTLCache(maxsize=10, ttl_seconds=60)
+        assert cache.get("a") is None
+        cache.put("a", "x")
+        assert cache.get("a") == "x"
+        assert cache.stats()["hit_rate"] == 0.5
+
+    def test_lru_eviction(self):
+        cache = TTLCache(maxsize=2, ttl_seconds=60)
+        cache.put("a", "x")
+        cache.put("b", "y")
+        cache.get("a")  # a 变为最近使用
+        cache.put("c", "z")  # 淘汰 b
+        assert cache.get("b") is None
+        assert cache.get("a") == "x"
+        assert cache.get("c") == "z"
+        assert cache.evictions == 1
+
+    def test_ttl_expiry(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr("app.store.cache.time.monotonic", lambda: now[0])
+        cache = TTLCache(maxsize=10, ttl_seconds=5)
+        cache.put("a", "x")
+        now[0] += 4
+        assert cache.get("a") == "x"
+        now[0] += 2
+        assert cache.get("a") is None
+        assert cache.stats()["size"] == 0
+        assert cache.evictions == 1
+
+    def test_clear_resets_counters(self):
+        cache = TTLCache(maxsize=10, ttl_seconds=60)
+        cache.put("a", "x")
+        cache.get("a")
+        cache.clear()
+        assert cache.stats()["size"] == 0
+        assert cache.hits == 0
+        assert cache.misses == 0
@@ -0,0 +1,200 @@
+"""存储事件日志测试 — 帧编码、mmap 回放、崩溃恢复与物化视图一致性。"""
+
+import pytest
+
+from app.schemas.models import ActionStatus, ActionType, Channel, SessionStatus
+from app.store.eventlog import EventKind, EventLog, StoreEvent, iter_events
+from app.store.history import HistoryStore
+from app.store.memory import MemoryStore
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / "events.log")
+
+
+def _run(store: MemoryStore, session_id: str = "s1") -> None:
+    store.create_session(session_id)
+    store.update_session_status(SessionStatus.running)
+    store.add_action(ActionType.intent_recognition, "意图识别", "识别中", ActionStatus.running)
+    store.update_action_status(0, ActionStatus.success, detail={"intent": "提前离店"}, summary="完成")
+    store.add_action(ActionType.tool_call, "调用工具", "查询", ActionStatus.success)
+    store.add_message(Channel.chat, "user", "订单 HT001 提前离店")
+    store.add_message(Channel.upstream, "agent", "请确认")
+    store.mark_channel_unread("upstream")
+    store.set_final_reply("处理完成")
+    store.update_session_status(SessionStatus.completed)
+
+
+class TestEventLogFormat:
+    def test_append_and_iter_roundtrip(self, log_path):
+        log = EventLog(log_path)
+        log.append(StoreEvent(EventKind.SESSION_CREATED, "s1", {}, 1))
+        log.append(StoreEvent(EventKind.FINAL_REPLY_SET, "s1", {"reply": "完成"}, 2))
+        log.close()
+
+        events = list(iter_events(log_path))
+        assert [(e.kind, e.session_id, e.data, e.ts_ns) for e in events] == [
+            (EventKind.SESSION_CREATED, "s1", {}, 1),
+            (EventKind.FINAL_REPLY_SET, "s1", {"reply": "完成"}, 2),
+        ]
+
+    def test_iter_filters_by_kind(self, log_path):
+        """按事件类型过滤，只解码所需载荷。"""
+        store = MemoryStore(event_log=EventLog(log_path))
+        _run(store)
+        store.close()
+
+        kinds = [e.kind for e in iter_events(log_path, kinds={EventKind.MESSAGE_ADDED})]
+        assert kinds == [EventKind.MESSAGE_ADDED, EventKind.MESSAGE_ADDED]
+
+    def test_torn_tail_ignored_and_truncated(self, log_path):
+        """末尾残缺帧回放时忽略，恢复写入前截断。"""
+        log = EventLog(log_path)
+        log.append(StoreEvent(EventKind.SESSION_CREATED, "s1", {}, 1))
+        log.append(StoreEvent(EventKind.SESSION_STATUS_CHANGED, "s1", {"status": "completed"}, 2))
+        log.close()
+        with open(log_path, "ab") as f:
+            f.write(b"\x40\x00\x00\x00\x03partial")
+
+        store = MemoryStore(event_log=EventLog(log_path))
+        assert store.get_session("s1") is not None
+        store.set_final_reply("完成", session_id="s1")
+        store.close()
+
+        kinds = [e.kind for e in iter_events(log_path)]
+        assert kinds == [
+            EventKind.SESSION_CREATED,
+            EventKind.SESSION_STATUS_CHANGED,
+            EventKind.FINAL_REPLY_SET,
+        ]
+
+    def test_invalid_file_rejected(self, log_path):
+        with open(log_path, "wb") as f:
+            f.write(b"not a log file")
+        with pytest.raises(ValueError, match="Invalid event log"):
+            MemoryStore(event_log=EventLog(log_path))
+
+
+class TestEventSourcedStore:
+    def test_replay_rebuilds_identical_state(self, log_path):
+        """回放日志得到与原存储一致的会话、动作、消息与版本。"""
+        original = MemoryStore(event_log=EventLog(log_path))
+        _run(original)
+        original.close()
+
+        restored = MemoryStore(event_log=EventLog(log_path))
+        assert restored.get_session("s1") == original.get_session("s1")
+        for channel in Channel:
+            assert restored.get_messages(channel, session_id="s1") == original.get_messages(
+                channel, session_id="s1"
+            )
+        assert restored.get_changed_actions(3, session_id="s1") == original.get_changed_actions(
+            3, session_id="s1"
+        )
+
+    def test_restored_store_continues_appending(self, log_path):
+        """恢复后继续写入，再次恢复包含新旧事件。"""
+        first = MemoryStore(event_log=EventLog(log_path))
+        _run(first)
+        first.close()
+
+        second = MemoryStore(event_log=EventLog(log_path))
+        second.add_action(ActionType.completed, "完成", "完成", ActionStatus.success, session_id="s1")
+        second.close()
+
+        third = MemoryStore(event_log=EventLog(log_path))
+        assert [a.index for a in third.get_actions(session_id="s1")] == [0, 1, 2]
+
+    def test_history_and_copy_on_write_replayed(self, log_path):
+        """历史快照由日志重建，之后的动作更新不影响快照。"""
+        store = MemoryStore(event_log=EventLog(log_path))
+        _run(store)
+        history = store.save_execution_history("提前离店", skill_name="early_checkout")
+        store.update_action_status(1, ActionStatus.error, session_id="s1")
+        store.close()
+
+        restored = MemoryStore(event_log=EventLog(log_path))
+        replayed = restored.get_history_detail(history.execution_id)
+        assert replayed.skill_name == "early_checkout"
+        assert [a.status for a in replayed.actions] == [ActionStatus.success, ActionStatus.success]
+        assert restored.get_actions(session_id="s1")[1].status == ActionStatus.error
+
+    def test_cleared_session_stays_cleared(self, log_path):
+        store = MemoryStore(event_log=EventLog(log_path))
+        _run(store, "s1")
+        _run(store, "s2")
+        store.clear_session("s1")
+        store.close()
+
+        restored = MemoryStore(event_log=EventLog(log_path))
+        assert restored.get_session("s1") is None
+        assert restored.get_session("s2").final_reply == "处理完成"
+
+    def test_interrupted_sessions_marked_error(self, log_path):
+        """回放后执行中与排队中的会话标记为 error，可被回收；标记写入日志。"""
+        store = MemoryStore(event_log=EventLog(log_path))
+        _run(store, "done")
+        store.create_session("queued")
+        store.create_session("running")
+        store.update_session_status(SessionStatus.running, session_id="running")
+        store.close()
+
+        restored = MemoryStore(
+            event_log=EventLog(log_path), idle_ttl_seconds=10, memory_budget_bytes=0
+        )
+        assert restored.get_session("done").status == SessionStatus.completed
+        assert restored.get_session("done").final_reply == "处理完成"
+        for sid in ("queued", "running"):
+            session = restored.get_session(sid)
+            assert session.status == SessionStatus.error
+            assert session.final_reply.startswith("系统错误")
+        restored.close()
+
+        again = MemoryStore(
+            event_log=EventLog(log_path), idle_ttl_seconds=10, memory_budget_bytes=0
+        )
+        assert again.get_session("running").status == SessionStatus.error
+        assert again.storage_stats()["event_log"]["appended"] == 0
+        assert again.sweep(now_ns=again._last_active["running"] + 10**13) == 3
+        again.close()
+
+    def test_replay_does_not_respill_history(self, log_path, tmp_path, monkeypatch):
+        """回放重建的历史记录已在溢出文件中时不重复写入。"""
+        spill_path = str(tmp_path / "history.jsonl")
+        monkeypatch.setattr(
+            "app.store.memory.HistoryStore",
+            lambda: HistoryStore(memory_size=1, spill_path=spill_path),
+        )
+        store = MemoryStore(event_log=EventLog(log_path))
+        _run(store)
+        saved = [store.save_execution_history(f"m{i}", session_id="s1") for i in range(3)]
+        store.close()
+
+        def spilled_lines() -> int:
+            with open(spill_path, "rb") as f:
+                return len(f.readlines())
+
+        assert spilled_lines() == 2
+        for _ in range(3):
+            restored = MemoryStore(event_log=EventLog(log_path))
+            restored.close()
+            assert spilled_lines() == 2
+        assert restored.history_stats()["spilled"] == 2
+        assert len(restored._history) == 3
+        assert all(restored.get_history_detail(h.execution_id) for h in saved)
+
+    def test_without_log_nothing_written(self, log_path):
+        """未配置事件日志时只维护内存视图。"""
+        store = MemoryStore()
+        _run(store)
+        assert store.storage_stats() == {"backend": "memory"}
+
+    def test_storage_stats_reports_event_log(self, log_path):
+        store = MemoryStore(event_log=EventLog(log_path))
+        _run(store)
+        store.end_run("s1")
+        stats = store.storage_stats()["event_log"]
+        assert stats["appended"] == 10
+        assert stats["bytes"] > 0
+        store.close()
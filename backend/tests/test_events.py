@@ -0,0 +1,161 @@
+"""会话事件总线测试 — 订阅扇出、跨线程投递、MemoryStore 变更事件与 SSE 事件流。"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.routers import stream
+from app.schemas.models import ActionStatus, ActionType, Channel, SessionStatus
+from app.store.events import SessionEventBus
+from app.store.memory import MemoryStore
+
+
+def _drain(sub) -> list:
+    """取出订阅队列中已到达的全部事件。"""
+    events = []
+    while not sub.queue.empty():
+        events.append(sub.queue.get_nowait())
+    return events
+
+
+class TestSessionEventBus:
+    @pytest.mark.asyncio
+    async def test_publish_fans_out_to_session_subscribers(self):
+        """事件只投递给对应会话的全部订阅者。"""
+        bus = SessionEventBus()
+        a1 = bus.subscribe("a")
+        a2 = bus.subscribe("a")
+        b = bus.subscribe("b")
+
+        bus.publish("a", "message", {"content": "hi"})
+        await asyncio.sleep(0)
+
+        assert [e.type for e in _drain(a1)] == ["message"]
+        assert [e.type for e in _drain(a2)] == ["message"]
+        assert _drain(b) == []
+
+    @pytest.mark.asyncio
+    async def test_publish_from_worker_thread(self):
+        """线程池中发布的事件投递到订阅者所在事件循环。"""
+        bus = SessionEventBus()
+        sub = bus.subscribe("a")
+
+        await asyncio.to_thread(bus.publish, "a", "status", {"status": "running"})
+
+        event = await sub.get(timeout=1)
+        assert event.type == "status"
+        assert event.data == {"status": "running"}
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe(self):
+        """取消订阅后不再接收事件，且不残留会话条目。"""
+        bus = SessionEventBus()
+        sub = bus.subscribe("a")
+        bus.unsubscribe(sub)
+        bus.unsubscribe(sub)
+
+        assert not bus.has_subscribers("a")
+        assert bus.subscriber_count() == 0
+
+    @pytest.mark.asyncio
+    async def test_get_timeout_returns_none(self):
+        """无事件时 get 超时返回 None。"""
+        sub = SessionEventBus().subscribe("a")
+        assert await sub.get(timeout=0.01) is None
+
+
+class TestStoreEvents:
+    @pytest.mark.asyncio
+    async def test_mutations_publish_events(self):
+        """MemoryStore 各类变更均发布对应事件。"""
+        store = MemoryStore()
+        store.create_session("s1")
+        sub = store.events.subscribe("s1")
+
+        store.update_session_status(SessionStatus.running)
+        store.add_action(ActionType.intent_recognition, "识别", "进行中", ActionStatus.running)
+        store.update_action_status(0, ActionStatus.success, summary="完成")
+        store.add_message(Channel.downstream, "agent", "已处理")
+        store.mark_channel_unread("downstream")
+        store.set_final_reply("完成")
+        store.end_run()
+        await asyncio.sleep(0)
+
+        events = _drain(sub)
+        assert [e.type for e in events] == [
+            "status",
+            "action_appended",
+            "action_updated",
+            "message",
+            "unread",
+            "final_reply",
+            "end",
+        ]
+        assert events[2].data["summary"] == "完成"
+        assert events[4].data == {"unread_channels": ["downstream"]}
+
+    @pytest.mark.asyncio
+    async def test_events_isolated_by_session(self):
+        """其他会话的变更不会推送给当前订阅者。"""
+        store = MemoryStore()
+        store.create_session("s1")
+        store.create_session("s2")
+        sub = store.events.subscribe("s1")
+
+        store.add_message(Channel.chat, "user", "hi", session_id="s2")
+        await asyncio.sleep(0)
+
+        assert _drain(sub) == []
+
+    @pytest.mark.asyncio
+    async def test_clear_session_ends_stream(self):
+        """会话被重置时通知订阅者结束。"""
+        store = MemoryStore()
+        store.create_session("s1")
+        sub = store.events.subscribe("s1")
+
+        store.clear_session("s1")
+        await asyncio.sleep(0)
+
+        assert [e.type for e in _drain(sub)] == ["end"]
+
+
+class TestEventStream:
+    @pytest.mark.asyncio
+    async def test_stream_pushes_snapshot_then_live_events(self, monkeypatch):
+        """事件流先推送快照，随后实时推送变更，收到 end 后结束。"""
+        store = MemoryStore()
+        monkeypatch.setattr(stream, "store", store)
+        store.create_session("s1")
+        store.update_session_status(SessionStatus.running)
+
+        gen = stream._event_stream("s1")
+        first = await anext(gen)
+        assert first.startswith("event: snapshot\n")
+
+        store.add_action(ActionType.intent_recognition, "识别", "进行中", ActionStatus.running)
+        chunk = await anext(gen)
+        event_line, data_line, _, _ = chunk.split("\n")
+        assert event_line == "event: action_appended"
+        assert json.loads(data_line.removeprefix("data: "))["index"] == 0
+
+        store.end_run("s1")
+        assert (await anext(gen)).startswith("event: end\n")
+        with pytest.raises(StopAsyncIteration):
+            await anext(gen)
+        assert store.events.subscriber_count() == 0
+
+    @pytest.mark.asyncio
+    async def test_stream_sends_keepalive_when_idle(self, monkeypatch):
+        """空闲时发送心跳注释。"""
+        store = MemoryStore()
+        monkeypatch.setattr(stream, "store", store)
+        monkeypatch.setattr(stream, "SSE_KEEPALIVE_SECONDS", 0.01)
+        store.create_session("s1")
+
+        gen = stream._event_stream("s1")
+        await anext(gen)
+        assert await anext(gen) == ": keepalive\n\n"
+        await gen.aclose()
+        assert store.events.subscriber_count() == 0
@@ -0,0 +1,94 @@
+"""执行历史分层存储测试 — 内存环形缓冲、磁盘溢出、懒加载与容量指标。"""
+
+import time
+
+from app.schemas.models import ActionStatus, ActionType, SessionStatus
+from app.store.history import HistoryStore
+from app.store.records import ActionRecord, HistoryRecord
+
+
+def _history(execution_id: str, actions: int = 1) -> HistoryRecord:
+    ts_ns = time.time_ns() // 1000 * 1000
+    return HistoryRecord(
+        execution_id,
+        f"消息 {execution_id}",
+        None,
+        SessionStatus.completed,
+        [
+            ActionRecord(i, ActionType.tool_call, "调用工具", "完成", ActionStatus.success, {"i": i}, ts_ns)
+            for i in range(actions)
+        ],
+        ts_ns,
+    )
+
+
+class TestHistoryStore:
+    def test_ring_keeps_most_recent_in_memory(self, tmp_path):
+        """超出容量时最旧记录溢出，内存中只保留最近 N 条。"""
+        hs = HistoryStore(memory_size=2, spill_path=str(tmp_path / "h.jsonl"))
+        for i in range(5):
+            hs.append(_history(f"e{i}"))
+
+        assert [h.execution_id for h in hs.list_recent()] == ["e3", "e4"]
+        assert len(hs) == 5
+
+    def test_spilled_entry_loaded_lazily(self, tmp_path):
+        """已溢出记录按 execution_id 从磁盘加载，内容完整。"""
+        hs = HistoryStore(memory_size=1, spill_path=str(tmp_path / "h.jsonl"))
+        original = _history("old", actions=3)
+        hs.append(original)
+        hs.append(_history("new"))
+
+        loaded = hs.get("old")
+        assert loaded == original
+        assert hs.stats()["spill_loads"] == 1
+
+    def test_get_in_memory_returns_same_object(self, tmp_path):
+        hs = HistoryStore(memory_size=5, spill_path=str(tmp_path / "h.jsonl"))
+        h = _history("e1")
+        hs.append(h)
+        assert hs.get("e1") is h
+        assert not (tmp_path / "h.jsonl").exists()
+
+    def test_get_unknown_returns_none(self, tmp_path):
+        hs = HistoryStore(memory_size=1, spill_path=str(tmp_path / "h.jsonl"))
+        hs.append(_history("e1"))
+        hs.append(_history("e2"))
+        assert hs.get("missing") is None
+
+    def test_existing_spill_file_indexed(self, tmp_path):
+        """重启后对已有溢出文件重建索引，旧记录仍可查询。"""
+        path = str(tmp_path / "h.jsonl")
+        first = HistoryStore(memory_size=1, spill_path=path)
+        first.append(_history("e1"))
+        first.append(_history("e2"))
+
+        second = HistoryStore(memory_size=1, spill_path=path)
+        assert second.get("e1").trigger_message == "消息 e1"
+        second.append(_history("e3"))
+        second.append(_history("e4"))
+        assert second.get("e1") is not None
+        assert second.get("e3") is not None
+        assert second.stats()["spilled"] == 2
+
+    def test_default_spill_path_is_temp_file(self):
+        """未配置路径时首次溢出创建临时文件。"""
+        hs = HistoryStore(memory_size=1, spill_path="")
+        assert hs.stats()["spill_path"] is None
+        hs.append(_history("e1"))
+        hs.append(_history("e2"))
+        assert hs.stats()["spill_path"].endswith(".jsonl")
+        assert hs.get("e1").execution_id == "e1"
+
+    def test_stats_memory_accounting(self, tmp_path):
+        """指标报告内存层条数与字节数、溢出层条数与文件大小。"""
+        path = tmp_path / "h.jsonl"
+        hs = HistoryStore(memory_size=2, spill_path=str(path))
+        for i in range(3):
+            hs.append(_history(f"e{i}", actions=2))
+
+        stats = hs.stats()
+        assert stats["in_memory"] == 2
+        assert stats["in_memory_bytes"] > 0
+        assert stats["spilled"] == 1
+        assert stats["spill_bytes"] == path.stat().st_size
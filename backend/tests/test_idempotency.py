@@ -0,0 +1,22 @@
+"""幂等键缓存测试 — 消息摘要与会话绑定（LRU / TTL 见 test_cache.py）。"""
+
+from app.store.idempotency import IdempotencyCache, IdempotencyEntry, fingerprint
+
+
+class TestIdempotencyCache:
+    def test_fingerprint_distinguishes_messages(self):
+        assert fingerprint("取消订单") == fingerprint("取消订单")
+        assert fingerprint("取消订单") != fingerprint("取消订单 ")
+
+    def test_remember_binds_key_to_session_and_message(self):
+        cache = IdempotencyCache(maxsize=10, ttl_seconds=60)
+        cache.remember("k1", "s1", "取消订单")
+        assert cache.get("k1") == IdempotencyEntry("s1", fingerprint("取消订单"))
+        assert cache.get("k1").fingerprint != fingerprint("提前离店")
+
+    def test_remember_overwrites_binding(self):
+        cache = IdempotencyCache(maxsize=10, ttl_seconds=60)
+        cache.remember("k1", "s1", "m")
+        cache.remember("k1", "s2", "m")
+        assert cache.get("k1").session_id == "s2"
+        assert cache.stats()["size"] == 1
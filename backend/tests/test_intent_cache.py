@@ -0,0 +1,35 @@
+"""意图识别缓存测试 — 消息归一化与缓存键（LRU / TTL 见 test_cache.py）。"""
+
+from app.agent.intent_cache import IntentCache, normalize_message
+
+
+class TestNormalizeMessage:
+    def test_masks_order_ids(self):
+        """不同订单号归一化后相同。"""
+        a = normalize_message("订单 HT20260301001 申请提前离店")
+        b = normalize_message("订单 HT20260301002 申请提前离店")
+        assert a == b
+        assert "HT2026" not in a
+
+    def test_masks_supplier_order_ids(self):
+        assert normalize_message("供应商订单 SUP-88901") == normalize_message("供应商订单 SUP-88902")
+
+    def test_collapses_whitespace_and_case(self):
+        assert normalize_message("  订单号  ht20260301001\n提前离店 ") == normalize_message("订单号 HT1 提前离店")
+
+
+class TestIntentCache:
+    def test_miss_then_hit(self):
+        cache = IntentCache(maxsize=10, ttl_seconds=60)
+        key = cache.make_key("订单 HT20260301001 申请提前离店", 1)
+        assert cache.get(key) is None
+        cache.put(key, "early_checkout")
+        assert cache.get(cache.make_key("订单 HT20260301003 申请提前离店", 1)) == "early_checkout"
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    def test_registry_version_is_part_of_key(self):
+        """Skill 注册表版本变化后旧缓存不再命中。"""
+        cache = IntentCache(maxsize=10, ttl_seconds=60)
+        cache.put(cache.make_key("取消订单", 1), "order_cancel")
+        assert cache.get(cache.make_key("取消订单", 2)) is None
@@ -0,0 +1,109 @@
+"""规则快速意图匹配测试 — front-matter 解析、组合匹配器、多义回退。"""
+
+import pytest
+
+from app.agent.intent_rules import IntentRuleMatcher, match_intent_rule
+from app.agent.skills import _parse_front_matter, get_skill
+from app.schemas.models import SkillDefinition
+
+
+def _skill(skill_id, keywords=None, patterns=None, exclude_patterns=None):
+    return SkillDefinition(
+        skill_id=skill_id,
+        name=skill_id,
+        description="",
+        content="",
+        keywords=keywords or [],
+        patterns=patterns or [],
+        exclude_patterns=exclude_patterns or [],
+    )
+
+
+class TestFrontMatter:
+    def test_parse_list_and_inline_values(self):
+        meta, body = _parse_front_matter(
+            "---\nkeywords: 提前离店，提前退房\npatterns:\n  - 订单.{0,20}取消\n---\n# 标题\n正文"
+        )
+        assert meta == {"keywords": ["提前离店", "提前退房"], "patterns": ["订单.{0,20}取消"]}
+        assert body == "# 标题\n正文"
+
+    def test_no_front_matter(self):
+        meta, body = _parse_front_matter("# 标题\n正文")
+        assert meta == {}
+        assert body == "# 标题\n正文"
+
+    def test_skill_files_declare_triggers(self):
+        """内置 Skill 声明了触发规则，且正文不含 front-matter。"""
+        skill = get_skill("early_checkout")
+        assert "提前离店" in skill.keywords
+        assert skill.name == "提前离店"
+        assert not skill.content.startswith("---")
+        assert get_skill("order_cancel").keywords
+        assert get_skill("order_cancel").exclude_patterns
+        assert get_skill("early_checkout").exclude_patterns
+
+    def test_parse_exclude_patterns_list(self):
+        """列表写法的正则保留逗号，不按逗号拆分。"""
+        meta, _ = _parse_front_matter("---\nexclude_patterns:\n  - 取消.{0,20}吗\n---\n# 标题")
+        assert meta == {"exclude_patterns": ["取消.{0,20}吗"]}
+
+
+class TestIntentRuleMatcher:
+    def test_single_match(self):
+        matcher = IntentRuleMatcher([_skill("a", keywords=["提前离店"]), _skill("b", keywords=["取消订单"])])
+        assert matcher.match("订单 HT001 申请提前离店") == "a"
+        assert matcher.stats()["hits"] == 1
+
+    def test_regex_pattern(self):
+        matcher = IntentRuleMatcher([_skill("b", patterns=[r"订单.{0,20}取消"])])
+        assert matcher.match("订单 HT20260301001 申请取消") == "b"
+
+    def test_no_match_falls_back(self):
+        matcher = IntentRuleMatcher([_skill("a", keywords=["提前离店"])])
+        assert matcher.match("今天天气怎么样") is None
+        assert matcher.stats()["misses"] == 1
+
+    def test_multiple_skills_fall_back(self):
+        """命中多个 Skill 时视为多义，交给 LLM。"""
+        matcher = IntentRuleMatcher([_skill("a", keywords=["提前离店"]), _skill("b", keywords=["取消订单"])])
+        assert matcher.match("取消订单还是提前离店") is None
+        assert matcher.stats()["ambiguous"] == 1
+
+    def test_keywords_are_escaped(self):
+        matcher = IntentRuleMatcher([_skill("a", keywords=["a.b"])])
+        assert matcher.match("axb") is None
+        assert matcher.match("a.b") == "a"
+
+    def test_skills_without_rules(self):
+        matcher = IntentRuleMatcher([_skill("a")])
+        assert matcher.match("任何消息") is None
+
+    def test_exclude_pattern_vetoes_match(self):
+        """命中否决规则时不走快速路径。"""
+        matcher = IntentRuleMatcher([_skill("b", keywords=["取消订单"], exclude_patterns=["不要取消"])])
+        assert matcher.match("不要取消订单") is None
+        assert matcher.match("取消订单") == "b"
+        assert matcher.stats()["vetoed"] == 1
+        assert matcher.stats()["hits"] == 1
+
+    def test_builtin_skills(self):
+        assert match_intent_rule("订单号 HT20260301001 的客人申请提前离店") == "early_checkout"
+        assert match_intent_rule("请帮我取消订单 HT20260301002") == "order_cancel"
+        assert match_intent_rule("订单取消，订单号 HT20260301002") == "order_cancel"
+        assert match_intent_rule("你好") is None
+
+    @pytest.mark.parametrize(
+        "message",
+        [
+            "订单 HT20260301002 不要取消",
+            "订单 HT20260301002 可以取消吗？",
+            "别取消订单了",
+            "订单 HT20260301002 申请取消",
+            "能不能取消订单 HT20260301002",
+            "客人说不想提前离店了",
+            "订单 HT20260301001 可以提前退房吗",
+        ],
+    )
+    def test_builtin_skills_defer_negations_and_questions(self, message):
+        """否定、疑问与措辞不明确的消息交给 LLM 判断，不直接执行不可逆操作。"""
+        assert match_intent_rule(message) is None
@@ -3,6 +3,7 @@
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
+from app.agent.tools.order_cancel import OrderCancelTool
 from app.mock.data import MOCK_ORDERS
 from app.routers.orders import router
 
@@ -83,3 +84,39 @@ class TestResetOrders:
     def teardown_method(self):
         for order in MOCK_ORDERS.values():
             order["status"] = "confirmed"
+
+
+class TestOrdersConditional:
+    """GET /api/orders ETag / If-None-Match 测试。"""
+
+    def setup_method(self):
+        for order in MOCK_ORDERS.values():
+            order["status"] = "confirmed"
+
+    def test_not_modified_without_changes(self):
+        client = _make_client()
+        etag = client.get("/api/orders").headers["ETag"]
+        response = client.get("/api/orders", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_cancel_tool_changes_etag(self):
+        client = _make_client()
+        etag = client.get("/api/orders").headers["ETag"]
+
+        OrderCancelTool().execute(order_id="HT20260301001")
+        response = client.get("/api/orders", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        statuses = {o["order_id"]: o["status"] for o in response.json()}
+        assert statuses["HT20260301001"] == "cancelled"
+
+    def test_reset_changes_etag(self):
+        client = _make_client()
+        etag = client.get("/api/orders").headers["ETag"]
+        client.post("/api/orders/reset")
+        assert client.get("/api/orders", headers={"If-None-Match": etag}).status_code == 200
+
+    def teardown_method(self):
+        for order in MOCK_ORDERS.values():
+            order["status"] = "confirmed"
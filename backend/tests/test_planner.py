@@ -0,0 +1,63 @@
+"""Skill 静态计划解析测试 — 步骤解析、参数模板渲染、参数提取结果解析。"""
+
+import pytest
+
+from app.agent.planner import PlanStep, parse_extracted_inputs, parse_plan, render_args
+from app.agent.skills import get_skill
+
+
+class TestParsePlan:
+    def test_parse_steps(self):
+        steps = parse_plan(
+            [
+                "order_query order_id={input.order_id}",
+                'message_send channel=upstream content="订单 {input.order_id} 请处理"',
+            ]
+        )
+        assert steps == [
+            PlanStep(tool="order_query", args={"order_id": "{input.order_id}"}),
+            PlanStep(
+                tool="message_send",
+                args={"channel": "upstream", "content": "订单 {input.order_id} 请处理"},
+            ),
+        ]
+
+    def test_invalid_argument_raises(self):
+        with pytest.raises(ValueError, match="Invalid plan argument"):
+            parse_plan(["order_query order_id"])
+
+    def test_builtin_skill_plans_parse(self):
+        """内置 Skill 的计划均可解析。"""
+        for skill_id in ("early_checkout", "order_cancel"):
+            skill = get_skill(skill_id)
+            assert skill.plan_inputs
+            assert parse_plan(skill.plan)
+
+
+class TestRenderArgs:
+    def test_render_placeholders(self):
+        context = {"input": {"order_id": "HT1"}, "order_query": {"supplier_order_id": "SUP-1"}}
+        args = render_args(
+            {"order_id": "{input.order_id}", "content": "供应商订单 {order_query.supplier_order_id}"},
+            context,
+        )
+        assert args == {"order_id": "HT1", "content": "供应商订单 SUP-1"}
+
+    def test_missing_reference_raises(self):
+        with pytest.raises(KeyError):
+            render_args({"order_id": "{order_query.supplier_order_id}"}, {"input": {}})
+
+
+class TestParseExtractedInputs:
+    def test_plain_json(self):
+        assert parse_extracted_inputs('{"order_id": "HT1"}', ["order_id"]) == {"order_id": "HT1"}
+
+    def test_fenced_json(self):
+        assert parse_extracted_inputs('```json\n{"order_id": "HT1"}\n```', ["order_id"]) == {"order_id": "HT1"}
+
+    def test_missing_input_returns_none(self):
+        assert parse_extracted_inputs('{"order_id": null}', ["order_id"]) is None
+        assert parse_extracted_inputs('{"order_id": "HT1"}', ["order_id", "request"]) is None
+
+    def test_invalid_json_returns_none(self):
+        assert parse_extracted_inputs("early_checkout", ["order_id"]) is None
@@ -0,0 +1,113 @@
+"""存储内部紧凑记录测试。"""
+
+import json
+import time
+from datetime import datetime, timezone
+
+from app.schemas.models import (
+    ActionLogEntry,
+    ActionStatus,
+    ActionType,
+    Channel,
+    ExecutionHistory,
+    SessionStatus,
+)
+from app.store.records import (
+    ActionRecord,
+    HistoryRecord,
+    MessageRecord,
+    datetime_to_ns,
+    ns_to_datetime,
+)
+
+
+def _now_ns() -> int:
+    return time.time_ns() // 1000 * 1000
+
+
+class TestTimestamps:
+    """纳秒时间戳与 datetime 转换。"""
+
+    def test_roundtrip_is_exact_at_microseconds(self):
+        ts_ns = _now_ns()
+        assert datetime_to_ns(ns_to_datetime(ts_ns)) == ts_ns
+
+    def test_ns_to_datetime_is_utc(self):
+        assert ns_to_datetime(0) == datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class TestActionRecord:
+    """动作记录。"""
+
+    def test_to_model_and_back(self):
+        record = ActionRecord(
+            0, ActionType.tool_call, "调用工具", "完成", ActionStatus.success, {"a": 1}, _now_ns(), 3
+        )
+        model = record.to_model()
+        assert isinstance(model, ActionLogEntry)
+        assert model.version == 3
+        assert ActionRecord.from_model(model) == record
+
+    def test_to_json_matches_model(self):
+        for ts_ns in (_now_ns(), 1_700_000_000_000_000_000):
+            record = ActionRecord(
+                0, ActionType.tool_call, "调用工具", "完成", ActionStatus.success, {"a": [1, "中"]}, ts_ns, 2
+            )
+            assert json.loads(record.to_json()) == record.to_model().model_dump(mode="json")
+            assert record.to_json() is record.to_json()
+
+    def test_updated_returns_new_record(self):
+        record = ActionRecord(
+            0, ActionType.tool_call, "调用工具", "查询", ActionStatus.running, {"a": 1}, _now_ns(), 1
+        )
+        updated = record.updated(ActionStatus.success, None, "完成", 2)
+        assert updated is not record
+        assert record.status == ActionStatus.running
+        assert (updated.status, updated.summary, updated.detail, updated.version) == (
+            ActionStatus.success,
+            "完成",
+            {"a": 1},
+            2,
+        )
+
+    def test_has_no_instance_dict(self):
+        record = ActionRecord(0, ActionType.intent_recognition, "思考", "", ActionStatus.running, None, 0)
+        assert not hasattr(record, "__dict__")
+
+    def test_title_is_interned(self):
+        a = ActionRecord(0, ActionType.intent_recognition, "".join(["思", "考"]), "", ActionStatus.running, None, 0)
+        b = ActionRecord(1, ActionType.intent_recognition, "".join(["思", "考"]), "", ActionStatus.running, None, 0)
+        assert a.title is b.title
+
+
+class TestMessageRecord:
+    """消息记录。"""
+
+    def test_to_model(self):
+        ts_ns = _now_ns()
+        model = MessageRecord(5, Channel.chat, "Agent", "你好", ts_ns).to_model()
+        assert model.id == 5
+        assert model.channel == Channel.chat
+        assert datetime_to_ns(model.timestamp) == ts_ns
+
+
+    def test_to_json_matches_model(self):
+        record = MessageRecord(5, Channel.chat, "Agent", "你好", _now_ns())
+        assert json.loads(record.to_json()) == record.to_model().model_dump(mode="json")
+
+
+class TestHistoryRecord:
+    """历史记录。"""
+
+    def test_json_roundtrip(self):
+        ts_ns = _now_ns()
+        record = HistoryRecord(
+            "exec-1",
+            "取消订单",
+            "cancel_order",
+            SessionStatus.completed,
+            [ActionRecord(0, ActionType.tool_call, "调用工具", "完成", ActionStatus.success, None, ts_ns)],
+            ts_ns,
+        )
+        line = record.to_model().model_dump_json()
+        assert HistoryRecord.from_model(ExecutionHistory.model_validate_json(line)) == record
@@ -1,17 +1,25 @@
 """REST API 端点测试 — POST /api/chat, GET /api/status, GET /api/messages。"""
 
-from unittest.mock import AsyncMock, patch
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 
+from app.agent.batch import ChatBatch
+from app.agent.runner import QueueFullError
 from app.main import app
+from app.routers import status
 from app.schemas.models import (
     ActionStatus,
     ActionType,
     Channel,
+    ChannelMessage,
     SessionStatus,
+    StatusResponse,
 )
+from app.store.idempotency import IdempotencyCache
 from app.store.memory import MemoryStore
 
 
@@ -22,15 +30,33 @@ def fresh_store(monkeypatch):
     monkeypatch.setattr("app.routers.chat.store", fresh)
     monkeypatch.setattr("app.routers.status.store", fresh)
     monkeypatch.setattr("app.routers.messages.store", fresh)
+    monkeypatch.setattr("app.routers.stream.store", fresh)
+    monkeypatch.setattr("app.routers.chat.idempotency_cache", IdempotencyCache())
+    status.status_cache.clear()
     return fresh
 
 
+@pytest.fixture(autouse=True)
+def mock_runner(monkeypatch):
+    """替换 Agent 工作池，避免测试中真正执行 Agent。"""
+    runner = MagicMock()
+    monkeypatch.setattr("app.routers.chat.agent_runner", runner)
+    return runner
+
+
 @pytest.fixture
 def client():
     """FastAPI TestClient。"""
     return TestClient(app)
 
 
+async def _get_async(url: str) -> httpx.Response:
+    """在当前事件循环内请求应用（长轮询测试需在等待期间由同一循环触发变更）。"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        return await ac.get(url)
+
+
 # === POST /api/chat 测试 ===
 
 
@@ -57,11 +83,82 @@ class TestChatEndpoint:
         assert session.session_id == session_id
 
     @patch("app.routers.chat.run_agent", new_callable=AsyncMock)
-    def test_send_message_triggers_agent(self, mock_agent, client, fresh_store):
-        """发送消息触发 run_agent 后台任务。"""
+    def test_send_message_triggers_agent(self, mock_agent, client, fresh_store, mock_runner):
+        """发送消息将 run_agent 任务提交到工作池。"""
         response = client.post("/api/chat", json={"message": "测试消息"})
         session_id = response.json()["session_id"]
-        mock_agent.assert_called_once_with(session_id, "测试消息")
+        mock_runner.submit.assert_called_once_with(mock_agent, session_id, "测试消息")
+
+    def test_send_message_queue_full_returns_429(self, client, fresh_store, mock_runner):
+        """工作池队列已满时返回 429 和 Retry-After，且不遗留会话。"""
+        mock_runner.submit.side_effect = QueueFullError(retry_after=7)
+        response = client.post("/api/chat", json={"message": "测试消息"})
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "7"
+        data = response.json()
+        assert data["error"] is True
+        assert data["error_type"] == "AGENT_QUEUE_FULL"
+        assert fresh_store.list_sessions() == []
+
+    def test_idempotency_key_replays_session(self, client, fresh_store, mock_runner):
+        """同一幂等键的重复请求返回已有会话，不再提交 Agent 任务。"""
+        headers = {"Idempotency-Key": "req-1"}
+        first = client.post("/api/chat", json={"message": "取消订单"}, headers=headers)
+        second = client.post("/api/chat", json={"message": "取消订单"}, headers=headers)
+        assert first.status_code == second.status_code == 200
+        assert second.json()["session_id"] == first.json()["session_id"]
+        assert "idempotent-replayed" not in first.headers
+        assert second.headers["idempotent-replayed"] == "true"
+        assert mock_runner.submit.call_count == 1
+        assert len(fresh_store.list_sessions()) == 1
+
+    def test_distinct_idempotency_keys_run_separately(self, client, fresh_store, mock_runner):
+        """不同幂等键或未携带幂等键的请求各自创建会话。"""
+        a = client.post("/api/chat", json={"message": "m"}, headers={"Idempotency-Key": "a"})
+        b = client.post("/api/chat", json={"message": "m"}, headers={"Idempotency-Key": "b"})
+        c = client.post("/api/chat", json={"message": "m"})
+        d = client.post("/api/chat", json={"message": "m"})
+        ids = {r.json()["session_id"] for r in (a, b, c, d)}
+        assert len(ids) == 4
+        assert mock_runner.submit.call_count == 4
+
+    def test_idempotency_key_reused_with_different_message(self, client, fresh_store, mock_runner):
+        """同一幂等键配不同消息返回 422。"""
+        headers = {"Idempotency-Key": "req-1"}
+        client.post("/api/chat", json={"message": "取消订单"}, headers=headers)
+        response = client.post("/api/chat", json={"message": "提前离店"}, headers=headers)
+        assert response.status_code == 422
+        assert response.json()["error_type"] == "IDEMPOTENCY_KEY_REUSED"
+        assert mock_runner.submit.call_count == 1
+
+    def test_idempotency_key_not_recorded_when_queue_full(self, client, fresh_store, mock_runner):
+        """被 429 拒绝的请求不占用幂等键，重试时正常提交。"""
+        headers = {"Idempotency-Key": "req-1"}
+        mock_runner.submit.side_effect = QueueFullError(retry_after=1)
+        assert client.post("/api/chat", json={"message": "m"}, headers=headers).status_code == 429
+        mock_runner.submit.side_effect = None
+        response = client.post("/api/chat", json={"message": "m"}, headers=headers)
+        assert response.status_code == 200
+        assert "idempotent-replayed" not in response.headers
+
+    def test_idempotency_key_outlives_evicted_session(self, client, fresh_store, mock_runner):
+        """会话被回收后幂等键仍指向原会话，重复请求不重新执行。"""
+        headers = {"Idempotency-Key": "req-1"}
+        first = client.post("/api/chat", json={"message": "m"}, headers=headers).json()
+        fresh_store.clear_session(first["session_id"])
+        second = client.post("/api/chat", json={"message": "m"}, headers=headers)
+        assert second.status_code == 200
+        assert second.json()["session_id"] == first["session_id"]
+        assert second.headers["idempotent-replayed"] == "true"
+        assert mock_runner.submit.call_count == 1
+        assert fresh_store.list_sessions() == []
+
+    def test_idempotency_key_too_long_rejected(self, client, fresh_store):
+        """超长幂等键被拒绝。"""
+        response = client.post(
+            "/api/chat", json={"message": "m"}, headers={"Idempotency-Key": "k" * 256}
+        )
+        assert response.status_code == 422
 
     def test_send_empty_message_rejected(self, client, fresh_store):
         """空请求体被拒绝。"""
@@ -79,6 +176,104 @@ class TestChatEndpoint:
         assert response.status_code == 422
 
 
+# === POST /api/chat/batch 测试 ===
+
+
+@pytest.fixture
+def mock_batches(monkeypatch):
+    """替换批次调度器，避免测试中真正投递任务。"""
+    scheduler = MagicMock()
+    scheduler.submit.side_effect = lambda run, session_ids, messages, concurrency: ChatBatch(
+        batch_id="b1", session_ids=session_ids, messages=messages, concurrency=concurrency
+    )
+    monkeypatch.setattr("app.routers.chat.batch_scheduler", scheduler)
+    return scheduler
+
+
+class TestChatBatchEndpoint:
+    """POST /api/chat/batch 与 GET /api/chat/batch/{batch_id} 端点测试。"""
+
+    def test_batch_returns_session_ids_in_order(self, client, fresh_store, mock_batches):
+        """批量提交为每条消息创建会话，按消息顺序返回 session_id。"""
+        response = client.post("/api/chat/batch", json={"messages": ["a", "b", "c"]})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["batch_id"] == "b1"
+        assert len(data["session_ids"]) == 3
+        assert {s.session_id for s in fresh_store.list_sessions()} == set(data["session_ids"])
+        _, session_ids, messages = mock_batches.submit.call_args.args
+        assert session_ids == data["session_ids"]
+        assert messages == ["a", "b", "c"]
+
+    def test_batch_concurrency_default_and_override(
+        self, client, fresh_store, mock_batches, monkeypatch
+    ):
+        """未指定 max_concurrency 时使用服务端配置；指定值只能调低，超出时截断为配置值。"""
+        monkeypatch.setattr("app.routers.chat.AGENT_BATCH_CONCURRENCY", 3)
+        client.post("/api/chat/batch", json={"messages": ["a"]})
+        assert mock_batches.submit.call_args.kwargs["concurrency"] == 3
+        client.post("/api/chat/batch", json={"messages": ["a"], "max_concurrency": 1})
+        assert mock_batches.submit.call_args.kwargs["concurrency"] == 1
+        client.post("/api/chat/batch", json={"messages": ["a"], "max_concurrency": 10000})
+        assert mock_batches.submit.call_args.kwargs["concurrency"] == 3
+
+    def test_batch_too_large_rejected(self, client, fresh_store, mock_batches, monkeypatch):
+        """超过批次上限返回 422，且不创建会话。"""
+        monkeypatch.setattr("app.routers.chat.AGENT_BATCH_MAX_SIZE", 2)
+        response = client.post("/api/chat/batch", json={"messages": ["a", "b", "c"]})
+        assert response.status_code == 422
+        assert response.json()["error_type"] == "BATCH_TOO_LARGE"
+        assert fresh_store.list_sessions() == []
+        mock_batches.submit.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "body",
+        [{"messages": []}, {"messages": ["a", ""]}, {"messages": ["a"], "max_concurrency": 0}],
+    )
+    def test_batch_invalid_body_rejected(self, client, fresh_store, mock_batches, body):
+        """空批次、空消息与非法并发上限被拒绝。"""
+        response = client.post("/api/chat/batch", json=body)
+        assert response.status_code == 422
+
+    def test_batch_status_counts(self, client, fresh_store, mock_batches):
+        """批次状态按会话状态汇总，已回收的会话计为 expired。"""
+        running = fresh_store.create_session()
+        fresh_store.update_session_status(SessionStatus.running, session_id=running.session_id)
+        done = fresh_store.create_session()
+        fresh_store.set_final_reply("好的", session_id=done.session_id)
+        fresh_store.update_session_status(SessionStatus.completed, session_id=done.session_id)
+        batch = ChatBatch(
+            batch_id="b1",
+            session_ids=[running.session_id, done.session_id, "gone"],
+            messages=["a", "b", "c"],
+            concurrency=2,
+            submitted=3,
+        )
+        mock_batches.get.side_effect = lambda batch_id: batch if batch_id == "b1" else None
+
+        response = client.get("/api/chat/batch/b1")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 3
+        assert data["submitted"] == 3
+        assert data["counts"]["running"] == 1
+        assert data["counts"]["completed"] == 1
+        assert data["counts"]["expired"] == 1
+        assert data["done"] is False
+        assert data["sessions"][1]["final_reply"] == "好的"
+        assert data["sessions"][2]["status"] is None
+
+        fresh_store.update_session_status(SessionStatus.error, session_id=running.session_id)
+        assert client.get("/api/chat/batch/b1").json()["done"] is True
+
+    def test_batch_status_not_found(self, client, fresh_store, mock_batches):
+        """未知批次返回 404。"""
+        mock_batches.get.return_value = None
+        response = client.get("/api/chat/batch/nope")
+        assert response.status_code == 404
+        assert response.json()["error_type"] == "BATCH_NOT_FOUND"
+
+
 # === GET /api/status/{session_id} 测试 ===
 
 
@@ -190,6 +385,288 @@ class TestStatusEndpoint:
         response = client.get("/api/status/any-id")
         assert response.status_code == 404
 
+    def test_status_concurrent_sessions(self, client, fresh_store):
+        """多个会话并存时按 session_id 返回各自状态。"""
+        s1 = fresh_store.create_session()
+        fresh_store.add_action(
+            action_type=ActionType.intent_recognition,
+            title="意图识别",
+            summary="识别",
+            status=ActionStatus.success,
+            session_id=s1.session_id,
+        )
+        s2 = fresh_store.create_session()
+
+        data1 = client.get(f"/api/status/{s1.session_id}").json()
+        data2 = client.get(f"/api/status/{s2.session_id}").json()
+        assert len(data1["actions"]) == 1
+        assert data2["actions"] == []
+
+
+class TestStatusSinceVersion:
+    """GET /api/status?since_version 版本变更模式测试。"""
+
+    def test_since_version_returns_updated_actions(self, client, fresh_store):
+        """已更新的早期动作也会返回，且携带当前版本号。"""
+        session = fresh_store.create_session()
+        fresh_store.add_action(
+            ActionType.intent_recognition, "意图识别", "识别中", ActionStatus.running
+        )
+        version = client.get(f"/api/status/{session.session_id}").json()["version"]
+
+        fresh_store.update_action_status(0, ActionStatus.success, summary="识别完成")
+
+        data = client.get(
+            f"/api/status/{session.session_id}?since_version={version}"
+        ).json()
+        assert data["actions"] is None
+        assert data["new_actions"] is None
+        assert [a["index"] for a in data["changed_actions"]] == [0]
+        assert data["changed_actions"][0]["status"] == "success"
+        assert data["version"] == session.version
+
+    def test_since_version_no_changes(self, client, fresh_store):
+        """无变更时返回空列表。"""
+        session = fresh_store.create_session()
+        fresh_store.add_action(
+            ActionType.intent_recognition, "意图识别", "识别", ActionStatus.success
+        )
+
+        data = client.get(
+            f"/api/status/{session.session_id}?since_version={session.version}"
+        ).json()
+        assert data["changed_actions"] == []
+
+    @pytest.mark.asyncio
+    async def test_since_version_long_poll_wakes_on_update(self, fresh_store):
+        """长轮询在早期动作被更新时唤醒。"""
+        session = fresh_store.create_session()
+        fresh_store.add_action(
+            ActionType.intent_recognition, "意图识别", "识别中", ActionStatus.running
+        )
+        since = session.version
+        asyncio.get_running_loop().call_later(
+            0.01, lambda: fresh_store.update_action_status(0, ActionStatus.success)
+        )
+
+        result = (
+            await _get_async(
+                f"/api/status/{session.session_id}?since_version={since}&wait_ms=5000"
+            )
+        ).json()
+        assert [a["status"] for a in result["changed_actions"]] == ["success"]
+
+
+class TestStatusLongPoll:
+    """GET /api/status 长轮询（wait_ms）测试。"""
+
+    def test_long_poll_times_out_with_empty_actions(self, client, fresh_store):
+        """无变更时等待至超时，返回与普通增量模式相同的结构。"""
+        session = fresh_store.create_session()
+
+        response = client.get(
+            f"/api/status/{session.session_id}?after_index=-1&wait_ms=20"
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["new_actions"] == []
+        assert data["actions"] is None
+        assert fresh_store.events.subscriber_count() == 0
+
+    def test_long_poll_returns_immediately_when_actions_exist(self, client, fresh_store):
+        """已有新动作时不等待。"""
+        session = fresh_store.create_session()
+        fresh_store.add_action(
+            ActionType.intent_recognition, "意图识别", "识别", ActionStatus.success
+        )
+
+        response = client.get(
+            f"/api/status/{session.session_id}?after_index=-1&wait_ms={status.MAX_WAIT_MS}"
+        )
+        assert len(response.json()["new_actions"]) == 1
+
+    def test_long_poll_wait_ms_out_of_range(self, client, fresh_store):
+        """wait_ms 超出上限返回 422。"""
+        session = fresh_store.create_session()
+        response = client.get(
+            f"/api/status/{session.session_id}?after_index=-1&wait_ms={status.MAX_WAIT_MS + 1}"
+        )
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_long_poll_wakes_on_new_action(self, fresh_store):
+        """等待期间追加动作后立即返回新动作。"""
+        session = fresh_store.create_session()
+        loop = asyncio.get_running_loop()
+        loop.call_later(
+            0.01,
+            lambda: fresh_store.add_action(
+                ActionType.tool_call, "调用工具", "查询", ActionStatus.running
+            ),
+        )
+
+        started = loop.time()
+        result = (
+            await _get_async(f"/api/status/{session.session_id}?after_index=-1&wait_ms=5000")
+        ).json()
+        assert loop.time() - started < 1
+        assert [a["index"] for a in result["new_actions"]] == [0]
+
+    @pytest.mark.asyncio
+    async def test_long_poll_wakes_on_final_reply(self, fresh_store):
+        """等待期间会话状态变更（如最终回复）也会唤醒。"""
+        session = fresh_store.create_session()
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.01, lambda: fresh_store.set_final_reply("完成"))
+
+        result = (
+            await _get_async(f"/api/status/{session.session_id}?after_index=-1&wait_ms=5000")
+        ).json()
+        assert result["new_actions"] == []
+        assert result["final_reply"] == "完成"
+
+
+class TestStatusConditional:
+    """GET /api/status ETag / If-None-Match 测试。"""
+
+    def test_not_modified_until_session_changes(self, client, fresh_store):
+        session = fresh_store.create_session()
+        url = f"/api/status/{session.session_id}"
+        first = client.get(url)
+        etag = first.headers["ETag"]
+
+        cached = client.get(url, headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["ETag"] == etag
+
+        fresh_store.add_action(ActionType.tool_call, "调用工具", "查询", ActionStatus.running)
+        changed = client.get(url, headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etag
+        assert len(changed.json()["actions"]) == 1
+
+    def test_weak_and_multiple_validators(self, client, fresh_store):
+        session = fresh_store.create_session()
+        url = f"/api/status/{session.session_id}"
+        etag = client.get(url).headers["ETag"]
+
+        assert client.get(url, headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+        assert client.get(url, headers={"If-None-Match": '"other"'}).status_code == 200
+
+    def test_unknown_session_still_404(self, client):
+        response = client.get("/api/status/missing", headers={"If-None-Match": "*"})
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_full_mode_long_poll_waits_for_new_version(self, fresh_store):
+        """完整模式下 If-None-Match 命中时长轮询等待版本前进。"""
+        session = fresh_store.create_session()
+        url = f"/api/status/{session.session_id}"
+        etag = (await _get_async(url)).headers["ETag"]
+        asyncio.get_running_loop().call_later(
+            0.01, lambda: fresh_store.set_final_reply("完成")
+        )
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            response = await ac.get(
+                f"{url}?wait_ms=5000", headers={"If-None-Match": etag}
+            )
+        assert response.status_code == 200
+        assert response.json()["final_reply"] == "完成"
+
+    @pytest.mark.asyncio
+    async def test_full_mode_long_poll_times_out_not_modified(self, fresh_store):
+        session = fresh_store.create_session()
+        url = f"/api/status/{session.session_id}"
+        etag = (await _get_async(url)).headers["ETag"]
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            response = await ac.get(f"{url}?wait_ms=20", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+
+class TestFastJSONResponses:
+    """预序列化响应与 API 模型输出一致，且同版本请求共享序列化结果。"""
+
+    def _populate(self, store):
+        session = store.create_session()
+        store.add_action(
+            ActionType.intent_recognition, "意图识别", "完成", ActionStatus.success,
+            detail={"intent": "提前离店", "nights": [1, 2]},
+        )
+        store.add_action(ActionType.tool_call, "调用工具", "查询", ActionStatus.running)
+        store.update_action_status(1, ActionStatus.success, summary="已查询")
+        store.add_message(Channel.chat, "user", "订单号 HT001 提前离店")
+        store.mark_channel_unread("downstream")
+        store.set_final_reply("处理完成")
+        return session
+
+    def test_status_with_non_str_detail_keys(self, client, fresh_store, monkeypatch):
+        """动作详情含非字符串键时正常返回（与 response_model 路径一致转为字符串键）。"""
+        monkeypatch.setattr("app.routers.snapshot.store", fresh_store)
+        session = fresh_store.create_session()
+        fresh_store.add_action(
+            ActionType.tool_call, "调用工具", "完成", ActionStatus.success,
+            detail={"output": {1: "a"}},
+        )
+        for url in (f"/api/status/{session.session_id}", f"/api/snapshot/{session.session_id}"):
+            response = client.get(url)
+            assert response.status_code == 200
+        data = client.get(f"/api/status/{session.session_id}").json()
+        assert data["actions"][0]["detail"] == {"output": {"1": "a"}}
+
+    @pytest.mark.parametrize(
+        ("query", "field"),
+        [("", "actions"), ("?after_index=0", "new_actions"), ("?since_version=2", "changed_actions")],
+    )
+    def test_status_matches_model_output(self, client, fresh_store, query, field):
+        session = self._populate(fresh_store)
+        snap = fresh_store.snapshot(
+            session.session_id,
+            after_index=0 if "after_index" in query else None,
+            since_version=2 if "since_version" in query else None,
+        )
+        expected = StatusResponse(
+            session_id=snap.session_id,
+            status=snap.status,
+            unread_channels=snap.unread_channels,
+            final_reply=snap.final_reply,
+            version=snap.version,
+            **{field: [a.to_model() for a in snap.actions]},
+        ).model_dump(mode="json")
+
+        response = client.get(f"/api/status/{session.session_id}{query}")
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == expected
+
+    def test_messages_match_model_output(self, client, fresh_store):
+        self._populate(fresh_store)
+        expected = [
+            ChannelMessage.model_validate(m.to_model()).model_dump(mode="json")
+            for m in fresh_store.get_messages(Channel.chat)
+        ]
+        url = f"/api/messages/chat?session_id={fresh_store.get_session().session_id}"
+        assert client.get(url).json() == expected
+
+    def test_same_version_shares_serialization(self, client, fresh_store):
+        session = self._populate(fresh_store)
+        url = f"/api/status/{session.session_id}"
+        before = status.status_cache.stats()
+        first = client.get(url)
+        second = client.get(url)
+        after = status.status_cache.stats()
+
+        assert first.content == second.content
+        assert after["hits"] - before["hits"] == 1
+        assert after["entries"] == 1
+
+        fresh_store.set_final_reply("已更新")
+        assert client.get(url).json()["final_reply"] == "已更新"
+        assert status.status_cache.stats()["entries"] == 2
+
 
 # === GET /api/messages/{channel} 测试 ===
 
@@ -197,13 +674,39 @@ class TestStatusEndpoint:
 class TestMessagesEndpoint:
     """GET /api/messages/{channel} 端点测试。"""
 
+    def test_messages_not_modified_until_channel_changes(self, client, fresh_store):
+        """ETag 按频道分区版本计算，其他频道的新消息不影响。"""
+        session = fresh_store.create_session()
+        fresh_store.add_message(Channel.chat, "user", "你好")
+        url = f"/api/messages/chat?session_id={session.session_id}"
+        etag = client.get(url).headers["ETag"]
+
+        fresh_store.add_message(Channel.downstream, "agent", "转发")
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+        fresh_store.add_message(Channel.chat, "agent", "您好")
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert len(response.json()) == 2
+
+    def test_messages_unknown_session_has_no_etag(self, client):
+        response = client.get("/api/messages/chat?session_id=missing")
+        assert response.json() == []
+        assert "ETag" not in response.headers
+
+    def test_messages_require_session_id(self, client, fresh_store):
+        """并发会话下不回退到最近创建的会话：缺少 session_id 返回 422。"""
+        fresh_store.create_session()
+        fresh_store.add_message(Channel.chat, "user", "别人的消息")
+        assert client.get("/api/messages/chat").status_code == 422
+
     def test_get_chat_messages(self, client, fresh_store):
         """获取对话频道消息。"""
-        fresh_store.create_session()
+        session = fresh_store.create_session()
         fresh_store.add_message(Channel.chat, "user", "你好")
         fresh_store.add_message(Channel.chat, "agent", "你好，有什么可以帮您？")
 
-        response = client.get("/api/messages/chat")
+        response = client.get(f"/api/messages/chat?session_id={session.session_id}")
         assert response.status_code == 200
         data = response.json()
         assert len(data) == 2
@@ -214,10 +717,10 @@ class TestMessagesEndpoint:
 
     def test_get_downstream_messages(self, client, fresh_store):
         """获取下游群消息。"""
-        fresh_store.create_session()
+        session = fresh_store.create_session()
         fresh_store.add_message(Channel.downstream, "agent", "下游消息")
 
-        response = client.get("/api/messages/downstream")
+        response = client.get(f"/api/messages/downstream?session_id={session.session_id}")
         assert response.status_code == 200
         data = response.json()
         assert len(data) == 1
@@ -225,10 +728,10 @@ class TestMessagesEndpoint:
 
     def test_get_upstream_messages(self, client, fresh_store):
         """获取上游群消息。"""
-        fresh_store.create_session()
+        session = fresh_store.create_session()
         fresh_store.add_message(Channel.upstream, "supplier", "上游消息")
 
-        response = client.get("/api/messages/upstream")
+        response = client.get(f"/api/messages/upstream?session_id={session.session_id}")
         assert response.status_code == 200
         data = response.json()
         assert len(data) == 1
@@ -236,15 +739,27 @@ class TestMessagesEndpoint:
 
     def test_get_messages_empty_channel(self, client, fresh_store):
         """无消息频道返回空列表。"""
-        fresh_store.create_session()
+        session = fresh_store.create_session()
 
-        response = client.get("/api/messages/chat")
+        response = client.get(f"/api/messages/chat?session_id={session.session_id}")
         assert response.status_code == 200
         assert response.json() == []
 
+    def test_get_messages_by_session_id(self, client, fresh_store):
+        """指定 session_id 时返回对应会话的消息。"""
+        s1 = fresh_store.create_session()
+        fresh_store.add_message(Channel.chat, "user", "会话一", session_id=s1.session_id)
+        s2 = fresh_store.create_session()
+        fresh_store.add_message(Channel.chat, "user", "会话二", session_id=s2.session_id)
+
+        data = client.get(f"/api/messages/chat?session_id={s1.session_id}").json()
+        assert [m["content"] for m in data] == ["会话一"]
+        data = client.get(f"/api/messages/chat?session_id={s2.session_id}").json()
+        assert [m["content"] for m in data] == ["会话二"]
+
     def test_get_messages_invalid_channel(self, client, fresh_store):
         """无效频道返回 400。"""
-        response = client.get("/api/messages/invalid_channel")
+        response = client.get("/api/messages/invalid_channel?session_id=s1")
         assert response.status_code == 400
         data = response.json()
         assert data["error"] is True
@@ -252,16 +767,35 @@ class TestMessagesEndpoint:
 
     def test_messages_filtered_by_channel(self, client, fresh_store):
         """消息按频道正确过滤。"""
-        fresh_store.create_session()
+        session = fresh_store.create_session()
         fresh_store.add_message(Channel.chat, "user", "对话消息")
         fresh_store.add_message(Channel.downstream, "agent", "下游消息")
         fresh_store.add_message(Channel.upstream, "supplier", "上游消息")
 
-        response = client.get("/api/messages/chat")
+        response = client.get(f"/api/messages/chat?session_id={session.session_id}")
         data = response.json()
         assert len(data) == 1
         assert data[0]["content"] == "对话消息"
 
+    def test_get_messages_after_id_and_limit(self, client, fresh_store):
+        """after_id 游标 + limit 增量读取。"""
+        session = fresh_store.create_session()
+        for i in range(4):
+            fresh_store.add_message(Channel.chat, "user", f"消息{i}")
+
+        url = f"/api/messages/chat?session_id={session.session_id}"
+        page = client.get(f"{url}&limit=2").json()
+        assert [m["content"] for m in page] == ["消息0", "消息1"]
+
+        rest = client.get(f"{url}&after_id={page[-1]['id']}").json()
+        assert [m["content"] for m in rest] == ["消息2", "消息3"]
+
+    def test_get_messages_invalid_limit(self, client, fresh_store):
+        """limit 超出范围返回 422。"""
+        session = fresh_store.create_session()
+        url = f"/api/messages/chat?session_id={session.session_id}&limit=0"
+        assert client.get(url).status_code == 422
+
 
 # === 统一错误响应格式测试 ===
 
@@ -280,7 +814,7 @@ class TestErrorResponse:
 
     def test_400_error_format(self, client, fresh_store):
         """400 错误使用统一格式。"""
-        response = client.get("/api/messages/bad_channel")
+        response = client.get("/api/messages/bad_channel?session_id=s1")
         assert response.status_code == 400
         data = response.json()
         assert data["error"] is True
@@ -337,3 +871,34 @@ class TestHealthCheck:
         response = client.get("/api/health")
         assert response.status_code == 200
         assert response.json() == {"status": "ok"}
+
+
+# === GET /api/stream 测试 ===
+
+
+class TestStreamEndpoint:
+    """GET /api/stream/{session_id} SSE 端点测试。"""
+
+    def test_stream_session_not_found(self, client):
+        """会话不存在返回 404。"""
+        response = client.get("/api/stream/nonexistent")
+        assert response.status_code == 404
+        assert response.json()["error_type"] == "SESSION_NOT_FOUND"
+
+    def test_stream_completed_session_sends_snapshot_and_closes(self, client, fresh_store):
+        """已结束的会话只推送快照后关闭连接。"""
+        session = fresh_store.create_session()
+        fresh_store.add_action(
+            ActionType.completed, "处理完成", "完成", ActionStatus.success
+        )
+        fresh_store.update_session_status(SessionStatus.completed)
+
+        with client.stream("GET", f"/api/stream/{session.session_id}") as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            body = "".join(response.iter_text())
+
+        assert body.startswith("event: snapshot\n")
+        assert '"status": "completed"' in body
+        assert '"title": "处理完成"' in body
+        assert fresh_store.events.subscriber_count() == 0
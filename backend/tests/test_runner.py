@@ -0,0 +1,84 @@
+"""Agent 工作池测试 — 并发上限、有界队列、背压与指标。"""
+
+import asyncio
+
+import pytest
+
+from app.agent.runner import AgentRunner, QueueFullError
+
+
+class TestAgentRunner:
+    @pytest.mark.asyncio
+    async def test_submit_executes_task(self):
+        """提交的任务由 worker 执行。"""
+        runner = AgentRunner(workers=2, queue_size=10)
+        done = []
+
+        async def job(session_id, message):
+            done.append((session_id, message))
+
+        runner.submit(job, "s1", "hello")
+        await runner.join()
+        assert done == [("s1", "hello")]
+        await runner.stop()
+
+    @pytest.mark.asyncio
+    async def test_concurrency_bounded_by_workers(self):
+        """同时运行的任务数不超过 worker 数。"""
+        runner = AgentRunner(workers=2, queue_size=10)
+        active = 0
+        peak = 0
+
+        async def job(_):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+        for i in range(6):
+            runner.submit(job, i)
+        await runner.join()
+        assert peak == 2
+        assert runner.stats()["completed"] == 6
+        await runner.stop()
+
+    @pytest.mark.asyncio
+    async def test_queue_full_raises(self):
+        """队列已满时抛出 QueueFullError 并计入 rejected。"""
+        runner = AgentRunner(workers=1, queue_size=1)
+        release = asyncio.Event()
+
+        async def job():
+            await release.wait()
+
+        runner.submit(job)
+        await asyncio.sleep(0)  # worker 取走第一个任务
+        runner.submit(job)  # 占满队列
+        with pytest.raises(QueueFullError) as exc_info:
+            runner.submit(job)
+        assert exc_info.value.retry_after >= 1
+        assert runner.stats()["rejected"] == 1
+
+        release.set()
+        await runner.join()
+        await runner.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_task_keeps_worker_alive(self):
+        """单个任务异常不影响后续任务执行。"""
+        runner = AgentRunner(workers=1, queue_size=10)
+        done = []
+
+        async def bad():
+            raise RuntimeError("boom")
+
+        async def good():
+            done.append(True)
+
+        runner.submit(bad)
+        runner.submit(good)
+        await runner.join()
+        assert done == [True]
+        assert runner.stats()["failed"] == 1
+        await runner.stop()
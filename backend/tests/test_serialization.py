@@ -0,0 +1,66 @@
+"""快速 JSON 序列化与序列化缓存测试。"""
+
+import json
+
+from app.schemas import serialization
+from app.schemas.serialization import BytesCache, FastJSONResponse, dumps, json_array
+
+
+class TestDumps:
+    def test_compact_utf8(self):
+        assert dumps({"a": "中文", "b": [1, None]}) == '{"a":"中文","b":[1,null]}'.encode()
+
+    def test_stdlib_fallback_matches(self, monkeypatch):
+        value = {"a": "中文", "b": [1, 2.5, None, True]}
+        fast = dumps(value)
+        monkeypatch.setattr(serialization, "orjson", None)
+        assert dumps(value) == fast
+        assert serialization.serializer_name() == "json"
+
+    def test_non_str_keys_match_stdlib(self, monkeypatch):
+        """工具输出中的非字符串键按标准库 json 的规则转为字符串。"""
+        value = {"output": {1: "a", 2.5: "b", False: "c", None: "d"}}
+        fast = dumps(value)
+        assert json.loads(fast) == {"output": {"1": "a", "2.5": "b", "false": "c", "null": "d"}}
+        monkeypatch.setattr(serialization, "orjson", None)
+        assert dumps(value) == fast
+
+    def test_unknown_types_as_string(self):
+        class Custom:
+            def __str__(self):
+                return "custom"
+
+        assert json.loads(dumps({"v": Custom()})) == {"v": "custom"}
+
+    def test_json_array(self):
+        assert json.loads(json_array([dumps(1), dumps({"a": 2})])) == [1, {"a": 2}]
+        assert json_array([]) == b"[]"
+
+    def test_response_sends_bytes_unchanged(self):
+        assert FastJSONResponse(b'{"a":1}').body == b'{"a":1}'
+        assert FastJSONResponse({"a": 1}).body == b'{"a":1}'
+
+
+class TestBytesCache:
+    def test_hit_and_miss_counters(self):
+        cache = BytesCache(max_entries=2)
+        assert cache.get("k") is None
+        cache.put("k", b"v")
+        assert cache.get("k") == b"v"
+        stats = cache.stats()
+        assert (stats["entries"], stats["bytes"], stats["hits"], stats["misses"]) == (1, 1, 1, 1)
+
+    def test_evicts_least_recently_used(self):
+        cache = BytesCache(max_entries=2)
+        cache.put("a", b"1")
+        cache.put("b", b"2")
+        cache.get("a")
+        cache.put("c", b"3")
+        assert cache.get("b") is None
+        assert cache.get("a") == b"1"
+        assert cache.get("c") == b"3"
+
+    def test_zero_capacity_disables_cache(self):
+        cache = BytesCache(max_entries=0)
+        cache.put("a", b"1")
+        assert cache.get("a") is None
@@ -26,14 +26,14 @@ class TestDeleteSessionRouter:
     def test_delete_session_success(self):
         """有活跃会话时清空成功（AC #5）。"""
         store = MemoryStore()
-        store.create_session()
+        session = store.create_session()
         store.add_message(
             channel=Channel.chat, sender="user", content="hello"
         )
         app, cleanup = _make_app(store)
         try:
             client = TestClient(app)
-            response = client.delete("/api/session")
+            response = client.delete(f"/api/session?session_id={session.session_id}")
             assert response.status_code == 200
             data = response.json()
             assert data["message"] == "会话已清空"
@@ -50,7 +50,7 @@ class TestDeleteSessionRouter:
         app, cleanup = _make_app(store)
         try:
             client = TestClient(app)
-            response = client.delete("/api/session")
+            response = client.delete("/api/session?session_id=missing")
             assert response.status_code == 200
             assert response.json()["message"] == "会话已清空"
         finally:
@@ -61,7 +61,7 @@ class TestDeleteSessionRouter:
         from app.schemas.models import ActionStatus, ActionType, SessionStatus
 
         store = MemoryStore()
-        store.create_session()
+        session = store.create_session()
         store.add_action(
             ActionType.intent_recognition, "a", "b", ActionStatus.success
         )
@@ -71,7 +71,7 @@ class TestDeleteSessionRouter:
         app, cleanup = _make_app(store)
         try:
             client = TestClient(app)
-            response = client.delete("/api/session")
+            response = client.delete(f"/api/session?session_id={session.session_id}")
             assert response.status_code == 200
             # 历史保留
             assert len(store.get_history_list()) == 1
@@ -82,13 +82,41 @@ class TestDeleteSessionRouter:
     def test_delete_session_double_call(self):
         """连续调用两次 DELETE 都成功。"""
         store = MemoryStore()
-        store.create_session()
+        session = store.create_session()
         app, cleanup = _make_app(store)
         try:
             client = TestClient(app)
-            r1 = client.delete("/api/session")
-            r2 = client.delete("/api/session")
+            url = f"/api/session?session_id={session.session_id}"
+            r1 = client.delete(url)
+            r2 = client.delete(url)
             assert r1.status_code == 200
             assert r2.status_code == 200
         finally:
             cleanup()
+
+    def test_delete_session_requires_session_id(self):
+        """缺少 session_id 时返回 422，不会清空最近创建的（他人的）会话。"""
+        store = MemoryStore()
+        store.create_session()
+        app, cleanup = _make_app(store)
+        try:
+            client = TestClient(app)
+            assert client.delete("/api/session").status_code == 422
+            assert client.delete("/api/session?session_id=").status_code == 422
+            assert store.get_session() is not None
+        finally:
+            cleanup()
+
+    def test_delete_session_leaves_other_sessions(self):
+        """只清空指定会话，其他并发会话不受影响。"""
+        store = MemoryStore()
+        mine = store.create_session()
+        other = store.create_session()
+        app, cleanup = _make_app(store)
+        try:
+            client = TestClient(app)
+            client.delete(f"/api/session?session_id={mine.session_id}")
+            assert store.get_session(mine.session_id) is None
+            assert store.get_session(other.session_id) is not None
+        finally:
+            cleanup()
@@ -0,0 +1,101 @@
+"""GET /api/snapshot/{session_id} 合并快照路由测试。"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.agent.tools.order_cancel import OrderCancelTool
+from app.mock.data import MOCK_ORDERS
+from app.routers import status
+from app.routers.snapshot import router
+from app.schemas.models import ActionStatus, ActionType, Channel, SnapshotResponse
+from app.store.memory import MemoryStore
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """独立的 MemoryStore 实例，订单状态测试前后重置。"""
+    fresh = MemoryStore()
+    monkeypatch.setattr("app.routers.snapshot.store", fresh)
+    status.status_cache.clear()
+    for order in MOCK_ORDERS.values():
+        order["status"] = "confirmed"
+    yield fresh
+    for order in MOCK_ORDERS.values():
+        order["status"] = "confirmed"
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def _populate(store: MemoryStore) -> str:
+    session = store.create_session()
+    store.add_action(ActionType.intent_recognition, "意图识别", "完成", ActionStatus.success)
+    store.add_message(Channel.chat, "user", "订单号 HT20260301001 提前离店")
+    store.add_message(Channel.downstream, "agent", "请确认离店日期")
+    return session.session_id
+
+
+class TestSnapshotEndpoint:
+    def test_full_snapshot(self, client, store):
+        session_id = _populate(store)
+        data = client.get(f"/api/snapshot/{session_id}").json()
+        SnapshotResponse.model_validate(data)
+
+        assert [a["index"] for a in data["status"]["actions"]] == [0]
+        assert data["status"]["changed_actions"] is None
+        assert [m["content"] for m in data["messages"]["chat"]] == ["订单号 HT20260301001 提前离店"]
+        assert data["messages"]["upstream"] == []
+        assert len(data["messages"]["downstream"]) == 1
+        assert len(data["orders"]) == len(MOCK_ORDERS)
+        assert data["cursors"]["since_version"] == data["status"]["version"]
+        assert data["cursors"]["chat_after"] == 1
+        assert data["cursors"]["upstream_after"] == 0
+        assert data["cursors"]["downstream_after"] == 2
+
+    def test_cursors_return_only_deltas(self, client, store):
+        session_id = _populate(store)
+        cursors = client.get(f"/api/snapshot/{session_id}").json()["cursors"]
+
+        unchanged = client.get(f"/api/snapshot/{session_id}", params=cursors).json()
+        assert unchanged["status"]["changed_actions"] == []
+        assert unchanged["status"]["actions"] is None
+        assert all(messages == [] for messages in unchanged["messages"].values())
+        assert unchanged["orders"] is None
+        assert unchanged["cursors"] == cursors
+
+        store.update_action_status(0, ActionStatus.success, summary="已确认")
+        store.add_message(Channel.upstream, "supplier", "已收到")
+        OrderCancelTool().execute(order_id="HT20260301001")
+
+        delta = client.get(f"/api/snapshot/{session_id}", params=cursors).json()
+        assert [a["summary"] for a in delta["status"]["changed_actions"]] == ["已确认"]
+        assert delta["messages"]["chat"] == []
+        assert [m["content"] for m in delta["messages"]["upstream"]] == ["已收到"]
+        assert delta["cursors"]["upstream_after"] == 3
+        assert delta["cursors"]["chat_after"] == cursors["chat_after"]
+        statuses = {o["order_id"]: o["status"] for o in delta["orders"]}
+        assert statuses["HT20260301001"] == "cancelled"
+
+    def test_not_modified(self, client, store):
+        session_id = _populate(store)
+        etag = client.get(f"/api/snapshot/{session_id}").headers["ETag"]
+
+        cached = client.get(f"/api/snapshot/{session_id}", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+
+        OrderCancelTool().execute(order_id="HT20260301002")
+        changed = client.get(f"/api/snapshot/{session_id}", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+
+    def test_session_not_found(self, client, store):
+        response = client.get("/api/snapshot/missing")
+        assert response.status_code == 404
+
+    def test_negative_message_cursor_rejected(self, client, store):
+        session_id = _populate(store)
+        assert client.get(f"/api/snapshot/{session_id}?chat_after=-1").status_code == 422
@@ -0,0 +1,278 @@
+"""SQLite 持久化存储测试 — 批量落盘、重启恢复、多 worker 读取、会话删除与热路径开销。"""
+
+import sqlite3
+import time
+
+import pytest
+
+from app.schemas.models import ActionStatus, ActionType, Channel, SessionStatus
+from app.store.sqlite import SQLiteStore
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "store.db")
+
+
+@pytest.fixture
+def make_store(db_path):
+    """创建使用同一数据库文件的存储实例（模拟重启或多个 worker），测试结束时关闭。"""
+    stores = []
+
+    def _make(**kwargs):
+        # 关闭后台定时刷盘，由测试显式 flush
+        kwargs.setdefault("flush_interval_ms", 60_000)
+        s = SQLiteStore(path=db_path, **kwargs)
+        stores.append(s)
+        return s
+
+    yield _make
+    for s in stores:
+        s.close()
+
+
+def _run_session(store, session_id="s1"):
+    store.create_session(session_id)
+    store.update_session_status(SessionStatus.running)
+    store.add_action(ActionType.intent_recognition, "意图识别", "识别中", ActionStatus.running)
+    store.update_action_status(0, ActionStatus.success, detail={"intent": "提前离店"}, summary="完成")
+    store.add_message(Channel.chat, "user", "提前离店")
+    store.add_message(Channel.downstream, "agent", "已处理")
+    store.mark_channel_unread("downstream")
+    store.set_final_reply("处理完成")
+    store.update_session_status(SessionStatus.completed)
+
+
+class TestSQLiteStore:
+    def test_wal_mode_enabled(self, make_store, db_path):
+        make_store()
+        mode = sqlite3.connect(db_path).execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+
+    def test_writes_buffered_until_flush(self, make_store, db_path):
+        """热路径只写缓冲，flush 后才落盘；同一动作的多次更新合并为一行。"""
+        store = make_store()
+        _run_session(store)
+        assert store.storage_stats()["pending_writes"] > 0
+
+        store.flush()
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM actions").fetchone()[0] == 1
+        assert conn.execute("SELECT status FROM actions").fetchone()[0] == "success"
+        assert conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 2
+        assert store.storage_stats()["pending_writes"] == 0
+
+    def test_restart_restores_session(self, make_store):
+        """重启后会话、动作、消息、未读与最终回复均可恢复。"""
+        first = make_store()
+        _run_session(first)
+        first.close()
+
+        second = make_store()
+        session = second.get_session("s1")
+        assert session.status == SessionStatus.completed
+        assert session.final_reply == "处理完成"
+        assert session.unread_channels == ["downstream"]
+        assert session.actions[0].detail == {"intent": "提前离店"}
+        assert session.version == first.get_session("s1").version
+        assert [m.content for m in second.get_messages(Channel.downstream, session_id="s1")] == ["已处理"]
+        assert second.get_changed_actions(since_version=0, session_id="s1")[0].index == 0
+
+    def test_restored_session_continues_counters(self, make_store):
+        """恢复的会话继续追加时 index 与消息 ID 不重复。"""
+        first = make_store()
+        _run_session(first)
+        first.close()
+
+        second = make_store()
+        action = second.add_action(
+            ActionType.completed, "完成", "完成", ActionStatus.success, session_id="s1"
+        )
+        msg = second.add_message(Channel.chat, "agent", "再见", session_id="s1")
+        assert action.index == 1
+        assert msg.id == 3
+
+    def test_interrupted_sessions_marked_error(self, make_store):
+        """重启后库中执行中与排队中的会话标记为 error，可被回收；已结束的会话不变。"""
+        first = make_store()
+        _run_session(first, "done")
+        first.create_session("queued")
+        first.create_session("running")
+        first.update_session_status(SessionStatus.running, session_id="running")
+        first.close()
+
+        second = make_store(idle_ttl_seconds=10)
+        done = second.get_session("done")
+        assert done.status == SessionStatus.completed
+        assert done.final_reply == "处理完成"
+        for sid in ("queued", "running"):
+            session = second.get_session(sid)
+            assert session.status == SessionStatus.error
+            assert session.final_reply.startswith("系统错误")
+        assert second.sweep(now_ns=second._last_active["running"] + 11_000_000_000) == 3
+
+    def test_restored_session_counted_for_retention(self, make_store):
+        """从数据库加载的会话计入内存占用，可被过期回收。"""
+        first = make_store()
+        _run_session(first)
+        first.close()
+
+        second = make_store(idle_ttl_seconds=10)
+        assert second.get_session("s1") is not None
+        assert second.session_stats()["approx_bytes"] > 0
+        assert second.sweep(now_ns=second._last_active["s1"] + 11_000_000_000) == 1
+        assert second.session_stats()["live"] == 0
+
+    def test_eviction_keeps_rows_and_reloads(self, make_store, db_path):
+        """回收只丢弃内存副本：数据库行保留，get_session 重新加载出完整会话。"""
+        store = make_store(idle_ttl_seconds=1)
+        _run_session(store)
+        store.end_run("s1")
+        # 回收前未落盘的写入同样保留
+        store.add_message(Channel.chat, "agent", "补充", session_id="s1")
+
+        assert store.sweep(now_ns=store._last_active["s1"] + 5_000_000_000) == 1
+        assert store.session_stats()["live"] == 0
+        store.flush()
+
+        conn = sqlite3.connect(db_path)
+        for table in ("sessions", "actions", "messages"):
+            count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            assert count > 0, table
+        conn.close()
+
+        session = store.get_session("s1")
+        assert session.status == SessionStatus.completed
+        assert session.final_reply == "处理完成"
+        assert [a.status for a in session.actions] == [ActionStatus.success]
+        chat = store.get_messages(Channel.chat, session_id="s1")
+        assert [m.content for m in chat] == ["提前离店", "补充"]
+
+    def test_other_worker_sees_flushed_changes(self, make_store):
+        """另一个 worker 读取到落盘后的最新状态。"""
+        writer = make_store()
+        reader = make_store()
+        writer.create_session("s1")
+        writer.add_action(ActionType.tool_call, "调用", "进行中", ActionStatus.running)
+        writer.flush()
+        assert reader.get_session("s1").actions[0].status == ActionStatus.running
+
+        writer.update_action_status(0, ActionStatus.success)
+        writer.flush()
+        assert reader.get_actions(session_id="s1")[0].status == ActionStatus.success
+
+    def test_cleared_session_not_reloaded(self, make_store):
+        """清除后、删除落盘前读取不会从数据库重新加载；落盘后缓存中也不残留。"""
+        store = make_store()
+        _run_session(store)
+        store.flush()
+        store.clear_session("s1")
+        assert store.get_session("s1") is None
+        store.flush()
+        assert store.get_session("s1") is None
+        assert store.list_sessions() == []
+
+    def test_session_deleted_by_other_worker_dropped_from_cache(self, make_store):
+        """其他 worker 删除会话后，本进程缓存的副本随之移除。"""
+        writer = make_store()
+        reader = make_store()
+        _run_session(writer)
+        writer.flush()
+        assert reader.get_session("s1") is not None
+
+        writer.clear_session("s1")
+        writer.flush()
+        assert reader.get_session("s1") is None
+        assert reader.list_sessions() == []
+        assert reader.session_stats()["approx_bytes"] == 0
+
+    def test_end_run_flushes(self, make_store):
+        """执行结束时立即落盘。"""
+        store = make_store()
+        _run_session(store)
+        store.end_run("s1")
+        assert store.storage_stats()["pending_writes"] == 0
+
+    def test_clear_session_deletes_rows(self, make_store, db_path):
+        store = make_store()
+        _run_session(store)
+        store.flush()
+        store.clear_session("s1")
+        store.flush()
+
+        conn = sqlite3.connect(db_path)
+        for table in ("sessions", "actions", "messages"):
+            assert conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] == 0
+        assert make_store().get_session("s1") is None
+
+    def test_history_persisted(self, make_store):
+        """历史记录跨重启保留，按 created_at 排序。"""
+        first = make_store()
+        _run_session(first, "s1")
+        h1 = first.save_execution_history("提前离店", session_id="s1")
+        _run_session(first, "s2")
+        h2 = first.save_execution_history("取消订单", session_id="s2")
+        first.close()
+
+        second = make_store()
+        assert [h.execution_id for h in second.get_history_list()] == [h1.execution_id, h2.execution_id]
+        assert second.get_history_detail(h1.execution_id).actions[0].status == ActionStatus.success
+
+    def test_in_memory_database(self):
+        store = SQLiteStore(path=":memory:", flush_interval_ms=60_000)
+        try:
+            _run_session(store)
+            store.flush()
+            assert store.get_session("s1").final_reply == "处理完成"
+        finally:
+            store.close()
+
+    def test_background_flush(self, make_store):
+        """后台线程按间隔自动落盘。"""
+        store = make_store(flush_interval_ms=10)
+        _run_session(store)
+        deadline = time.monotonic() + 2
+        # 缓冲在事务提交前即被取走，需同时等待刷盘计数
+        while time.monotonic() < deadline:
+            stats = store.storage_stats()
+            if not stats["pending_writes"] and stats["flushes"]:
+                break
+            time.sleep(0.01)
+        assert store.storage_stats()["pending_writes"] == 0
+        assert store.storage_stats()["flushes"] >= 1
+
+    def test_hot_path_cost_well_under_one_ms(self, make_store):
+        """热路径每条动作（追加 + 更新）含摊销刷盘的开销远低于 1ms。"""
+        store = make_store(flush_batch_size=200)
+        store.create_session("bench")
+        n = 2000
+        started = time.perf_counter()
+        for i in range(n):
+            store.add_action(ActionType.tool_call, f"步骤{i}", "执行中", ActionStatus.running, detail={"i": i})
+            store.update_action_status(i, ActionStatus.success)
+        store.flush()
+        per_action_ms = (time.perf_counter() - started) / n * 1000
+        assert per_action_ms < 0.5
+
+
+class TestCreateStore:
+    def test_selects_backend_from_env(self, monkeypatch, tmp_path):
+        from app.store.memory import MemoryStore, create_store
+
+        monkeypatch.setenv("STORE_BACKEND", "memory")
+        assert type(create_store()) is MemoryStore
+
+        monkeypatch.setenv("STORE_BACKEND", "sqlite")
+        monkeypatch.chdir(tmp_path)  # 默认数据库文件创建在临时目录
+        store = create_store()
+        try:
+            assert isinstance(store, SQLiteStore)
+        finally:
+            store.close()
+
+    def test_unknown_backend_raises(self, monkeypatch):
+        from app.store.memory import create_store
+
+        monkeypatch.setenv("STORE_BACKEND", "redis")
+        with pytest.raises(ValueError, match="Unknown STORE_BACKEND"):
+            create_store()
@@ -1,5 +1,8 @@
 """Tests for MemoryStore in-memory storage."""
 
+import sys
+import threading
+
 import pytest
 
 from app.schemas.models import (
@@ -144,6 +147,27 @@ class TestActionLogManagement:
         with pytest.raises(ValueError, match="not found"):
             store.update_action_status(99, ActionStatus.success)
 
+    def test_update_action_status_negative_index_raises(self):
+        """负数 index 不能按位置回绕到末尾动作。"""
+        store = MemoryStore()
+        store.create_session()
+        store.add_action(ActionType.tool_call, "a", "b", ActionStatus.running)
+        with pytest.raises(ValueError, match="not found"):
+            store.update_action_status(-1, ActionStatus.success)
+        assert store.get_actions()[0].status == ActionStatus.running
+
+    def test_update_action_status_positional_lookup(self):
+        """按 index 定位到对应动作，不影响其他动作。"""
+        store = MemoryStore()
+        store.create_session()
+        for i in range(5):
+            store.add_action(ActionType.tool_call, f"t{i}", "s", ActionStatus.running)
+        store.update_action_status(3, ActionStatus.success)
+        assert [a.status for a in store.get_actions()] == [ActionStatus.running] * 3 + [
+            ActionStatus.success,
+            ActionStatus.running,
+        ]
+
     def test_get_actions_all(self):
         store = MemoryStore()
         store.create_session()
@@ -179,6 +203,12 @@ class TestActionLogManagement:
         actions = store.get_actions(after_index=-1)
         assert len(actions) == 1
 
+    def test_get_actions_after_index_beyond_end(self):
+        store = MemoryStore()
+        store.create_session()
+        store.add_action(ActionType.intent_recognition, "a", "b", ActionStatus.success)
+        assert store.get_actions(after_index=10) == []
+
 
 class TestMessageManagement:
     def test_add_message(self):
@@ -208,6 +238,41 @@ class TestMessageManagement:
         downstream_msgs = store.get_messages(Channel.downstream)
         assert len(downstream_msgs) == 0
 
+    def test_message_ids_monotonic_across_channels(self):
+        """消息 ID 在会话内跨频道单调递增。"""
+        store = MemoryStore()
+        store.create_session()
+        ids = [
+            store.add_message(Channel.chat, "user", "a").id,
+            store.add_message(Channel.upstream, "agent", "b").id,
+            store.add_message(Channel.chat, "agent", "c").id,
+        ]
+        assert ids == [1, 2, 3]
+
+    def test_get_messages_after_id_cursor(self):
+        """after_id 只返回该频道中更新的消息。"""
+        store = MemoryStore()
+        store.create_session()
+        first = store.add_message(Channel.chat, "user", "a")
+        store.add_message(Channel.upstream, "agent", "b")
+        store.add_message(Channel.chat, "agent", "c")
+
+        newer = store.get_messages(Channel.chat, after_id=first.id)
+        assert [m.content for m in newer] == ["c"]
+        assert store.get_messages(Channel.chat, after_id=newer[-1].id) == []
+
+    def test_get_messages_limit(self):
+        """limit 限制返回条数，配合游标分页读取。"""
+        store = MemoryStore()
+        store.create_session()
+        for i in range(5):
+            store.add_message(Channel.downstream, "agent", f"m{i}")
+
+        page1 = store.get_messages(Channel.downstream, limit=2)
+        page2 = store.get_messages(Channel.downstream, after_id=page1[-1].id, limit=2)
+        assert [m.content for m in page1] == ["m0", "m1"]
+        assert [m.content for m in page2] == ["m2", "m3"]
+
 
 class TestUnreadChannels:
     def test_mark_channel_unread(self):
@@ -264,7 +329,7 @@ class TestHistoryManagement:
         assert history.skill_name is None
 
     def test_save_history_is_snapshot(self):
-        """History actions should be a deep copy, not affected by later changes."""
+        """History actions should be a snapshot, not affected by later changes."""
         store = MemoryStore()
         store.create_session()
         store.add_action(ActionType.intent_recognition, "a", "b", ActionStatus.success)
@@ -274,6 +339,30 @@ class TestHistoryManagement:
         history_list = store.get_history_list()
         assert len(history_list[0].actions) == 1  # snapshot should still have 1
 
+    def test_save_history_shares_actions_without_copy(self):
+        """快照直接共享已完成的动作对象，不做深拷贝。"""
+        store = MemoryStore()
+        store.create_session()
+        action = store.add_action(ActionType.tool_call, "a", "b", ActionStatus.success, detail={"k": 1})
+        history = store.save_execution_history("test")
+        assert history.actions[0] is action
+
+    def test_update_after_save_copies_on_write(self):
+        """保存后再修改动作时写时复制，快照保持原值。"""
+        store = MemoryStore()
+        store.create_session()
+        store.add_action(ActionType.tool_call, "a", "b", ActionStatus.running, detail={"k": 1})
+        history = store.save_execution_history("test")
+
+        store.update_action_status(0, ActionStatus.success, detail={"k": 2}, summary="done")
+
+        assert history.actions[0].status == ActionStatus.running
+        assert history.actions[0].detail == {"k": 1}
+        current = store.get_actions()[0]
+        assert current.status == ActionStatus.success
+        assert current is not history.actions[0]
+        assert store.get_changed_actions(since_version=0)[0] is current
+
     def test_get_history_list(self):
         store = MemoryStore()
         store.create_session()
@@ -386,3 +475,362 @@ class TestClearSession:
         assert new_session.status == SessionStatus.idle
         assert new_session.actions == []
         assert store.get_messages(Channel.chat) == []
+
+
+class TestMultiSession:
+    def test_create_session_keeps_other_sessions(self):
+        """新建会话不影响进行中的会话。"""
+        store = MemoryStore()
+        s1 = store.create_session()
+        store.add_action(
+            ActionType.intent_recognition, "a", "b", ActionStatus.running,
+            session_id=s1.session_id,
+        )
+        s2 = store.create_session()
+        assert store.get_session(s1.session_id) is s1
+        assert store.get_session(s2.session_id) is s2
+        assert len(store.get_actions(session_id=s1.session_id)) == 1
+        assert store.get_actions(session_id=s2.session_id) == []
+
+    def test_create_session_with_explicit_id(self):
+        store = MemoryStore()
+        session = store.create_session("custom-id")
+        assert session.session_id == "custom-id"
+        assert store.get_session("custom-id") is session
+
+    def test_action_index_scoped_per_session(self):
+        store = MemoryStore()
+        s1 = store.create_session()
+        s2 = store.create_session()
+        store.add_action(ActionType.intent_recognition, "a", "b", ActionStatus.success, session_id=s1.session_id)
+        store.add_action(ActionType.tool_call, "c", "d", ActionStatus.success, session_id=s1.session_id)
+        a = store.add_action(ActionType.intent_recognition, "e", "f", ActionStatus.running, session_id=s2.session_id)
+        assert a.index == 0
+        store.update_action_status(0, ActionStatus.success, session_id=s2.session_id)
+        assert store.get_actions(session_id=s2.session_id)[0].status == ActionStatus.success
+
+    def test_messages_scoped_per_session(self):
+        store = MemoryStore()
+        s1 = store.create_session()
+        s2 = store.create_session()
+        store.add_message(Channel.chat, "user", "s1 msg", session_id=s1.session_id)
+        store.add_message(Channel.chat, "user", "s2 msg", session_id=s2.session_id)
+        assert [m.content for m in store.get_messages(Channel.chat, session_id=s1.session_id)] == ["s1 msg"]
+        assert [m.content for m in store.get_messages(Channel.chat, session_id=s2.session_id)] == ["s2 msg"]
+
+    def test_unknown_session_raises(self):
+        store = MemoryStore()
+        store.create_session()
+        with pytest.raises(ValueError, match="No active session"):
+            store.add_message(Channel.chat, "user", "x", session_id="missing")
+
+    def test_context_session_id_used_as_default(self):
+        """未显式传入 session_id 时使用 current_session_id 上下文绑定的会话。"""
+        from app.store.memory import current_session_id
+
+        store = MemoryStore()
+        s1 = store.create_session()
+        store.create_session()  # 最近会话为 s2
+        token = current_session_id.set(s1.session_id)
+        try:
+            store.add_message(Channel.downstream, "agent", "to s1")
+        finally:
+            current_session_id.reset(token)
+        assert len(store.get_messages(Channel.downstream, session_id=s1.session_id)) == 1
+
+    def test_clear_session_only_removes_target(self):
+        store = MemoryStore()
+        s1 = store.create_session()
+        s2 = store.create_session()
+        store.clear_session(s1.session_id)
+        assert store.get_session(s1.session_id) is None
+        assert store.get_session(s2.session_id) is s2
+        assert store.list_sessions() == [s2]
+
+
+class TestChangeVersions:
+    def test_every_mutation_bumps_version(self):
+        """会话任一变更使版本号单调递增。"""
+        store = MemoryStore()
+        session = store.create_session()
+        assert session.version == 0
+
+        store.update_session_status(SessionStatus.running)
+        store.add_action(ActionType.intent_recognition, "识别", "进行中", ActionStatus.running)
+        store.update_action_status(0, ActionStatus.success)
+        store.add_message(Channel.chat, "user", "hi")
+        store.mark_channel_unread("upstream")
+        store.clear_channel_unread("upstream")
+        store.set_final_reply("完成")
+        assert session.version == 7
+
+    def test_action_stamped_with_latest_version(self):
+        """动作的 version 为其最近一次变更时的会话版本。"""
+        store = MemoryStore()
+        store.create_session()
+        action = store.add_action(ActionType.intent_recognition, "识别", "进行中", ActionStatus.running)
+        assert action.version == 1
+
+        store.add_action(ActionType.tool_call, "调用", "进行中", ActionStatus.running)
+        store.update_action_status(0, ActionStatus.success)
+        assert store.get_actions()[0].version == 3
+        # 已发布的记录不可变，更新以新记录替换
+        assert action.version == 1
+
+    def test_get_changed_actions_includes_updates(self):
+        """版本增量查询同时返回新增和已更新的早期动作，按 index 排序。"""
+        store = MemoryStore()
+        store.create_session()
+        store.add_action(ActionType.intent_recognition, "识别", "进行中", ActionStatus.running)
+        store.add_action(ActionType.skill_loaded, "加载", "进行中", ActionStatus.running)
+        since = store.get_session().version
+
+        store.add_action(ActionType.tool_call, "调用", "进行中", ActionStatus.running)
+        store.update_action_status(0, ActionStatus.success)
+
+        changed = store.get_changed_actions(since_version=since)
+        assert [a.index for a in changed] == [0, 2]
+        assert changed[0].status == ActionStatus.success
+        assert store.get_changed_actions(since_version=store.get_session().version) == []
+
+    def test_get_changed_actions_reports_repeated_update_once(self):
+        """同一动作多次更新只返回一次。"""
+        store = MemoryStore()
+        store.create_session()
+        store.add_action(ActionType.tool_call, "调用", "进行中", ActionStatus.running)
+        store.update_action_status(0, ActionStatus.running, summary="处理中")
+        store.update_action_status(0, ActionStatus.success)
+
+        changed = store.get_changed_actions(since_version=0)
+        assert len(changed) == 1
+        assert changed[0].status == ActionStatus.success
+
+    def test_get_changed_actions_no_session(self):
+        store = MemoryStore()
+        assert store.get_changed_actions(since_version=0) == []
+
+
+class TestConcurrentAccess:
+    """分片会话锁与一致快照读取。"""
+
+    def test_sessions_spread_over_lock_shards(self):
+        store = MemoryStore(lock_shards=8)
+        assert len(store._session_locks) == 8
+        locks = {id(store._session_lock(f"s{i}")) for i in range(100)}
+        assert len(locks) > 1
+
+    def test_snapshot_modes(self):
+        store = MemoryStore()
+        store.create_session("s1")
+        store.add_action(ActionType.intent_recognition, "识别", "完成", ActionStatus.success)
+        store.add_action(ActionType.tool_call, "调用", "进行中", ActionStatus.running)
+        store.update_action_status(0, ActionStatus.success, summary="已确认")
+
+        full = store.snapshot("s1")
+        assert [a.index for a in full.actions] == [0, 1]
+        assert full.version == 3
+        assert [a.index for a in store.snapshot("s1", after_index=0).actions] == [1]
+        assert [a.index for a in store.snapshot("s1", since_version=2).actions] == [0]
+        assert store.snapshot("missing") is None
+
+    def test_snapshot_with_message_cursors(self):
+        store = MemoryStore()
+        store.create_session("s1")
+        store.add_message(Channel.chat, "user", "a")
+        store.add_message(Channel.upstream, "supplier", "b")
+        store.add_message(Channel.chat, "agent", "c")
+
+        snap = store.snapshot("s1", message_cursors={Channel.chat: 1, Channel.upstream: 0})
+        assert [m.content for m in snap.messages[Channel.chat]] == ["c"]
+        assert [m.content for m in snap.messages[Channel.upstream]] == ["b"]
+        assert Channel.downstream not in snap.messages
+        assert store.snapshot("s1").messages is None
+
+    def test_snapshot_is_isolated_from_later_writes(self):
+        store = MemoryStore()
+        store.create_session("s1")
+        store.add_action(ActionType.tool_call, "调用", "进行中", ActionStatus.running)
+        snap = store.snapshot("s1")
+
+        store.add_action(ActionType.tool_call, "调用", "进行中", ActionStatus.running)
+        store.update_action_status(0, ActionStatus.success)
+        store.mark_channel_unread("upstream", session_id="s1")
+
+        assert len(snap.actions) == 1
+        assert snap.actions[0].status == ActionStatus.running
+        assert snap.unread_channels == []
+        assert snap.version == 1
+
+    def test_reader_not_blocked_by_writer_lock(self):
+        """写锁被持有时读取仍可完成。"""
+        store = MemoryStore()
+        store.create_session("s1")
+        store.add_action(ActionType.tool_call, "调用", "进行中", ActionStatus.running)
+        result = []
+        with store._session_lock("s1"):
+            reader = threading.Thread(target=lambda: result.append(store.snapshot("s1")))
+            reader.start()
+            reader.join(timeout=2)
+        assert result and result[0].version == 1
+
+    def test_snapshot_never_torn_under_concurrent_writes(self):
+        """并发写入期间快照的版本号、动作数量与动作状态始终一致。"""
+        store = MemoryStore()
+        store.create_session("s1")
+        done = threading.Event()
+
+        def writer():
+            for i in range(300):
+                store.add_action(ActionType.tool_call, "调用", "进行中", ActionStatus.running, session_id="s1")
+                store.update_action_status(i, ActionStatus.success, session_id="s1")
+            done.set()
+
+        # 缩短线程切换间隔，放大读写交错的概率
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        torn = []
+        try:
+            thread = threading.Thread(target=writer)
+            thread.start()
+            while not done.is_set():
+                snap = store.snapshot("s1")
+                # 每个动作先新增（+1）再更新（+1）：版本号决定动作数量与末尾动作状态
+                expected_len = (snap.version + 1) // 2
+                running = [a.index for a in snap.actions if a.status == ActionStatus.running]
+                expected_running = [expected_len - 1] if snap.version % 2 else []
+                if len(snap.actions) != expected_len or running != expected_running:
+                    torn.append(snap)
+            thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        assert torn == []
+        assert store.snapshot("s1").version == 600
+
+    def test_concurrent_writers_on_same_session(self):
+        store = MemoryStore()
+        store.create_session("s1")
+        store.add_action(ActionType.tool_call, "调用", "进行中", ActionStatus.running)
+
+        def writer():
+            for _ in range(200):
+                store.update_action_status(0, ActionStatus.running, session_id="s1")
+                store.add_message(Channel.chat, "Agent", "进度", session_id="s1")
+
+        threads = [threading.Thread(target=writer) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        session = store.get_session("s1")
+        assert session.version == 1 + 4 * 200 * 2
+        assert session.actions[0].version == max(a.version for a in store.get_changed_actions(0, "s1"))
+        ids = [m.id for m in store.get_messages(Channel.chat, session_id="s1")]
+        assert ids == list(range(1, 801))
+
+
+class TestSessionRetention:
+    """会话空闲过期、内存预算回收与指标。"""
+
+    SECOND_NS = 1_000_000_000
+
+    def _finished(self, store: MemoryStore, session_id: str, content: str = "完成") -> None:
+        store.create_session(session_id)
+        store.add_message(Channel.chat, "Agent", content, session_id=session_id)
+        store.update_session_status(SessionStatus.completed, session_id=session_id)
+
+    def test_idle_session_expires_after_ttl(self):
+        store = MemoryStore(idle_ttl_seconds=10, memory_budget_bytes=0)
+        self._finished(store, "s1")
+        last_active = store._last_active["s1"]
+
+        assert store.sweep(now_ns=last_active + 5 * self.SECOND_NS) == 0
+        assert store.sweep(now_ns=last_active + 11 * self.SECOND_NS) == 1
+        assert store.get_session("s1") is None
+        assert store.session_stats()["evicted"] == {"ttl": 1, "budget": 0}
+
+    def test_running_session_never_evicted(self):
+        store = MemoryStore(idle_ttl_seconds=10, memory_budget_bytes=1)
+        store.create_session("s1")
+        store.update_session_status(SessionStatus.running, session_id="s1")
+
+        assert store.sweep(now_ns=store._last_active["s1"] + 3600 * self.SECOND_NS) == 0
+        assert store.get_session("s1") is not None
+
+    def test_idle_session_never_evicted(self):
+        """已提交、仍在工作池中排队的 idle 会话不被 TTL 或内存预算回收。"""
+        store = MemoryStore(idle_ttl_seconds=10, memory_budget_bytes=1)
+        store.create_session("queued")
+        store.add_message(Channel.chat, "user", "x" * 2000, session_id="queued")
+
+        assert store.sweep(now_ns=store._last_active["queued"] + 3600 * self.SECOND_NS) == 0
+        assert store.get_session("queued") is not None
+
+    def test_message_reads_tolerate_concurrent_eviction(self, monkeypatch):
+        """取得会话后会话被回收线程移除：消息读取返回空结果而非抛出 KeyError。"""
+        store = MemoryStore()
+        store.create_session("s1")
+        store.add_message(Channel.chat, "user", "你好", session_id="s1")
+        session = store.get_session("s1")
+        store.clear_session("s1")
+        # 模拟 get_session 返回后、读取分区前发生回收
+        monkeypatch.setattr(store, "get_session", lambda session_id=None: session)
+
+        assert store.get_messages(Channel.chat, session_id="s1") == []
+        assert store.last_message_id(Channel.chat, session_id="s1") == 0
+
+    def test_eviction_keeps_history(self):
+        store = MemoryStore(idle_ttl_seconds=10, memory_budget_bytes=0)
+        self._finished(store, "s1")
+        saved = store.save_execution_history("msg", session_id="s1")
+
+        store.sweep(now_ns=store._last_active["s1"] + 11 * self.SECOND_NS)
+        assert store.get_history_detail(saved.execution_id) is not None
+
+    def test_budget_evicts_oldest_finished_first(self):
+        store = MemoryStore(idle_ttl_seconds=0, memory_budget_bytes=0)
+        self._finished(store, "old", "x" * 2000)
+        store.create_session("idle")
+        store.add_message(Channel.chat, "Agent", "x" * 2000, session_id="idle")
+        self._finished(store, "new", "x" * 2000)
+
+        # 预算只容得下两个会话：淘汰最早结束的会话，空闲会话不参与淘汰
+        store._memory_budget = store.session_stats()["approx_bytes"] - 1000
+        assert store.sweep() == 1
+        assert store.get_session("old") is None
+        assert store.get_session("idle") is not None
+        assert store.get_session("new") is not None
+        assert store.session_stats()["evicted"] == {"ttl": 0, "budget": 1}
+
+    def test_approx_bytes_tracks_session_content(self):
+        store = MemoryStore()
+        store.create_session("s1")
+        base = store.session_stats()["approx_bytes"]
+
+        store.add_action(ActionType.tool_call, "调用", "查询", ActionStatus.running, detail={"rows": ["x" * 500]})
+        grown = store.session_stats()["approx_bytes"]
+        assert grown - base > 500
+
+        store.clear_session("s1")
+        stats = store.session_stats()
+        assert stats["live"] == 0
+        assert stats["approx_bytes"] == 0
+
+    def test_sweeper_thread_lifecycle(self):
+        store = MemoryStore(idle_ttl_seconds=0.01, memory_budget_bytes=0)
+        self._finished(store, "s1")
+        store.start_sweeper(interval_seconds=0.01)
+        try:
+            for _ in range(200):
+                if store.get_session("s1") is None:
+                    break
+                threading.Event().wait(0.01)
+        finally:
+            store.close()
+        assert store.get_session("s1") is None
+        assert store._sweeper is None
+
+    def test_sweeper_not_started_without_limits(self):
+        store = MemoryStore(idle_ttl_seconds=0, memory_budget_bytes=0)
+        store.start_sweeper()
+        assert store._sweeper is None
@@ -24,7 +24,9 @@ function AppLayout() {
   const handleClearSession = async () => {
     setClearing(true);
     try {
-      await deleteSession();
+      if (state.sessionId) {
+        await deleteSession(state.sessionId);
+      }
       dispatch({ type: 'RESET' });
       message.success('会话已清空');
     } catch (err) {
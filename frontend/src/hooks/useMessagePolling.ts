@@ -15,9 +15,11 @@ export function useMessagePolling() {
   }, [state]);
 
   const fetchMessages = useCallback(async () => {
+    const sessionId = stateRef.current.sessionId;
+    if (!sessionId) return;
     for (const channel of CHANNELS) {
       try {
-        const messages = await getMessages(channel);
+        const messages = await getMessages(channel, sessionId);
         const current = stateRef.current;
         const oldCount = current.messages[channel].length;
         dispatch({ type: 'SET_MESSAGES', channel, messages });
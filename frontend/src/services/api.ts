@@ -51,8 +51,12 @@ export async function pollStatus(
   return request<StatusResponse>(url);
 }
 
-export async function getMessages(channel: Channel): Promise<ChannelMessage[]> {
-  return request<ChannelMessage[]>(`${API_BASE}/messages/${channel}`);
+export async function getMessages(
+  channel: Channel,
+  sessionId: string,
+): Promise<ChannelMessage[]> {
+  const params = new URLSearchParams({ session_id: sessionId });
+  return request<ChannelMessage[]>(`${API_BASE}/messages/${channel}?${params}`);
 }
 
 export async function getSkills(): Promise<SkillDefinition[]> {
@@ -67,8 +71,9 @@ export async function getTools(): Promise<ToolDefinition[]> {
   return request<ToolDefinition[]>(`${API_BASE}/tools`);
 }
 
-export async function deleteSession(): Promise<void> {
-  const response = await fetch(`${API_BASE}/session`, { method: 'DELETE' });
+export async function deleteSession(sessionId: string): Promise<void> {
+  const params = new URLSearchParams({ session_id: sessionId });
+  const response = await fetch(`${API_BASE}/session?${params}`, { method: 'DELETE' });
   if (!response.ok) {
     let errorMessage = `清空会话失败 (${response.status})`;
     try {